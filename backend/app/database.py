@@ -1,7 +1,9 @@
 from sqlmodel import SQLModel, create_engine
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from pathlib import Path
+from app.simple_config import settings
 
 # DB file in the root backend folder or appdata
 DB_DIR = Path(__file__).parent.parent / "db"
@@ -9,26 +11,54 @@ DB_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DB_DIR / "checkit.db"
 DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+def pragma_statements(db_config=None) -> list:
+    """PRAGMAs run on every new SQLite connection (settings.database)."""
+    cfg = db_config or settings.database
+    return [
+        f"PRAGMA journal_mode={cfg.journal_mode}",
+        f"PRAGMA synchronous={cfg.synchronous}",
+        f"PRAGMA cache_size=-{int(cfg.cache_size_kib)}",  # negative = KiB instead of pages
+        f"PRAGMA mmap_size={int(cfg.mmap_size_mb) * 1024 * 1024}",
+        f"PRAGMA temp_store={cfg.temp_store}",
+        f"PRAGMA busy_timeout={int(cfg.busy_timeout_ms)}",
+    ]
+
+def build_engine(url: str = DATABASE_URL, db_config=None):
+    """Creates the pooled async engine with the tuning from the `database` config section."""
+    cfg = db_config or settings.database
+    engine = create_async_engine(
+        url,
+        echo=cfg.echo,
+        pool_size=cfg.pool_size,
+        max_overflow=cfg.max_overflow,
+        pool_timeout=cfg.pool_timeout_seconds,
+        pool_pre_ping=False,  # local file, connections do not go stale
+    )
+    statements = pragma_statements(cfg)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    return engine
+
+engine = build_engine()
+
+# Created once; building a sessionmaker per request was measurable overhead under load
+async_session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def init_db():
-    import sqlalchemy
-    async with engine.begin() as conn:
+    from app import models  # noqa: F401 - registers the tables on SQLModel.metadata
+    from app.migrations import run_migrations
+    async with engine.connect() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
-        # Runtime migrations — silently add new columns if they don't exist yet
-        for col, coltype in [
-            ("screenshot_b64", "TEXT"),
-            ("screenshot_name", "TEXT"),
-            ("agree_newsletter", "INTEGER DEFAULT 0"),
-        ]:
-            try:
-                await conn.execute(sqlalchemy.text(f'ALTER TABLE "user" ADD COLUMN {col} {coltype}'))
-            except Exception:
-                pass  # column already exists
+        await conn.commit()
+        # Versioned migrations (app/migrations.py); a no-op when the schema is current
+        await conn.run_sync(run_migrations)
 
 async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    async with async_session_factory() as session:
         yield session
@@ -12,6 +12,9 @@ class MockGPIO:
     LOW = 0
     PUD_UP = "PUD_UP"
     PUD_DOWN = "PUD_DOWN"
+    RISING = "RISING"
+    FALLING = "FALLING"
+    BOTH = "BOTH"
 
     @staticmethod
     def setmode(mode):
@@ -108,4 +111,21 @@ class GPIOManager:
     def is_rpi_mode(self) -> bool:
         return IS_RPI
 
+    def supports_edge_detection(self) -> bool:
+        """Real RPi.GPIO (or rpi-lgpio) only. The mock has no interrupts, callers keep polling."""
+        return not isinstance(GPIO, MockGPIO) and hasattr(GPIO, "add_event_detect")
+
+    def add_edge_callback(self, pin: int, callback, bouncetime_ms: int = 20):
+        """
+        Calls callback(pin) from the GPIO library's event thread on every level change
+        (both edges) of an input pin, debounced in the driver by bouncetime_ms.
+        """
+        GPIO.add_event_detect(pin, GPIO.BOTH, callback=callback, bouncetime=max(1, int(bouncetime_ms)))
+
+    def remove_edge_callback(self, pin: int):
+        try:
+            GPIO.remove_event_detect(pin)
+        except Exception as e:
+            logger.debug(f"remove_event_detect({pin}) failed: {e}")
+
 gpio_manager = GPIOManager()
@@ -0,0 +1,173 @@
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+# Frames are (led_count, 3) uint8 RGB arrays. They go through the gamma/brightness lookup
+# table and are packed into the strip's 0x00RRGGBB ints once, when a sequence is built;
+# playing an effect then only pushes ready-made buffers.
+
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+NAMED_COLORS = {"red": RED, "green": GREEN, "blue": BLUE, "black": BLACK}
+
+def build_lut(gamma: float, brightness: int) -> np.ndarray:
+    """uint8[256]: channel value -> output value, gamma corrected and scaled by brightness (0-255)."""
+    levels = np.arange(256) / 255.0
+    return np.round(levels ** gamma * brightness).astype(np.uint8)
+
+class FrameSequence(NamedTuple):
+    frames: List[List[int]]  # packed pixel values, ready for the strip
+    delays: Tuple[float, ...]  # seconds each frame stays on
+    loop: bool
+    render_ms: float  # build cost of the whole sequence
+
+class FrameRenderer:
+    """
+    Builds effect frame sequences with NumPy and caches them: periodic effects (rainbow,
+    chase, police, blink) are computed once per process, not once per frame.
+    """
+    MAX_SOLIDS = 64  # admin can send arbitrary #rrggbb colors
+
+    def __init__(self, led_count: int, gamma: float = 1.0, brightness: int = 255):
+        self.n = led_count
+        self.lut = build_lut(gamma, brightness)
+        self._index = np.arange(led_count)
+        self._cache: Dict[str, FrameSequence] = {}
+        self._solids: Dict[Tuple[int, int, int], List[int]] = {}
+        self.sequences_built = 0
+
+    # --- Packing ---
+
+    def pack(self, frames: np.ndarray) -> List[List[int]]:
+        """(k, n, 3) or (n, 3) RGB -> lists of 0x00RRGGBB ints after the lookup table."""
+        corrected = self.lut[frames].astype(np.uint32)
+        packed = corrected[..., 0] << 16 | corrected[..., 1] << 8 | corrected[..., 2]
+        return packed.tolist() if packed.ndim == 2 else [packed.tolist()]
+
+    def blank(self, count: int = 1) -> np.ndarray:
+        return np.zeros((count, self.n, 3), dtype=np.uint8)
+
+    def solid(self, rgb: Tuple[int, int, int]) -> List[int]:
+        frame = self._solids.get(rgb)
+        if frame is None:
+            if len(self._solids) >= self.MAX_SOLIDS:
+                self._solids.clear()
+            frame = self._solids[rgb] = self.pack(np.tile(np.array(rgb, dtype=np.uint8), (self.n, 1)))[0]
+        return frame
+
+    def ramp(self, rgb: Tuple[int, int, int], levels) -> np.ndarray:
+        """One solid frame per level, rgb scaled by level/255 (the fade effects)."""
+        levels = np.asarray(list(levels), dtype=np.float64)[:, None] / 255.0
+        colors = np.round(levels * np.array(rgb, dtype=np.float64)).astype(np.uint8)
+        return np.repeat(colors[:, None, :], self.n, axis=1)
+
+    # --- Sequences ---
+
+    def sequence(self, name: str) -> FrameSequence:
+        seq = self._cache.get(name)
+        if seq is None:
+            started = time.perf_counter()
+            frames, delays, loop = getattr(self, f"_build_{name}")()
+            packed = self.pack(frames)
+            if isinstance(delays, (int, float)):
+                delays = (float(delays),) * len(packed)
+            seq = self._cache[name] = FrameSequence(packed, tuple(delays), loop,
+                                                    (time.perf_counter() - started) * 1000)
+            self.sequences_built += 1
+        return seq
+
+    def _build_rainbow(self):
+        # Wheel position of pixel i in frame k; j advances 5 per frame, 256 frames per cycle
+        offsets = (np.arange(256) * 5 % 256)[:, None]
+        pos = ((self._index * 256) // self.n + offsets) & 255
+        frames = np.zeros(pos.shape + (3,), dtype=np.int64)
+        a, b, c = pos < 85, (pos >= 85) & (pos < 170), pos >= 170
+        p = pos - 85 * b - 170 * c
+        frames[..., 0] = np.where(a, p * 3, np.where(b, 255 - p * 3, 0))
+        frames[..., 1] = np.where(a, 255 - p * 3, np.where(b, 0, p * 3))
+        frames[..., 2] = np.where(a, 0, np.where(b, p * 3, 255 - p * 3))
+        return frames.astype(np.uint8), 0.05, True
+
+    def _build_chase(self):
+        frames = self.blank(3)
+        for q in range(3):
+            frames[q, q::3] = WHITE
+        return frames, 0.1, True
+
+    def _build_police(self):
+        frames = self.blank(12)
+        frames[0:6:2] = RED
+        frames[6:12:2] = BLUE
+        return frames, 0.1, True
+
+    def _build_timeout_red(self):
+        # 5 s of red/black flashing, then solid red (follow-up program)
+        frames = self.blank(50)
+        frames[0::2] = RED
+        return frames, 0.1, False
+
+    def _build_pulse(self):
+        levels = list(range(0, 256, 26)) + list(range(255, -1, -26))
+        return self.ramp(GREEN, levels), 0.008, False
+
+    def _build_connection_pulse(self):
+        levels = list(range(0, 256, 15)) + list(range(255, -1, -15))
+        return self.ramp(GREEN, levels), 0.01, False
+
+    def _build_blink_red(self):
+        levels = list(range(30, 220, 8)) + list(range(220, 30, -8))
+        delays = [0.018] * len(levels)
+        delays[-1] += 0.12  # brief pause at the bottom
+        return self.ramp(RED, levels), delays, True
+
+    def _build_wire_pulse(self):
+        # Cyan impulses from both ends converging to the center, 4-pixel fading trail
+        n, half = self.n, self.n // 2
+        frames = self.blank(half + 4)
+        for step in range(half + 3):
+            for trail in range(4):
+                level = max(0, 255 - trail * 68)
+                color = (level // 6, level * 2 // 3, level)
+                left, right = step - trail, (n - 1 - step) + trail
+                if 0 <= left < n:
+                    frames[step, left] = color
+                if 0 <= right < n and right != left:
+                    frames[step, right] = color
+        delays = [0.018] * (half + 3) + [0.06]  # last frame: dark gap at the end of the pass
+        return frames, delays, False
+
+class RenderStats:
+    """Per-frame cost on the Pi: pushing the buffer into the driver and the show() DMA write."""
+    def __init__(self):
+        self.frames = 0
+        self.push_us_total = 0.0
+        self.show_us_total = 0.0
+        self.push_us_max = 0.0
+        self.show_us_max = 0.0
+
+    def record(self, push_us: float, show_us: float):
+        self.frames += 1
+        self.push_us_total += push_us
+        self.show_us_total += show_us
+        self.push_us_max = max(self.push_us_max, push_us)
+        self.show_us_max = max(self.show_us_max, show_us)
+
+    def as_dict(self, renderer: Optional[FrameRenderer] = None) -> Dict:
+        frames = self.frames or 1
+        stats = {
+            "frames": self.frames,
+            "avg_push_us": round(self.push_us_total / frames, 1),
+            "max_push_us": round(self.push_us_max, 1),
+            "avg_show_us": round(self.show_us_total / frames, 1),
+            "max_show_us": round(self.show_us_max, 1),
+        }
+        if renderer:
+            stats["sequences_built"] = renderer.sequences_built
+            stats["render_ms_per_frame"] = {
+                # list(): the render thread may be adding sequences
+                name: round(seq.render_ms / len(seq.frames), 3) for name, seq in list(renderer._cache.items())
+            }
+        return stats
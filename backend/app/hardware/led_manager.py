@@ -1,16 +1,20 @@
 import logging
 import asyncio
-import time
 from app.simple_config import settings
 from app.hardware.gpio_manager import IS_RPI
 
 logger = logging.getLogger(__name__)
 
 class LEDManager:
+    """
+    LED strip facade for the event loop. Effects are posted as programs to the render
+    thread (app/hardware/led_render_thread.py), which owns the strip; nothing here writes
+    to it, so a busy loop cannot stutter an animation and a show() cannot stall the loop.
+    """
     def __init__(self):
         self.led_count = 87     # Number of LED pixels.
         self.led_pin = 18       # GPIO pin connected to the pixels
-        self.led_brightness = 255  # Set to 0 for darkest and 255 for brightest
+        self.led_brightness = 255  # Driver-side scale, left at full: dimming is in the renderer's lookup table
         
         self.led_freq_hz = 800000  # LED signal frequency in hertz (usually 800khz)
         self.led_dma = 10       # DMA channel to use for generating signal
@@ -19,16 +23,20 @@ class LEDManager:
         
         self.strip = None
         self.current_state = "blocked" # blocked, animating, solved, manual
-        self.color_lib = None
+        self._render = None  # LEDRenderThread, created with the strip
+        self._generation = 0
+        self._loop = None
         
         # Admin command queuing
         self._command_queue = []
-        self._bg_task = None
-        
-        if IS_RPI:
+
+    def begin(self):
+        """Creates the WS281x strip and its render thread. Called by the hardware lifespan step on the client."""
+        if IS_RPI and self.strip is None:
             try:
-                from rpi_ws281x import PixelStrip, Color
-                self.color_lib = Color
+                from rpi_ws281x import PixelStrip
+                from app.hardware.led_effects import FrameRenderer
+                from app.hardware.led_render_thread import LEDRenderThread
                 self.strip = PixelStrip(
                     self.led_count, 
                     self.led_pin, 
@@ -39,11 +47,23 @@ class LEDManager:
                     self.led_channel
                 )
                 self.strip.begin()
+                renderer = FrameRenderer(self.led_count, settings.hardware.led_gamma,
+                                         settings.hardware.led_brightness)
+                self._loop = asyncio.get_running_loop()
+                self._render = LEDRenderThread(self.strip, self.led_count, renderer,
+                                               settings.hardware.led_frame_rate, self._on_render_state)
+                self._render.start()
                 self._set_solid_color("red")
                 logger.info("LED Strip initialized (WS281x).")
             except Exception as e:
                 logger.error(f"Failed to initialize LED strip: {e}")
                 self.strip = None
+                self._render = None
+
+    def stop(self):
+        if self._render:
+            self._render.stop()
+            self._render = None
 
     def queue_command(self, cmd: str):
         self._command_queue.append(cmd)
@@ -53,36 +73,48 @@ class LEDManager:
             return self._command_queue.pop(0)
         return None
 
-    def _cancel_bg(self):
-        if self._bg_task and not self._bg_task.done():
-            self._bg_task.cancel()
+    # --- Render thread mailbox ---
+
+    def _post(self, sequence: str = None, color=None, then=None):
+        from app.hardware.led_render_thread import Program
+        self._generation += 1
+        self._render.post(Program(sequence, color, then, generation=self._generation))
+
+    def _on_render_state(self, generation: int, state: str):
+        # Render thread: a one-shot effect ended and its follow-up sets the state
+        self._loop.call_soon_threadsafe(self._apply_render_state, generation, state)
+
+    def _apply_render_state(self, generation: int, state: str):
+        if generation == self._generation:  # ignore effects that were already replaced
+            self.current_state = state
 
     def play_effect(self, effect_name: str):
         """Called by Server/Agent to override normal behavior"""
         if not self.strip: return
-        self._cancel_bg()
+        from app.hardware.led_effects import RED
+        from app.hardware.led_render_thread import Program
         self.current_state = "manual"
         
-        if effect_name == "rainbow":
-            self._bg_task = asyncio.create_task(self._fx_rainbow())
-        elif effect_name == "chase":
-            self._bg_task = asyncio.create_task(self._fx_chase())
+        if effect_name in ("rainbow", "chase", "police"):
+            self._post(effect_name)
         elif effect_name == "off":
             self._set_solid_color("black")
         elif effect_name == "red":
             self._set_solid_color("red")
         elif effect_name == "green":
             self._set_solid_color("green")
-        elif effect_name == "police":
-            self._bg_task = asyncio.create_task(self._fx_police())
         elif effect_name == "timeout_red":
-            self._bg_task = asyncio.create_task(self._fx_timeout_red())
+            # Flash red for 5 seconds, then back to the solid red block representation
+            self._post("timeout_red", then=Program(color=RED, state="blocked"))
         elif effect_name == "pulse":
-            self._bg_task = asyncio.create_task(self._fx_pulse())
+            # Brief green breathing pulse when a patchcord is connected, then solid red (game still active)
+            self._post("pulse", then=Program(color=RED, state="manual"))
         elif effect_name == "blink_red":
-            self._bg_task = asyncio.create_task(self._fx_blink_red())
+            # Slow red heartbeat, game idle state during PatchMaster
+            self._post("blink_red")
         elif effect_name == "wire_pulse":
-            self._bg_task = asyncio.create_task(self._fx_wire_pulse())
+            # Single cyan pass from both ends per cable plug, then back into blink_red
+            self._post("wire_pulse", then=Program("blink_red", state="manual"))
         elif effect_name.startswith("#") and len(effect_name) == 7:
             try:
                 r = int(effect_name[1:3], 16)
@@ -97,235 +129,43 @@ class LEDManager:
             self._set_solid_color("red")
 
     def _set_solid_color(self, color_name):
-        if not self.strip or not self.color_lib: return
-        Color = self.color_lib
-        
+        if not self.strip: return
+        from app.hardware.led_effects import NAMED_COLORS, BLACK
         if isinstance(color_name, tuple) and len(color_name) == 3:
-            color = Color(color_name[0], color_name[1], color_name[2])
-        elif color_name == "red": color = Color(255, 0, 0)
-        elif color_name == "green": color = Color(0, 255, 0)
-        elif color_name == "blue": color = Color(0, 0, 255)
-        elif color_name == "black": color = Color(0, 0, 0)
-        else: color = Color(0, 0, 0)
-            
-        for i in range(self.strip.numPixels()):
-            self.strip.setPixelColor(i, color)
-        self.strip.show()
-
-    # --- Effects ---
-    def _wheel(self, pos):
-        """Generate rainbow colors across 0-255 positions."""
-        Color = self.color_lib
-        if pos < 85:
-            return Color(pos * 3, 255 - pos * 3, 0)
-        elif pos < 170:
-            pos -= 85
-            return Color(255 - pos * 3, 0, pos * 3)
+            rgb = color_name
         else:
-            pos -= 170
-            return Color(0, pos * 3, 255 - pos * 3)
-            
-    async def _fx_rainbow(self):
-        try:
-            j = 0
-            while True:
-                for i in range(self.strip.numPixels()):
-                    self.strip.setPixelColor(i, self._wheel((int(i * 256 / self.strip.numPixels()) + j) & 255))
-                self.strip.show()
-                j = (j + 5) % 256
-                await asyncio.sleep(0.05)
-        except asyncio.CancelledError:
-            pass
-
-    async def _fx_chase(self):
-        Color = self.color_lib
-        try:
-            while True:
-                for q in range(3):
-                    for i in range(0, self.strip.numPixels(), 3):
-                        if i + q < self.strip.numPixels():
-                            self.strip.setPixelColor(i + q, Color(255, 255, 255))
-                    self.strip.show()
-                    await asyncio.sleep(0.1)
-                    for i in range(0, self.strip.numPixels(), 3):
-                        if i + q < self.strip.numPixels():
-                            self.strip.setPixelColor(i + q, Color(0, 0, 0))
-        except asyncio.CancelledError:
-            pass
-            
-    async def _fx_police(self):
-        Color = self.color_lib
-        try:
-            while True:
-                # Flash Red
-                for _ in range(3):
-                    for i in range(self.strip.numPixels()):
-                        self.strip.setPixelColor(i, Color(255, 0, 0))
-                    self.strip.show()
-                    await asyncio.sleep(0.1)
-                    self._set_solid_color("black")
-                    await asyncio.sleep(0.1)
-                # Flash Blue
-                for _ in range(3):
-                    for i in range(self.strip.numPixels()):
-                        self.strip.setPixelColor(i, Color(0, 0, 255))
-                    self.strip.show()
-                    await asyncio.sleep(0.1)
-                    self._set_solid_color("black")
-                    await asyncio.sleep(0.1)
-        except asyncio.CancelledError:
-            pass
-
-    async def _fx_timeout_red(self):
-        try:
-            # Flash red for 5 seconds
-            for _ in range(25): # 25 iterations of 0.2s = 5 seconds
-                self._set_solid_color("red")
-                await asyncio.sleep(0.1)
-                self._set_solid_color("black")
-                await asyncio.sleep(0.1)
-            
-            # Return to solid red block representation
-            self.current_state = "blocked"
-            self._set_solid_color("red")
-        except asyncio.CancelledError:
-            pass
-
-    async def _fx_pulse(self):
-        """Brief green breathing pulse – used when a patchcord is connected.
-        Works regardless of current_state (unlike trigger_connection_pulse).
-        Total duration ≈ 180 ms, then returns to solid red (game-active state)."""
-        Color = self.color_lib
-        try:
-            for brightness in range(0, 256, 26):
-                for i in range(self.strip.numPixels()):
-                    self.strip.setPixelColor(i, Color(0, min(255, brightness), 0))
-                self.strip.show()
-                await asyncio.sleep(0.008)
-            for brightness in range(255, -1, -26):
-                for i in range(self.strip.numPixels()):
-                    self.strip.setPixelColor(i, Color(0, max(0, brightness), 0))
-                self.strip.show()
-                await asyncio.sleep(0.008)
-        except asyncio.CancelledError:
-            pass
-        finally:
-            self._set_solid_color("red")
-            self.current_state = "manual"  # Game is still active
-
-    async def _fx_blink_red(self):
-        """Slow red heartbeat – game idle state during PatchMaster (loops until cancelled)."""
-        Color = self.color_lib
-        try:
-            while True:
-                # Fade up
-                for b in range(30, 220, 8):
-                    for i in range(self.strip.numPixels()):
-                        self.strip.setPixelColor(i, Color(b, 0, 0))
-                    self.strip.show()
-                    await asyncio.sleep(0.018)
-                # Fade down
-                for b in range(220, 30, -8):
-                    for i in range(self.strip.numPixels()):
-                        self.strip.setPixelColor(i, Color(b, 0, 0))
-                    self.strip.show()
-                    await asyncio.sleep(0.018)
-                await asyncio.sleep(0.12)  # brief pause at bottom
-        except asyncio.CancelledError:
-            pass
-        finally:
-            self._set_solid_color("red")
-            self.current_state = "manual"
-
-    async def _fx_wire_pulse(self):
-        """Symmetric cyan impulse from both ends converging to center – SINGLE PASS per cable plug.
-        On normal completion → restarts blink_red.
-        On cancellation (next effect called) → solid red and exits.
-        Color: electric cyan with fading trail."""
-        Color = self.color_lib
-        n = self.strip.numPixels()
-        half = n // 2
-        completed = False
-        try:
-            # Single pass: both pulses travel from ends toward center
-            for step in range(half + 3):
-                # Clear all pixels
-                for i in range(n):
-                    self.strip.setPixelColor(i, Color(0, 0, 0))
-
-                # Draw 4-pixel trailing pulse from each side
-                for trail in range(4):
-                    brightness = max(0, 255 - trail * 68)
-                    r_val = brightness // 6       # slight red tint
-                    g_val = brightness * 2 // 3   # medium green
-                    b_val = brightness             # full blue → cyan
-
-                    left_pos = step - trail
-                    right_pos = (n - 1 - step) + trail
-
-                    if 0 <= left_pos < n:
-                        self.strip.setPixelColor(left_pos, Color(r_val, g_val, b_val))
-                    if 0 <= right_pos < n and right_pos != left_pos:
-                        self.strip.setPixelColor(right_pos, Color(r_val, g_val, b_val))
-
-                self.strip.show()
-                await asyncio.sleep(0.018)
-
-            # Brief dark gap at end of pass
-            for i in range(n):
-                self.strip.setPixelColor(i, Color(0, 0, 0))
-            self.strip.show()
-            await asyncio.sleep(0.06)
-            completed = True
-
-        except asyncio.CancelledError:
-            # Cancelled by next play_effect → do NOT override color, the caller already set it
-            self.current_state = "manual"
-            return
-
-        if completed:
-            # Pulse finished normally → chain back into blink_red
-            self.current_state = "manual"
-            self._bg_task = asyncio.create_task(self._fx_blink_red())
+            rgb = NAMED_COLORS.get(color_name, BLACK)
+        self._post(color=rgb)
 
     async def trigger_connection_pulse(self):
         """Breathing effect for successful connection (Green pulse)"""
         if not self.strip or self.current_state in ["solved", "manual"]:
             return
-            
-        self._cancel_bg()
+        from app.hardware.led_effects import RED
+        from app.hardware.led_render_thread import Program
         self.current_state = "animating"
-        Color = self.color_lib
-        
-        try:
-            for brightness in range(0, 256, 15):
-                for i in range(self.strip.numPixels()):
-                    self.strip.setPixelColor(i, Color(0, min(255, brightness), 0))
-                self.strip.show()
-                await asyncio.sleep(0.01)
-                
-            for brightness in range(255, -1, -15):
-                for i in range(self.strip.numPixels()):
-                   self.strip.setPixelColor(i, Color(0, max(0, brightness), 0))
-                self.strip.show()
-                await asyncio.sleep(0.01)
-        except asyncio.CancelledError:
-            pass
-        finally:
-            if self.current_state == "animating":
-                self._set_solid_color("red")
-                self.current_state = "blocked"
+        self._post("connection_pulse", then=Program(color=RED, state="blocked"))
 
     def set_solved(self):
         if self.strip and self.current_state != "solved":
-            self._cancel_bg()
             self.current_state = "solved"
             self._set_solid_color("green")
             
     def set_blocked(self):
         if self.strip and self.current_state != "blocked":
-            self._cancel_bg()
             self.current_state = "blocked"
             self._set_solid_color("red")
 
+    def get_stats(self) -> dict:
+        if not self._render:
+            return {"enabled": False}
+        render = self._render
+        return {
+            "enabled": True,
+            "state": self.current_state,
+            "frame_rate": render.frame_rate,
+            **render.timing.as_dict(),
+            **render.stats.as_dict(render.renderer),
+        }
+
 led_manager = LEDManager()
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, NamedTuple, Optional, Tuple
+from app.hardware.led_effects import FrameRenderer, RenderStats
+
+logger = logging.getLogger(__name__)
+
+class Program(NamedTuple):
+    """What the strip should do: a solid color or a cached frame sequence."""
+    sequence: Optional[str] = None  # FrameRenderer sequence name
+    color: Optional[Tuple[int, int, int]] = None  # solid color when sequence is None
+    then: Optional["Program"] = None  # started when a one-shot sequence ends
+    state: Optional[str] = None  # LEDManager.current_state once this program starts as a `then`
+    generation: int = 0  # post counter, tells stale state callbacks apart
+
+class _Running(NamedTuple):
+    program: Program
+    loop: bool
+
+class FrameTiming:
+    """How late each frame push started relative to its slot on the frame clock."""
+    WINDOW = 1000
+
+    def __init__(self):
+        self.frames = 0
+        self.dropped = 0
+        self.late_max_us = 0.0
+        self._late_total_us = 0.0
+        self._recent = deque(maxlen=self.WINDOW)  # appended by the render thread only
+
+    def record(self, late_us: float, dropped: int):
+        self.frames += 1
+        self.dropped += dropped
+        self._late_total_us += late_us
+        self.late_max_us = max(self.late_max_us, late_us)
+        self._recent.append(late_us)
+
+    def as_dict(self) -> dict:
+        recent = sorted(list(self._recent))
+        pick = lambda q: round(recent[min(len(recent) - 1, int(q * len(recent)))], 1) if recent else 0.0
+        return {
+            "timed_frames": self.frames,
+            "dropped_frames": self.dropped,
+            "avg_late_us": round(self._late_total_us / (self.frames or 1), 1),
+            "p50_late_us": pick(0.5),
+            "p99_late_us": pick(0.99),
+            "max_late_us": round(self.late_max_us, 1),
+        }
+
+class LEDRenderThread(threading.Thread):
+    """
+    Owns the strip: the only code that calls strip.show(). Frame changes land on a fixed
+    frame clock (hardware.led_frame_rate) computed from the program's start time, so sleep
+    overshoot never accumulates; when the thread wakes more than a slot late it skips the
+    frames whose slot has passed (counted as dropped) instead of slowing the animation.
+
+    Programs come in through a deque mailbox (append/popleft are atomic, no lock on the
+    event loop side); an Event only wakes the thread early. The newest program wins.
+    """
+    def __init__(self, strip, led_count: int, renderer: FrameRenderer, frame_rate: float,
+                 on_state: Callable[[int, str], None]):
+        super().__init__(name="led-render", daemon=True)
+        self.strip = strip
+        self.led_count = led_count
+        self.renderer = renderer
+        self.period = 1.0 / frame_rate
+        self.frame_rate = frame_rate
+        self.on_state = on_state
+        self.stats = RenderStats()
+        self.timing = FrameTiming()
+        self._mailbox: deque = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+
+    # --- Event loop side ---
+
+    def post(self, program: Program):
+        self._mailbox.append(program)
+        self._wake.set()
+
+    def stop(self, timeout: float = 1.0):
+        self._stopping = True
+        self._wake.set()
+        self.join(timeout)
+
+    # --- Render thread ---
+
+    def run(self):
+        try:
+            self._run()
+        except Exception:
+            logger.exception("LED render thread crashed.")
+
+    def _run(self):
+        program = None
+        frames = holds = None
+        index = 0
+        origin = 0.0     # start of the current program on the frame clock
+        next_slot = 0    # slot (in frame periods from origin) of the next frame change
+        while not self._stopping:
+            timeout = None if program is None else max(0.0, origin + next_slot * self.period - time.perf_counter())
+            if self._wake.wait(timeout):
+                self._wake.clear()
+                latest = None
+                while self._mailbox:
+                    latest = self._mailbox.popleft()
+                if latest is not None:
+                    program, frames, holds = self._load(latest)
+                    index, origin = 0, time.perf_counter()
+                    self._show(frames[0])
+                    next_slot = holds[0]
+                    if latest.sequence is None:
+                        program = None  # solid color: nothing left to animate
+                continue
+
+            current_slot = max(next_slot, int((time.perf_counter() - origin) / self.period))
+            skipped = 0
+            while True:
+                index += 1
+                if index == len(frames):
+                    if not program.loop:
+                        break
+                    index = 0
+                if next_slot + holds[index] > current_slot:
+                    break
+                next_slot += holds[index]  # this frame's whole slot already passed
+                skipped += 1
+
+            if index == len(frames):
+                # One-shot finished: chain into its follow-up on the same clock
+                self.timing.dropped += skipped
+                skipped = 0
+                follow = program.program.then
+                if follow is None:
+                    program = None
+                    continue
+                follow = follow._replace(generation=program.program.generation)
+                if follow.state:
+                    self.on_state(follow.generation, follow.state)
+                origin, next_slot = origin + next_slot * self.period, 0
+                program, frames, holds = self._load(follow)
+                index = 0
+                if follow.sequence is None:
+                    self._show(frames[0])
+                    program = None
+                    continue
+
+            late_us = (time.perf_counter() - (origin + next_slot * self.period)) * 1e6
+            self._show(frames[index])
+            self.timing.record(late_us, skipped)
+            next_slot += holds[index]
+
+    def _load(self, program: Program):
+        if program.sequence is None:
+            return _Running(program, False), [self.renderer.solid(program.color)], [1]
+        seq = self.renderer.sequence(program.sequence)
+        holds = [max(1, round(delay * self.frame_rate)) for delay in seq.delays]
+        return _Running(program, seq.loop), seq.frames, holds
+
+    def _show(self, frame):
+        """Pushes a whole prepared buffer (slice assignment, one call) and latches it."""
+        started = time.perf_counter()
+        self.strip[0:self.led_count] = frame
+        pushed = time.perf_counter()
+        self.strip.show()
+        self.stats.record((pushed - started) * 1e6, (time.perf_counter() - pushed) * 1e6)
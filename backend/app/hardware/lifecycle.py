@@ -0,0 +1,57 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+from app.simple_config import settings
+
+logger = logging.getLogger(__name__)
+
+class HardwareLifecycle:
+    """
+    Brings the hardware up as a lifespan step instead of as import side effects.
+    The patch_panel / solenoid / led_manager singletons only hold state until start();
+    on the server role they are never set up and just mirror what the agent reports.
+    """
+    def __init__(self):
+        self.role: Optional[str] = None
+        self.timings_ms: Dict[str, float] = {}
+
+    def start(self, role: Optional[str] = None):
+        from app.hardware.gpio_manager import IS_RPI
+        self.role = role or settings.system.platform_role
+        self.timings_ms = {}
+        if self.role != "client":
+            if not IS_RPI:
+                logger.info("Server role: hardware not initialized (remote state only).")
+                return
+            logger.warning("GPIO available on a server-role node, initializing hardware anyway.")
+
+        # Imported here so the server never loads the drivers
+        from app.hardware.gpio_manager import gpio_manager
+        from app.hardware.patch_panel import patch_panel
+        from app.hardware.solenoid import solenoid
+        self._timed("gpio", gpio_manager.initialize)
+        self._timed("patch_panel", patch_panel.setup_pins)
+        self._timed("solenoid", solenoid.setup_pins)
+        if IS_RPI:
+            from app.hardware.led_manager import led_manager
+            self._timed("led_strip", led_manager.begin)
+        logger.info(f"Hardware initialized: {self.timings_ms}")
+
+    def stop(self):
+        if "led_strip" in self.timings_ms:
+            from app.hardware.led_manager import led_manager
+            led_manager.stop()
+
+    def _timed(self, name: str, fn):
+        started = time.perf_counter()
+        fn()
+        self.timings_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def get_status(self) -> Dict[str, Any]:
+        status = {"role": self.role, "initialized": list(self.timings_ms), "timings_ms": self.timings_ms}
+        if "led_strip" in self.timings_ms:
+            from app.hardware.led_manager import led_manager
+            status["led"] = led_manager.get_stats()
+        return status
+
+hardware = HardwareLifecycle()
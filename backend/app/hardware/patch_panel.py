@@ -1,70 +1,230 @@
+import asyncio
 import logging
-from typing import List, Dict
+import threading
+from dataclasses import dataclass
+from typing import Any, List, Dict, Union
 from app.hardware.gpio_manager import gpio_manager, GPIO
 from app.simple_config import settings
 
 logger = logging.getLogger(__name__)
 
+# Mapping: Port Number (Physical Label) -> GPIO Pin (BCM)
+# As per the hardware schematic, we use BCM numbering in code.
+# To test the patch panel, short the following Physical Pins together:
+# Pair 1: GND (Physical Pin 9)  <-> Physical Pin 11 (BCM 17)
+# Pair 2: GND (Physical Pin 14) <-> Physical Pin 13 (BCM 27)
+# Pair 3: GND (Physical Pin 14) <-> Physical Pin 15 (BCM 22)
+# Pair 4: GND (Physical Pin 20) <-> Physical Pin 19 (BCM 10)
+# Pair 5: GND (Physical Pin 20) <-> Physical Pin 21 (BCM 9)
+# Pair 6: GND (Physical Pin 25) <-> Physical Pin 23 (BCM 11)
+# Pair 7: GND (Physical Pin 30) <-> Physical Pin 29 (BCM 5)
+# Pair 8: GND (Physical Pin 30) <-> Physical Pin 31 (BCM 6)
+# Bit i of every state mask corresponds to PIN_MAP[i].
+PIN_MAP = (
+    ("Pair 1", 17),
+    ("Pair 2", 27),
+    ("Pair 3", 22),
+    ("Pair 4", 10),
+    ("Pair 5", 9),
+    ("Pair 6", 11),
+    ("Pair 7", 5),
+    ("Pair 8", 6),
+)
+PAIR_COUNT = len(PIN_MAP)
+FULL_MASK = (1 << PAIR_COUNT) - 1
+
+@dataclass(frozen=True)
+class PatchPanelState:
+    """
+    Compact patch panel state: integer bitmasks over PIN_MAP.
+    connected = raw hardware bits, forced_mask = which pairs an admin overrides,
+    forced_values = the overridden values for those pairs.
+    """
+    connected: int = 0
+    forced_mask: int = 0
+    forced_values: int = 0
+
+    @property
+    def mask(self) -> int:
+        """Effective connected bits after admin overrides."""
+        return (self.connected & ~self.forced_mask) | (self.forced_values & self.forced_mask)
+
+    def is_solved(self) -> bool:
+        return self.mask == FULL_MASK
+
+    def changed_bits(self, other: "PatchPanelState") -> int:
+        """Bits whose effective value differs from another state (XOR)."""
+        return self.mask ^ other.mask
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Verbose per-pair view for the frontend / legacy agents."""
+        mask = self.mask
+        return [
+            {
+                "label": label,
+                "gpio": gpio,
+                "connected": bool(mask >> i & 1),
+                "forced": bool(self.forced_mask >> i & 1),
+            }
+            for i, (label, gpio) in enumerate(PIN_MAP)
+        ]
+
+def mask_from_dicts(pairs: List[Dict[str, Any]]) -> int:
+    mask = 0
+    for i, pair in enumerate(pairs[:PAIR_COUNT]):
+        if pair.get("connected"):
+            mask |= 1 << i
+    return mask
+
 class PatchPanel:
     def __init__(self):
-        # Mapping: Port Number (Physical Label) -> GPIO Pin (BCM)
-        # As per the hardware schematic, we use BCM numbering in code.
-        # To test the patch panel, short the following Physical Pins together:
-        # Pair 1: GND (Physical Pin 9)  <-> Physical Pin 11 (BCM 17)
-        # Pair 2: GND (Physical Pin 14) <-> Physical Pin 13 (BCM 27)
-        # Pair 3: GND (Physical Pin 14) <-> Physical Pin 15 (BCM 22)
-        # Pair 4: GND (Physical Pin 20) <-> Physical Pin 19 (BCM 10)
-        # Pair 5: GND (Physical Pin 20) <-> Physical Pin 21 (BCM 9)
-        # Pair 6: GND (Physical Pin 25) <-> Physical Pin 23 (BCM 11)
-        # Pair 7: GND (Physical Pin 30) <-> Physical Pin 29 (BCM 5)
-        # Pair 8: GND (Physical Pin 30) <-> Physical Pin 31 (BCM 6)
-        
-        self.pin_mapping = [
-            {"label": "Pair 1", "gpio": 17},
-            {"label": "Pair 2", "gpio": 27},
-            {"label": "Pair 3", "gpio": 22},
-            {"label": "Pair 4", "gpio": 10},
-            {"label": "Pair 5", "gpio": 9},
-            {"label": "Pair 6", "gpio": 11},
-            {"label": "Pair 7", "gpio": 5},
-            {"label": "Pair 8", "gpio": 6},
-        ]
+        self.pin_mapping = [{"label": label, "gpio": gpio} for label, gpio in PIN_MAP]
         
-        # Initialize Pins
+        # Edge-triggered mode (RPi only): bit i of _mask = pair i connected,
+        # kept up to date from GPIO interrupt callbacks instead of reading the pins on every call
+        self.edge_mode = False
+        self._mask = 0
+        self._mask_lock = threading.Lock()
+        self._pin_bits = {pair["gpio"]: 1 << i for i, pair in enumerate(self.pin_mapping)}
+        self._loop: asyncio.AbstractEventLoop = None
+        self._changed: asyncio.Event = None
+        self.pins_ready = False
+
+        # Remote State Storage (for Server Mode) - fallback initial state: all disconnected
+        self._remote_mask = 0
+        # Admin overrides
+        self._forced_mask = 0
+        self._forced_values = 0
+
+    def setup_pins(self):
+        """GPIO setup, done by the hardware lifespan step on the client (never at import)."""
+        if self.pins_ready:
+            return
         for pair in self.pin_mapping:
             # Setup as Input with Pull Up. 
             # If connected to END (Ground), it will read LOW.
             gpio_manager.setup_input(pair["gpio"], GPIO.PUD_UP)
-            
-        # Remote State Storage (for Server Mode)
-        self._remote_state = []
-        self._forced_state = {} # index -> bool
-        # Fallback initial state (all disconnected)
-        for pair in self.pin_mapping:
-            self._remote_state.append({
-                "label": pair["label"],
-                "gpio": pair["gpio"],
-                "connected": False
-            })
+        self.pins_ready = True
 
     def set_force_state(self, index: int, state: bool):
         """Forces a specific port to a simulated state (for Admin override)."""
-        self._forced_state[index] = state
+        if not 0 <= index < PAIR_COUNT:
+            return
+        bit = 1 << index
+        self._forced_mask |= bit
+        self._forced_values = (self._forced_values | bit) if state else (self._forced_values & ~bit)
 
     def clear_force_state(self, index: int = None):
         """Clears the forced state for a specific port or all if None."""
         if index is None:
-            self._forced_state.clear()
-        elif index in self._forced_state:
-            del self._forced_state[index]
-
-    def update_remote_state(self, state: List[Dict[str, any]]):
-        """Called by the API when Agent sends an update."""
-        # Validate or just replace? Just replace for now.
-        # Ensure format match if needed, but for now trust the agent.
-        self._remote_state = state
-        # log debug?
-        # logger.debug(f"PatchPanel remote state updated: {state}")
+            self._forced_mask = 0
+            self._forced_values = 0
+        elif 0 <= index < PAIR_COUNT:
+            self._forced_mask &= ~(1 << index)
+            self._forced_values &= ~(1 << index)
+
+    def update_remote_state(self, state: Union[int, List[Dict[str, Any]]]):
+        """Called by the API when Agent sends an update (compact mask or legacy list of pairs)."""
+        # Trust the agent, just keep the bits
+        self._remote_mask = (state & FULL_MASK) if isinstance(state, int) else mask_from_dicts(state)
+
+    # --- Edge-triggered mode ---
+
+    def start_edge_detection(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """
+        Switches to interrupt-driven reads. Returns False (polling stays active)
+        when the GPIO backend has no edge detection, e.g. MockGPIO.
+        """
+        if self.edge_mode:
+            return True
+        if not settings.hardware.patch_panel_edge_detection:
+            return False
+        if not gpio_manager.is_rpi_mode() or not gpio_manager.supports_edge_detection():
+            logger.info("PatchPanel: edge detection unavailable, using polling.")
+            return False
+
+        self._loop = loop
+        self._changed = asyncio.Event()
+        self.resync()
+        debounce = settings.hardware.patch_panel_debounce_ms
+        try:
+            for pair in self.pin_mapping:
+                gpio_manager.add_edge_callback(pair["gpio"], self._on_edge, debounce)
+        except Exception as e:
+            logger.error(f"PatchPanel: edge detection setup failed ({e}), using polling.")
+            self.stop_edge_detection()
+            return False
+
+        self.edge_mode = True
+        logger.info(f"PatchPanel: edge detection enabled (debounce {debounce} ms).")
+        return True
+
+    def stop_edge_detection(self):
+        for pair in self.pin_mapping:
+            gpio_manager.remove_edge_callback(pair["gpio"])
+        self.edge_mode = False
+
+    def _read_mask(self) -> int:
+        mask = 0
+        for i, pair in enumerate(self.pin_mapping):
+            # LOW (0) means connected to GND -> True
+            if gpio_manager.read(pair["gpio"]) == GPIO.LOW:
+                mask |= 1 << i
+        return mask
+
+    def resync(self):
+        """Re-reads every pin into the cached mask (covers an edge the driver may have missed)."""
+        mask = self._read_mask()
+        with self._mask_lock:
+            changed = mask != self._mask
+            self._mask = mask
+        if changed:
+            self._signal_change()
+
+    def _on_edge(self, channel: int):
+        # Runs on the GPIO library's thread: re-read the level, the edge direction alone is unreliable after debounce
+        bit = self._pin_bits.get(channel)
+        if bit is None:
+            return
+        connected = gpio_manager.read(channel) == GPIO.LOW
+        with self._mask_lock:
+            old = self._mask
+            self._mask = (old | bit) if connected else (old & ~bit)
+            changed = self._mask != old
+        if changed:
+            self._signal_change()
+
+    def wake(self):
+        """Wakes wait_for_change() from any thread, e.g. for a solenoid change the agent must report."""
+        self._signal_change()
+
+    def _signal_change(self):
+        if self._loop and self._changed:
+            self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Waits until an edge changed the cached state. Returns False on timeout."""
+        if not self._changed:
+            await asyncio.sleep(timeout)
+            return False
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._changed.clear()
+        return True
+
+    def snapshot(self) -> PatchPanelState:
+        """
+        Current state as bitmasks.
+        If on Server (no RPi GPIO), uses the last known remote state.
+        If on Client (RPi), reads local GPIO (or the interrupt-maintained cache).
+        """
+        if not gpio_manager.is_rpi_mode():
+            connected = self._remote_mask
+        else:
+            connected = self._mask if self.edge_mode else self._read_mask()
+        return PatchPanelState(connected, self._forced_mask, self._forced_values)
 
     def get_state(self) -> List[Dict[str, any]]:
         """
@@ -72,37 +232,10 @@ class PatchPanel:
         If on Server (no RPi GPIO), returns last known remote state.
         If on Client (RPi), reads local GPIO.
         """
-        state_list = []
-        if not gpio_manager.is_rpi_mode():
-             # Server Mode (or Dev PC) - Return what the Agent sent us
-             state_list = self._remote_state
-        else:
-            # Client Mode - Read Hardware
-            results = []
-            for pair in self.pin_mapping:
-                state = gpio_manager.read(pair["gpio"])
-                # LOW (0) means connected to GND -> True
-                is_connected = (state == GPIO.LOW)
-                results.append({
-                    "label": pair["label"],
-                    "gpio": pair["gpio"],
-                    "connected": is_connected
-                })
-            state_list = results
-        
-        # Apply Overrides
-        for i, pair in enumerate(state_list):
-            if i in self._forced_state:
-                pair["connected"] = self._forced_state[i]
-                pair["forced"] = True
-            else:
-                pair["forced"] = False
-
-        return state_list
+        return self.snapshot().to_dicts()
 
     def is_solved(self) -> bool:
         """Returns True if ALL pairs are connected."""
-        state = self.get_state()
-        return all(pair["connected"] for pair in state)
+        return self.snapshot().is_solved()
 
 patch_panel = PatchPanel()
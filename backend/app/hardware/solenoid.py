@@ -107,6 +107,7 @@ import asyncio
 import logging
 from app.hardware.gpio_manager import gpio_manager, GPIO
 from app.simple_config import settings
+from app.node_state import agent_commands
 
 logger = logging.getLogger(__name__)
 
@@ -118,25 +119,57 @@ class Solenoid:
         self._is_active = False # Tracks if we're sending current
         self._is_open = False   # Tracks physical box state
         self._command_queue = [] # Queue for commands from Server to Agent
-        
-        # Setup GPIO
-        if gpio_manager.is_rpi_mode():
-            try:
-                gpio_manager.setup_output(self.pin)
-                # ZMIANA: Stan wysoki na start, aby przekaźnik był WYŁĄCZONY
-                gpio_manager.write(self.pin, GPIO.HIGH)
-                
-                # Setup Sensor Pin (Input with Pull-Up. Assuming it pulls to GND when closed)
-                gpio_manager.setup_input(self.sensor_pin, GPIO.PUD_UP)
-            except Exception as e:
-                logger.error(f"Solenoid/Sensor Init Error: {e}") 
+        self._on_change = None  # set by watch_changes()
+        self._sensor_edges = False
         
         # Remote State Storage (for Server Mode)
         self._remote_state = {
             "is_active": False,
             "is_open": False
         }
+
+    def setup_pins(self):
+        """GPIO setup, done by the hardware lifespan step on the client (never at import)."""
+        if not gpio_manager.is_rpi_mode():
+            return
+        try:
+            gpio_manager.setup_output(self.pin)
+            # ZMIANA: Stan wysoki na start, aby przekaźnik był WYŁĄCZONY
+            gpio_manager.write(self.pin, GPIO.HIGH)
+            
+            # Setup Sensor Pin (Input with Pull-Up. Assuming it pulls to GND when closed)
+            gpio_manager.setup_input(self.sensor_pin, GPIO.PUD_UP)
+        except Exception as e:
+            logger.error(f"Solenoid/Sensor Init Error: {e}") 
         
+    def watch_changes(self, on_change) -> bool:
+        """
+        Calls on_change() (from any thread) when the box sensor flips or the coil switches, so
+        the agent loop can report it without polling. Returns False when the sensor pin has no
+        edge detection: the caller keeps polling get_state().
+        """
+        self._on_change = on_change
+        if not gpio_manager.is_rpi_mode() or not gpio_manager.supports_edge_detection():
+            return False
+        try:
+            gpio_manager.add_edge_callback(self.sensor_pin, lambda _pin: on_change(),
+                                           settings.hardware.patch_panel_debounce_ms)
+        except Exception as e:
+            logger.error(f"Solenoid: sensor edge detection setup failed ({e}), polling it.")
+            return False
+        self._sensor_edges = True
+        return True
+
+    def stop_watching(self):
+        if self._sensor_edges:
+            gpio_manager.remove_edge_callback(self.sensor_pin)
+            self._sensor_edges = False
+        self._on_change = None
+
+    def _notify_change(self):
+        if self._on_change:
+            self._on_change()
+
     def update_remote_state(self, is_active: bool, is_open: bool):
         """Called by the API when Agent sends an update."""
         self._remote_state["is_active"] = is_active
@@ -166,6 +199,7 @@ class Solenoid:
     def queue_open(self):
         """Called by Server to request open on Agent."""
         self._command_queue.append("OPEN")
+        agent_commands.notify()
         logger.info("Solenoid OPEN command queued for Agent.")
 
     def pop_pending_command(self) -> str:
@@ -174,6 +208,9 @@ class Solenoid:
             return self._command_queue.pop(0)
         return None 
 
+    def has_pending_command(self) -> bool:
+        return bool(self._command_queue)
+
     async def open_box(self):
         # Check if we are Server or Client
         if not gpio_manager.is_rpi_mode():
@@ -188,6 +225,7 @@ class Solenoid:
 
         logger.info(f"Opening solenoid on PIN {self.pin} for {self.duration}s")
         self._is_active = True
+        self._notify_change()
         try:
             # Ensure pin is set up (Safe to call repeatedly)
             gpio_manager.setup_output(self.pin)
@@ -203,12 +241,14 @@ class Solenoid:
             # ZMIANA: Stan wysoki, aby WYŁĄCZYĆ przekaźnik
             gpio_manager.write(self.pin, GPIO.HIGH)
             self._is_active = False
+            self._notify_change()
 
     def force_close(self):
         """Emergency override"""
         # ZMIANA: Stan wysoki, aby WYŁĄCZYĆ przekaźnik awaryjnie
         gpio_manager.write(self.pin, GPIO.HIGH)
         self._is_active = False
+        self._notify_change()
         logger.info("Solenoid forced closed.")
 
 solenoid = Solenoid()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import base64
+import binascii
+import logging
+import sqlite3
+import time
+from typing import Callable, List, Tuple, Union
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations for the SQLite database.
+#
+# The applied version is kept in SQLite's own header (PRAGMA user_version), so checking
+# whether anything needs to run is a single pragma read at startup. Tables themselves are
+# still created by SQLModel.metadata.create_all(); migrations handle what create_all cannot:
+# columns added to existing tables and indexes on tables that already exist.
+#
+# The version is bumped only after every step of a migration succeeded, and steps are
+# written to be idempotent (IF NOT EXISTS, column checks), so a migration that failed
+# halfway is simply re-run on the next start. Append new migrations at the end; never
+# edit or renumber an applied one.
+
+Step = Union[str, Callable]
+
+def _add_missing_columns(table: str, columns: List[Tuple[str, str]]) -> Callable:
+    def run(conn):
+        existing = {row[1] for row in conn.execute(text(f'PRAGMA table_info("{table}")'))}
+        for name, coltype in columns:
+            if name not in existing:
+                conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {name} {coltype}'))
+    return run
+
+def _move_screenshots_out(conn):
+    """Moves base64 screenshots from the user row into files + the screenshot table."""
+    from app.services.screenshot_service import store_file
+    columns = {row[1] for row in conn.execute(text('PRAGMA table_info("user")'))}
+    if "screenshot_b64" not in columns:
+        return
+    rows = conn.execute(text(
+        'SELECT id, screenshot_b64, screenshot_name, created_at FROM "user" WHERE screenshot_b64 IS NOT NULL'
+    )).all()
+    moved = 0
+    for user_id, b64, name, created_at in rows:
+        try:
+            raw = base64.b64decode(b64, validate=True)
+        except (binascii.Error, ValueError):
+            logger.warning(f"User {user_id}: screenshot is not valid base64, dropping it.")
+            continue
+        stored = store_file(raw)
+        conn.execute(text(
+            "INSERT OR IGNORE INTO screenshot (user_id, sha256, ext, name, content_type, size, width, height, created_at) "
+            "VALUES (:user_id, :sha256, :ext, :name, :content_type, :size, :width, :height, :created_at)"
+        ), {"user_id": user_id, "name": name, "created_at": created_at, **stored._asdict()})
+        moved += 1
+    if moved:
+        logger.info(f"Moved {moved} screenshots out of the user table.")
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.execute(text('ALTER TABLE "user" DROP COLUMN screenshot_b64'))
+        conn.execute(text('ALTER TABLE "user" DROP COLUMN screenshot_name'))
+    else:
+        # No DROP COLUMN on this SQLite: empty the column, the model no longer maps it
+        conn.execute(text('UPDATE "user" SET screenshot_b64 = NULL, screenshot_name = NULL'))
+
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "user columns added after the first release", [
+        # The legacy screenshot_b64/screenshot_name columns are not added: migration 3 would only drop them
+        _add_missing_columns("user", [
+            ("agree_newsletter", "INTEGER DEFAULT 0"),
+        ]),
+    ]),
+    (2, "indexes for leaderboard, admin, game and sync queries", [
+        # Top-N per game: walks the index in score order, user_id makes it covering for the join
+        'CREATE INDEX IF NOT EXISTS ix_gamescore_game_type_score ON "gamescore" (game_type, score DESC, user_id)',
+        # Upload pipeline: count/select unsynced rows ordered by id (rowid is part of every index)
+        'CREATE INDEX IF NOT EXISTS ix_gamescore_synced ON "gamescore" (synced)',
+        'CREATE INDEX IF NOT EXISTS ix_gamelog_synced ON "gamelog" (synced)',
+        # Admin log view (newest first) and retention pruning
+        'CREATE INDEX IF NOT EXISTS ix_gamelog_timestamp ON "gamelog" (timestamp)',
+        # Registration duplicate check
+        'CREATE INDEX IF NOT EXISTS ix_user_email ON "user" (email)',
+        # SystemConfig.key, User.nick, EmailTemplate.slug and the (user_id, game_type) unique
+        # constraints of GameScore/GameSession already have their own indexes.
+        "ANALYZE",
+    ]),
+    (3, "registration screenshots moved from user.screenshot_b64 to files", [
+        _move_screenshots_out,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+def run_migrations(conn) -> int:
+    """
+    Applies pending migrations on a sync connection (use via `await conn.run_sync(run_migrations)`).
+    Returns the number of migrations applied.
+    """
+    current = get_schema_version(conn)
+    if current >= LATEST_VERSION:
+        return 0
+
+    applied = 0
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        started = time.perf_counter()
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Schema migration {version} ({description}) failed, database stays at version {current}.")
+            raise
+        current = version
+        applied += 1
+        logger.info(f"Applied schema migration {version}: {description} ({(time.perf_counter() - started) * 1000:.1f} ms)")
+    return applied
@@ -9,8 +9,19 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     is_blocked: bool = Field(default=False)
     agree_newsletter: bool = Field(default=False)
-    screenshot_b64: Optional[str] = Field(default=None)
-    screenshot_name: Optional[str] = Field(default=None)
+
+class Screenshot(SQLModel, table=True):
+    """Registration screenshot metadata. The bytes live in db/screenshots/ (see screenshot_service)."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", unique=True, index=True)
+    sha256: str = Field(index=True)
+    ext: str
+    name: Optional[str] = Field(default=None)
+    content_type: str
+    size: int
+    width: Optional[int] = Field(default=None)
+    height: Optional[int] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class GameScore(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -27,8 +38,8 @@ class GameLog(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     event_type: str
     details: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-    synced: bool = Field(default=False)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
+    synced: bool = Field(default=False, index=True)
 
 class SystemConfig(SQLModel, table=True):
     key: str = Field(primary_key=True)
@@ -48,3 +59,23 @@ class EmailTemplate(SQLModel, table=True):
     slug: str = Field(unique=True, index=True) # e.g. "winner_grandmaster"
     subject: str
     body_template: str # Jinja2 format or simple f-string placeholders
+
+class EmailJob(SQLModel, table=True):
+    """One bulk send from the admin panel. Per-recipient state is in EmailDelivery."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    status: str = Field(default="queued", index=True)  # queued, running, completed, failed
+    total: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = Field(default=None)
+    error: Optional[str] = Field(default=None)
+
+class EmailDelivery(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_id: int = Field(foreign_key="emailjob.id", index=True)
+    recipient: str
+    subject: str
+    body: str
+    status: str = Field(default="pending")  # pending, sent, failed
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None)
+    sent_at: Optional[datetime] = Field(default=None)
@@ -1,6 +1,66 @@
+import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 # Global in-memory state for connected nodes
 # Format: { "node_id": { "ip": str, "last_seen": datetime, "is_rpi": bool, "role": str } }
 connected_nodes: Dict[str, Any] = {}
+_heartbeats = 0  # Bumped by touch_node(), part of nodes_version()
+
+def touch_node(node_id: str, is_rpi: bool, ip: str = "remote"):
+    """Heartbeat: records that an agent node is alive."""
+    global _heartbeats
+    node = connected_nodes.setdefault(node_id, {"role": "client"})  # If calling this, it's a client
+    node["last_seen"] = datetime.utcnow()
+    node["is_rpi"] = is_rpi
+    node["ip"] = ip
+    _heartbeats += 1
+    from app.services.push_service import push_service
+    push_service.notify("nodes")
+
+class AgentCommandSignal:
+    """
+    Wakes agents long-polling /agent/commands the moment a command is queued.
+    Each notify() releases every current waiter and arms a fresh event for the next ones.
+    """
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+agent_commands = AgentCommandSignal()
+
+def nodes_version(timeout_seconds: int = 15) -> Tuple[int, int]:
+    """
+    Cheap change marker for the push channel: heartbeats, plus how many nodes have timed
+    out since (a node going offline changes its status without any heartbeat).
+    """
+    now = datetime.utcnow()
+    offline = sum(1 for data in connected_nodes.values()
+                  if (now - data["last_seen"]).total_seconds() >= timeout_seconds)
+    return _heartbeats, offline
+
+def get_nodes_status(timeout_seconds: int = 15) -> Dict[str, Dict[str, Any]]:
+    """JSON-ready view of connected_nodes with an online/offline flag from the last heartbeat."""
+    now = datetime.utcnow()
+    nodes = {}
+    for node_id, data in connected_nodes.items():
+        last_seen = data.get("last_seen")
+        is_online = bool(last_seen and (now - last_seen).total_seconds() < timeout_seconds)
+        nodes[node_id] = {
+            "ip": data.get("ip"),
+            "role": data.get("role"),
+            "is_rpi": data.get("is_rpi"),
+            "last_seen": last_seen.isoformat() if last_seen else None,
+            "status": "online" if is_online else "offline"
+        }
+    return nodes
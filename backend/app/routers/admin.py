@@ -6,11 +6,24 @@ from app.simple_config import settings
 from app.database import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.security import get_current_admin
-from app.models import SystemConfig, EmailTemplate, User, GameScore
+from app.models import EmailTemplate, User, GameScore
 from app.services.email_service import email_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.sync_service import sync_service
+from app.services.log_service import log_service
+from app.services.config_store import config_store
+from app.services.content_service import content_service
+from app.services.question_cache import question_cache
+from app.services.content_bundle import content_bundles
+from app.services.screenshot_service import screenshot_service
+from app.services.identity_cache import identity_cache
+from app.services.auth_service import auth_service
 from app.security import get_current_admin
 from app.hardware.gpio_manager import IS_RPI
-from app.node_state import connected_nodes
+from app.hardware.lifecycle import hardware
+from app.startup_profiler import startup_profiler
+from app.node_state import connected_nodes, get_nodes_status
+import dataclasses
 import logging
 from datetime import datetime
 
@@ -41,27 +54,20 @@ async def get_system_status():
             # Let's verify what the frontend expects.
             pass
 
-    # Actually, simpler: Just calculate "is_online" here
-    nodes_response = {}
-    for node_id, data in connected_nodes.items():
-        last_seen = data.get("last_seen")
-        is_online = False
-        if last_seen and (now - last_seen).total_seconds() < 15: # 15s timeout (since sync is 5s)
-            is_online = True
-        
-        nodes_response[node_id] = {
-            "ip": data.get("ip"),
-            "role": data.get("role"),
-            "is_rpi": data.get("is_rpi"),
-            "last_seen": last_seen.isoformat() if last_seen else None,
-            "status": "online" if is_online else "offline"
-        }
+    # Actually, simpler: Just calculate "is_online" here (15s timeout, shared with the push channel)
+    nodes_response = get_nodes_status()
 
     return {
         "status": "online",
         "system_mode": settings.system.platform_role,
         "database": "connected", # TODO: Check real DB status
         "connected_nodes": nodes_response,
+        "sync_http": sync_service.get_stats(),
+        "sync_uploads": sync_service.get_upload_stats(),
+        "game_log": log_service.get_stats(),
+        "identity_cache": identity_cache.get_stats(),
+        "profanity_list": auth_service.profanity_status,
+        "startup": startup_profiler.get_stats(),
         "config": {
              "node_id": settings.node_id
         }
@@ -104,14 +110,11 @@ async def get_hardware_status():
             
     # Get current hardware states
     solenoid_state = solenoid.get_state()
-    pp_state = patch_panel.get_state()
+    pp_state = patch_panel.snapshot()
     
     # Override with disconnected if offline (unless we are the RPi itself testing locally)
     if not is_rpi_online and not IS_RPI:
-        pp_state = [
-            {"label": p["label"], "gpio": p["gpio"], "connected": p["connected"] if p.get("forced") else False, "forced": p.get("forced", False)}
-            for p in pp_state
-        ]
+        pp_state = dataclasses.replace(pp_state, connected=0)
         
     import app.routers.agent as agent_router
     return {
@@ -121,12 +124,13 @@ async def get_hardware_status():
             "pin": settings.hardware.solenoid_pin
         },
         "patch_panel": {
-            "solved": patch_panel.is_solved() if is_rpi_online or IS_RPI else False,
-            "pairs": pp_state
+            "solved": pp_state.is_solved() if is_rpi_online or IS_RPI else False,
+            "pairs": pp_state.to_dicts()
         },
         "led": {
             "current_effect": agent_router.current_led_effect
-        }
+        },
+        "local": hardware.get_status()
     }
 
 class LEDCommand(BaseModel):
@@ -135,19 +139,28 @@ class LEDCommand(BaseModel):
 @router.post("/hardware/led")
 @limiter.limit("30/minute")
 async def control_led(request: Request, cmd: LEDCommand):
-    import app.routers.agent as agent_router
-    from app.routers.agent import pending_led_commands
-    agent_router.current_led_effect = cmd.effect
-    pending_led_commands.append(cmd.effect)
+    from app.routers.agent import queue_led_command
+    queue_led_command(cmd.effect)
     return {"message": f"LED effect {cmd.effect} queued"}
 
 @router.get("/users")
 async def get_users(session: AsyncSession = Depends(get_session)):
-    from app.models import User
+    from app.models import User, Screenshot
     from sqlmodel import select
-    # Fetch DB status again
-    result = await session.execute(select(User))
-    return result.scalars().all()
+    # Screenshot metadata only; the image itself is fetched from /users/{id}/screenshot
+    stmt = select(User, Screenshot).outerjoin(Screenshot, Screenshot.user_id == User.id)
+    users = []
+    for user, shot in (await session.execute(stmt)).all():
+        users.append({**user.model_dump(), "screenshot": shot.model_dump(
+            include={"name", "content_type", "size", "width", "height"}) if shot else None})
+    return users
+
+@router.get("/users/{user_id}/screenshot")
+async def get_user_screenshot(user_id: int, thumbnail: bool = False, session: AsyncSession = Depends(get_session)):
+    shot = await screenshot_service.get(session, user_id)
+    if not shot:
+        raise HTTPException(status_code=404, detail="No screenshot")
+    return screenshot_service.file_response(shot, thumbnail=thumbnail)
 
 @router.delete("/users/{user_id}")
 async def delete_user(user_id: int, session: AsyncSession = Depends(get_session)):
@@ -164,10 +177,25 @@ async def delete_user(user_id: int, session: AsyncSession = Depends(get_session)
     # Actually, let's just delete the user, assuming CASCADE is set up or ID won't be reused immediately.
     # To be safe in simple app:
     await session.execute(delete(GameScore).where(GameScore.user_id == user_id))
+    orphans = await screenshot_service.delete(session, [user_id])
     await session.execute(delete(User).where(User.id == user_id))
     await session.commit()
+    await screenshot_service.remove_files(orphans)
+    identity_cache.invalidate(user_id)
+    leaderboard_service.remove_user(user_id)
     return {"status": "deleted", "user_id": user_id}
 
+@router.put("/users/{user_id}/blocked")
+async def set_user_blocked(user_id: int, blocked: bool = True, session: AsyncSession = Depends(get_session)):
+    """Blocked users get 403 USER_BLOCKED on every kiosk endpoint (takes effect immediately)."""
+    user = await session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.is_blocked = blocked
+    await session.commit()
+    identity_cache.invalidate(user_id)
+    return {"status": "ok", "user_id": user_id, "is_blocked": blocked}
+
 @router.get("/users/{user_id}/scores")
 async def get_user_scores(user_id: int, session: AsyncSession = Depends(get_session)):
     from app.models import GameScore
@@ -181,6 +209,7 @@ async def delete_user_game_score(user_id: int, game_type: str, session: AsyncSes
     from sqlmodel import delete
     await session.execute(delete(GameScore).where(GameScore.user_id == user_id, GameScore.game_type == game_type))
     await session.commit()
+    leaderboard_service.remove_score(user_id, game_type)
     return {"status": "deleted", "user_id": user_id, "game_type": game_type}
 
 @router.get("/scores")
@@ -194,10 +223,32 @@ async def get_scores(session: AsyncSession = Depends(get_session)):
     # Return as list of dicts to make it JSON serializable easily
     return [{"score": s, "nick": n} for s, n in result.all()]
 
+@router.get("/leaderboard/stats")
+async def get_leaderboard_stats():
+    """Build/update timings of the in-memory materialized leaderboard."""
+    return leaderboard_service.get_stats()
+
+@router.post("/leaderboard/rebuild")
+async def rebuild_leaderboard(session: AsyncSession = Depends(get_session)):
+    await leaderboard_service.rebuild(session)
+    return leaderboard_service.get_stats()
+
+@router.get("/content/status")
+async def get_content_status():
+    """Row counts, parse time and validation errors of the last content load."""
+    return {**content_service.last_reload, "question_cache": question_cache.get_stats(),
+            "bundles": content_bundles.get_stats()}
+
+@router.post("/content/reload")
+async def reload_content():
+    """Re-reads content/*/questions.csv now (also happens automatically when files change)."""
+    return await content_service.reload(force=True)
+
 @router.get("/logs")
 async def get_logs(limit: int = 50, session: AsyncSession = Depends(get_session)):
     from app.models import GameLog
     from sqlmodel import select, desc
+    await log_service.flush()  # include events still waiting in the write buffer
     stmt = select(GameLog).order_by(desc(GameLog.timestamp)).limit(limit)
     result = await session.execute(stmt)
     return result.scalars().all()
@@ -206,6 +257,7 @@ async def get_logs(limit: int = 50, session: AsyncSession = Depends(get_session)
 async def clear_logs(session: AsyncSession = Depends(get_session)):
     from app.models import GameLog
     from sqlmodel import delete
+    log_service.discard_pending()
     await session.execute(delete(GameLog))
     await session.commit()
     return {"status": "cleared"}
@@ -219,7 +271,9 @@ async def reset_database(session: AsyncSession = Depends(get_session)):
     
     # Delete all data
     await session.execute(delete(GameScore))
+    log_service.discard_pending()
     await session.execute(delete(GameLog))
+    orphans = await screenshot_service.delete(session)
     await session.execute(delete(User))
     # Optionally keep config/templates? User said "WIPE ALL". 
     # Usually we want to keep admin/system config, but "Reset Database" implies fresh start.
@@ -227,28 +281,19 @@ async def reset_database(session: AsyncSession = Depends(get_session)):
     # but wipe user data.
     
     await session.commit()
+    await screenshot_service.remove_files(orphans)
+    identity_cache.clear()
+    leaderboard_service.clear()
     return {"status": "reset_complete"}
 
 @router.get("/config")
-async def get_system_config(session: AsyncSession = Depends(get_session)):
-    from sqlmodel import select
-    result = await session.execute(select(SystemConfig))
-    return {c.key: c.value for c in result.scalars().all()}
+async def get_system_config():
+    return dict(config_store.snapshot.values)
 
 @router.post("/config/{key}")
 async def set_system_config(key: str, value: str, session: AsyncSession = Depends(get_session)):
-    from sqlmodel import select
-    # Check if exists
-    result = await session.execute(select(SystemConfig).where(SystemConfig.key == key))
-    config = result.scalar_one_or_none()
-    
-    if config:
-        config.value = value
-    else:
-        config = SystemConfig(key=key, value=value)
-        session.add(config)
-        
-    await session.commit()
+    # Writes the row and swaps the cached snapshot; subscribers (push channel) are notified
+    await config_store.set(key, value, session)
     return {"status": "updated", "key": key, "value": value}
 
 # --- Email Templates ---
@@ -300,18 +345,8 @@ async def send_all_emails(session: AsyncSession = Depends(get_session)):
     scores = (await session.execute(select(GameScore))).scalars().all()
     templates = (await session.execute(select(EmailTemplate))).scalars().all()
     
-    # Get Sender Config
-    conf_keys = ["email_sender", "smtp_host", "smtp_port", "smtp_user", "smtp_password"]
-    config_rows = (await session.execute(select(SystemConfig).where(SystemConfig.key.in_(conf_keys)))).scalars().all()
-    config_map = {c.key: c.value for c in config_rows}
-    
-    smtp_config = {
-        "sender": config_map.get("email_sender", "noreply@checkit.com"),
-        "host": config_map.get("smtp_host", ""),
-        "port": int(config_map.get("smtp_port", "587")),
-        "user": config_map.get("smtp_user", ""),
-        "password": config_map.get("smtp_password", ""),
-    }
+    # Sender shown to the admin; the job itself reads the SMTP config when it runs
+    sender = config_store.snapshot.get("email_sender", "noreply@checkit.com")
     
     tpl_map = {t.slug: t for t in templates}
     user_map = {u.id: u for u in users}
@@ -385,7 +420,26 @@ async def send_all_emails(session: AsyncSession = Depends(get_session)):
             "body": body
         })
 
-    # Send
-    await email_service.send_bulk(email_queue, smtp_config=smtp_config)
+    # Send in the background; progress via /email/jobs/{job_id}
+    job_id = await email_service.start_job(email_queue)
     
-    return {"status": "sent", "count": len(email_queue), "winner_count": len(winner_ids), "from": smtp_config["sender"]}
+    return {"status": "queued", "job_id": job_id, "count": len(email_queue), "winner_count": len(winner_ids), "from": sender}
+
+@router.get("/email/jobs")
+async def list_email_jobs(limit: int = 20):
+    return await email_service.list_jobs(limit)
+
+@router.get("/email/jobs/{job_id}")
+async def get_email_job(job_id: int):
+    """Progress of a bulk send: sent / failed / pending counts."""
+    job = await email_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/email/jobs/{job_id}/resume")
+async def resume_email_job(job_id: int):
+    """Sends the still pending deliveries of a job (e.g. after fixing the SMTP settings)."""
+    if not await email_service.resume(job_id):
+        raise HTTPException(status_code=409, detail="Job not found or already running")
+    return await email_service.get_job(job_id)
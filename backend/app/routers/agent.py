@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from app.hardware.patch_panel import patch_panel
 from app.hardware.solenoid import solenoid
-from app.node_state import connected_nodes
+from app.node_state import connected_nodes, touch_node, agent_commands
+from app.services.push_service import push_service
+from app.simple_config import settings
 from datetime import datetime
 import logging
 
@@ -15,7 +17,9 @@ class HardwareState(BaseModel):
     node_id: str
     is_rpi: bool
     timestamp: float
-    patch_panel: List[Dict[str, Any]]
+    # Legacy verbose list of pairs, or the compact bitmask (bit i = PIN_MAP[i] connected)
+    patch_panel: Optional[List[Dict[str, Any]]] = None
+    patch_panel_mask: Optional[int] = None
     solenoid_state: Dict[str, Any]
     # Add other hardware states here if needed
 
@@ -26,20 +30,17 @@ async def sync_agent_hardware(state: HardwareState):
     Returns pending commands for Agent.
     """
     # 1. Update Node Status (Heartbeat)
-    # Log every heartbeat for debugging
-    logger.info(f"Checking in Agent: {state.node_id} (RPi: {state.is_rpi})")
-    
-    connected_nodes[state.node_id] = {
-        "last_seen": datetime.utcnow(),
-        "is_rpi": state.is_rpi,
-        "role": "client", # If calling this, it's a client
-        "ip": "remote" # We don't have request object readily available unless we add it to signature, but 'remote' is fine
-    }
+    # Agents only upload on change + a slow keepalive now, debug level is enough
+    logger.debug(f"Checking in Agent: {state.node_id} (RPi: {state.is_rpi})")
+    touch_node(state.node_id, state.is_rpi)
 
     # 2. Update Hardware States
     # Only if this node is the "active" hardware node? 
     # For now, we assume ONE hardware node or last-write-wins.
-    patch_panel.update_remote_state(state.patch_panel)
+    if state.patch_panel_mask is not None:
+        patch_panel.update_remote_state(state.patch_panel_mask)
+    elif state.patch_panel is not None:
+        patch_panel.update_remote_state(state.patch_panel)
     
     if hasattr(solenoid, 'update_remote_state'):
         solenoid.update_remote_state(
@@ -47,20 +48,56 @@ async def sync_agent_hardware(state: HardwareState):
             is_open=state.solenoid_state.get("is_open", False)
         )
 
+    # Push patch panel / node changes to subscribed screens right away
+    push_service.notify("patch_panel")
+
     # 3. Check for Pending Commands
+    return _collect_commands(state.node_id)
+
+@router.get("/commands")
+async def poll_agent_commands(request: Request, node_id: str, is_rpi: bool = True, timeout: float = None):
+    """
+    Long-poll command channel for the Agent.
+    Held open until a solenoid/LED command is queued or the timeout expires, so commands
+    reach the RPi immediately instead of on its next sync. Each poll doubles as a heartbeat.
+    """
+    max_wait = settings.api.agent_poll_timeout_seconds
+    wait = max_wait if timeout is None else max(0.0, min(timeout, max_wait))
+    touch_node(node_id, is_rpi)
+
+    if not _has_pending_commands():
+        await agent_commands.wait(wait)
+
+    # Leave the commands queued for the next poll if the agent went away meanwhile
+    if await request.is_disconnected():
+        return {}
+
+    touch_node(node_id, is_rpi)
+    return _collect_commands(node_id)
+
+def _has_pending_commands() -> bool:
+    return solenoid.has_pending_command() or bool(pending_led_commands)
+
+def _collect_commands(node_id: str) -> Dict[str, Any]:
     response = {}
     
     cmd = solenoid.pop_pending_command()
     if cmd == "OPEN":
         response["trigger_solenoid"] = True
-        logger.info(f"Sent OPEN command to Agent {state.node_id}")
+        logger.info(f"Sent OPEN command to Agent {node_id}")
         
-    global pending_led_commands
     if pending_led_commands:
         response["led_command"] = pending_led_commands.pop(0)
 
     return response
 
+def queue_led_command(effect: str):
+    """Queues an LED effect for the Agent and wakes any long-polling agent."""
+    global current_led_effect
+    current_led_effect = effect
+    pending_led_commands.append(effect)
+    agent_commands.notify()
+
 # Global queue for LED commands from Admin
 pending_led_commands = []
 current_led_effect = "red"
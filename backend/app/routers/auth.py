@@ -7,7 +7,7 @@ from app.services.auth_service import auth_service
 from fastapi.security import OAuth2PasswordRequestForm
 from app.security import create_access_token, verify_password
 from app.simple_config import settings
-import base64
+from app.services.screenshot_service import screenshot_service
 
 router = APIRouter(tags=["Auth"])
 
@@ -28,15 +28,13 @@ async def register(
     """
     try:
         user = UserCreate(nick=nick[:15], email=email, agree_newsletter=agree_newsletter)
+        # Size check first: a rejected upload must not leave a registered account behind
+        raw = await screenshot_service.read_upload(screenshot) if screenshot and screenshot.filename else None
         new_user = await auth_service.register_user(user, session)
 
-        if screenshot and screenshot.filename:
-            raw = await screenshot.read(1024 * 1024 * 2)  # max 2MB
-            new_user.screenshot_b64 = base64.b64encode(raw).decode()
-            new_user.screenshot_name = screenshot.filename
-            session.add(new_user)
-            await session.commit()
-            await session.refresh(new_user)
+        if raw is not None:
+            # Stored as a file off the event loop, only metadata goes into the DB
+            await screenshot_service.save(session, new_user.id, raw, screenshot.filename)
 
         return new_user
     except HTTPException as e:
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.security import decode_admin_token
+from app.services.push_service import push_service, ADMIN_TOPICS
+from app.simple_config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Events"])
+
+# Push channel replacing the kiosk polling loops. Polling endpoints stay for compatibility.
+#
+# Topics: "queue", "patch_panel", "leaderboard", "nodes" (admin token required).
+# "queue" also carries global_status / pm_total_time and "leaderboard" the leaderboard_message
+# from SystemConfig, so kiosks see admin config changes without polling.
+# Every message is JSON:
+#   {"type": "snapshot", "topic": ..., "version": n, "data": {...}}            (on subscribe / after coalescing)
+#   {"type": "diff", "topic": ..., "version": n, "changed": {...}, "removed": [...]}
+# WebSocket clients may send {"subscribe": [...]} / {"unsubscribe": [...]} at any time.
+
+def _parse_topics(raw: Optional[str], is_admin: bool) -> List[str]:
+    if not raw:
+        return []
+    topics = [t.strip() for t in raw.split(",") if t.strip()]
+    return [t for t in topics if is_admin or t not in ADMIN_TOPICS]
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, topics: Optional[str] = None, token: Optional[str] = None):
+    await websocket.accept()
+    is_admin = decode_admin_token(token) is not None
+    sub = push_service.subscribe(_parse_topics(topics, is_admin))
+
+    async def read_commands():
+        try:
+            while True:
+                msg = await websocket.receive_json()
+                if not isinstance(msg, dict):
+                    continue
+                add = [t for t in msg.get("subscribe", []) if is_admin or t not in ADMIN_TOPICS]
+                push_service.update_subscription(sub, add=add, remove=msg.get("unsubscribe", []))
+        except (WebSocketDisconnect, RuntimeError, ValueError):
+            pass
+        finally:
+            sub.close()
+
+    reader = asyncio.create_task(read_commands())
+    send_timeout = settings.api.push_send_timeout_seconds
+    try:
+        while True:
+            batch = await sub.next_batch()
+            if batch is None:
+                break
+            for msg in batch:
+                # A client that cannot take a message within the timeout is dropped
+                await asyncio.wait_for(websocket.send_text(msg), timeout=send_timeout)
+    except asyncio.TimeoutError:
+        push_service.record_slow_disconnect()
+        logger.warning("Push client too slow, disconnecting.")
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
+        push_service.unsubscribe(sub)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
+@router.get("/stream")
+async def events_stream(topics: Optional[str] = None, token: Optional[str] = None):
+    """Server-Sent Events variant for clients that only need to listen."""
+    is_admin = decode_admin_token(token) is not None
+    topic_names = _parse_topics(topics, is_admin)
+    keepalive = settings.api.push_keepalive_seconds
+
+    async def event_source():
+        # Subscribed only once the body streams: a client gone before that leaves nothing behind
+        sub = push_service.subscribe(topic_names)
+        try:
+            while True:
+                try:
+                    batch = await asyncio.wait_for(sub.next_batch(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if batch is None:
+                    break
+                for msg in batch:
+                    yield f"data: {msg}\n\n"
+        finally:
+            push_service.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from app.security import get_current_user
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_session
-from app.services.content_service import content_service
+from app.services.content_service import content_service, sanitize_questions
+from app.services.content_bundle import content_bundles
 from app.services.game_service import game_service
+from app.services.game_session_service import game_session_service
+from app.services.config_store import RuntimeConfig, get_runtime_config, require_competition_open
 from app.schemas import GameResult
 from app.models import GameScore as GameScoreModel
 from pydantic import BaseModel
@@ -20,14 +23,10 @@ class GameSubmit(BaseModel):
     score: int | None = None # Optional client-side calculated score
 
 @router.get("/status")
-async def get_user_game_status(user=Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    from app.models import SystemConfig
-    from sqlmodel import select
-    
+async def get_user_game_status(user=Depends(get_current_user), session: AsyncSession = Depends(get_session),
+                                config: RuntimeConfig = Depends(get_runtime_config)):
     # Check competition state
-    conf_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "competition_active"))
-    conf = conf_res.scalar_one_or_none()
-    competition_active = conf.value == "true" if conf else True # Default true if not set
+    competition_active = config.competition_active
     
     """
     Returns the user's best score for each game type and system status.
@@ -61,32 +60,10 @@ async def get_user_game_status(user=Depends(get_current_user), session: AsyncSes
     return status
 
 @router.get("/content/{game_type}")
-async def get_content(game_type: str, user=Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    from app.models import SystemConfig
-    from sqlmodel import select
-    # Check competition state
-    conf_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "competition_active"))
-    conf = conf_res.scalar_one_or_none()
-    if conf:
-        if conf.value == "false":
-            raise HTTPException(status_code=403, detail="ZAWODY_ZAKONCZONE")
-        elif conf.value == "technical_break":
-            raise HTTPException(status_code=403, detail="PRZERWA_TECHNICZNA")
-        
-    # Check if user already played
-    from app.models import GameScore, GameSession
-    existing_stmt = select(GameScore).where(GameScore.user_id == user.id, GameScore.game_type == game_type)
-    existing = (await session.execute(existing_stmt)).scalar_one_or_none()
-    if existing:
-        raise HTTPException(status_code=403, detail="ALREADY_PLAYED")
-
-    # Register game start (once — subsequent calls are no-ops)
-    existing_session = (await session.execute(
-        select(GameSession).where(GameSession.user_id == user.id, GameSession.game_type == game_type)
-    )).scalar_one_or_none()
-    if not existing_session:
-        session.add(GameSession(user_id=user.id, game_type=game_type))
-        await session.commit()
+async def get_content(game_type: str, user=Depends(get_current_user), session: AsyncSession = Depends(get_session),
+                      config: RuntimeConfig = Depends(require_competition_open)):
+    # 403 ALREADY_PLAYED when scored; registers the start once (later calls are no-ops)
+    await game_session_service.register_start(session, user.id, game_type)
 
     limit = 10 # Default max set to 10 as per requirement
     if game_type == "binary_brain":
@@ -95,46 +72,30 @@ async def get_content(game_type: str, user=Depends(get_current_user), session: A
         limit = 10
         
     questions = content_service.get_questions(game_type, limit=limit)
-    # Sanitize: remove correct answer if we want strict security, 
-    # but for this kiosk app, simple is fine. 
-    # Actually, CSVs have columns like "ODPOWIEDZ_TAK_NIE" or "POPRAWNA". 
-    # We should probably strip them for the client.
-    sanitized = []
-    for q in questions:
-        q_copy = q.copy()
-        if game_type == "binary_brain":
-            # q_copy.pop("answer_correct", None) # Frontend needs this to render options!
-            pass
-            # Shuffle answers? No, frontend handles shuffling of options. 
-            # We send all: answer_correct, answer_wrong1... 
-            # WAIT. If we send "answer_correct", frontend can see it in network tab.
-            # But we need it for frontend validation? 
-            # Strategy: Send { "options": ["A", "B", "C", "D"], "id": "1", "image": "..." } 
-            # And validate on backend? 
-            # User wants "kiosk" style. Frontend validation is faster/easier for UI feedback.
-            # Let's send "answer_correct" encrypted? Or just send it. It's a game for fun.
-            # actually better: Send a list of answers ["Wrong1", "Correct", "Wrong2", "Wrong3"] shuffled
-            # But then how do we know which is correct? Frontend needs a hash?
-            # Or just send "correct_index"?
-            pass 
-        elif game_type == "it_match":
-            q_copy.pop("is_correct", None) # Logic handled in specific router usually, but if called here...
-        sanitized.append(q_copy)
-    return sanitized
+    # Binary Brain keeps answer_correct (the kiosk renders the options from it),
+    # IT Match drops is_correct: answers are checked by its own router
+    return sanitize_questions(game_type, questions, for_play=True)
 
-@router.post("/submit", response_model=GameResult)
-async def submit_game(submission: GameSubmit, user=Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    from app.models import SystemConfig
-    from sqlmodel import select
-    # Check competition state
-    conf_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "competition_active"))
-    conf = conf_res.scalar_one_or_none()
-    if conf:
-        if conf.value == "false":
-            raise HTTPException(status_code=403, detail="ZAWODY_ZAKONCZONE")
-        elif conf.value == "technical_break":
-            raise HTTPException(status_code=403, detail="PRZERWA_TECHNICZNA")
+@router.get("/bundles")
+async def get_bundle_index(user=Depends(get_current_user), config: RuntimeConfig = Depends(require_competition_open)):
+    """
+    Current bundle version per game. Kiosks poll this and refetch a bundle only when its
+    version changed (questions and images are otherwise served from their offline cache).
+    """
+    return await content_bundles.get_index()
+
+@router.get("/bundle/{game_type}")
+async def get_bundle(game_type: str, request: Request, user=Depends(get_current_user),
+                     config: RuntimeConfig = Depends(require_competition_open)):
+    """Offline content bundle: all questions of a game plus the image URLs with hashes and sizes."""
+    bundle = await content_bundles.get(game_type)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Unknown game type")
+    return content_bundles.respond(request, bundle)
 
+@router.post("/submit", response_model=GameResult)
+async def submit_game(submission: GameSubmit, user=Depends(get_current_user), session: AsyncSession = Depends(get_session),
+                      config: RuntimeConfig = Depends(require_competition_open)):
     result = await game_service.finish_game(
         game_type=submission.game_type,
         user_id=submission.user_id,
@@ -160,7 +121,8 @@ async def submit_game(submission: GameSubmit, user=Depends(get_current_user), se
 
 @router.get("/patch_panel/state")
 async def get_patch_panel_state():
+    state = patch_panel.snapshot()
     return {
-        "pairs": patch_panel.get_state(),
-        "solved": patch_panel.is_solved()
+        "pairs": state.to_dicts(),
+        "solved": state.is_solved()
     }
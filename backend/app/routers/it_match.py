@@ -1,78 +1,27 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import random
+from fastapi import APIRouter, HTTPException, Request
+from app.schemas import ITMatchQuestion
 from typing import List
 
 router = APIRouter()
 
-# Schema for sending questions to frontend
-class ITMatchQuestion(BaseModel):
-    id: int
-    question: str
-    image: str
-    # We generally don't send 'is_correct' to frontend to prevent easy cheating, 
-    # but for this simple kiosk game it might be easier to validate on frontend 
-    # OR we validate on backend. 
-    # Let's validate on backend for "security" practice, or send it if we want instant feedback without lag.
-    # Given it's a "Tinder" swipe, instant feedback is key. Let's send it but maybe obfuscated?
-    # For simplicity in this kiosk app, we will send it.
-    is_correct: bool 
-
-from app.services.content_service import content_service
+from app.services.question_cache import question_cache
+from app.services.game_session_service import game_session_service
 
 from app.security import get_current_user
 from app.database import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
+from app.services.config_store import require_competition_open
 
 @router.get("/questions", response_model=List[ITMatchQuestion])
-async def get_questions(count: int = 10, user=Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+async def get_questions(request: Request, count: int = 10, user=Depends(get_current_user), session: AsyncSession = Depends(get_session),
+                        _open=Depends(require_competition_open)):
     """
     Returns a deterministic set of questions for this user. Records game start on first call.
     """
-    from app.models import SystemConfig, GameScore, GameSession
-    from sqlmodel import select
-    conf_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "competition_active"))
-    conf = conf_res.scalar_one_or_none()
-    if conf:
-        if conf.value == "false":
-            raise HTTPException(status_code=403, detail="ZAWODY_ZAKONCZONE")
-        elif conf.value == "technical_break":
-            raise HTTPException(status_code=403, detail="PRZERWA_TECHNICZNA")
-
-    # Block if already scored
-    existing_score = (await session.execute(
-        select(GameScore).where(GameScore.user_id == user.id, GameScore.game_type == "it_match")
-    )).scalar_one_or_none()
-    if existing_score:
-        raise HTTPException(status_code=403, detail="ALREADY_PLAYED")
-
-    # Register game start (once — subsequent calls are no-ops)
-    existing_session = (await session.execute(
-        select(GameSession).where(GameSession.user_id == user.id, GameSession.game_type == "it_match")
-    )).scalar_one_or_none()
-    if not existing_session:
-        session.add(GameSession(user_id=user.id, game_type="it_match"))
-        await session.commit()
+    # 403 ALREADY_PLAYED when scored; registers the start once (later calls are no-ops)
+    await game_session_service.register_start(session, user.id, "it_match")
 
-    questions_data = content_service.get_questions("it_match", limit=50) # Get all avaliable
-    
-    # Map to schema
-    mapped = []
-    for q in questions_data:
-        try:
-            mapped.append(ITMatchQuestion(
-                id=int(q.get('id', 0)),
-                question=q.get('question', ''),
-                image=q.get('image', ''),
-                is_correct=bool(int(q.get('is_correct', 0)))
-            ))
-        except ValueError:
-            continue
-            
-    if not mapped:
-        return []
-        
-    sample_size = min(count, len(mapped))
-    rng = random.Random(user.id)
-    return rng.sample(mapped, sample_size)
+    # Deterministic per user: served pre-serialized from the LRU, 304 when the kiosk already has it
+    entry = question_cache.get("it_match", user.id, count, limit=50)
+    return question_cache.respond(request, entry)
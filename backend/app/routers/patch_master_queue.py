@@ -3,6 +3,8 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from app.security import get_current_user, get_current_admin
 from app.models import User
+from app.services.identity_cache import CurrentUser
+from app.services.push_service import push_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +19,13 @@ queue_state = {
     "queue": [], # List of Dicts: [{"id": 2, "nick": "Player2"}, ...]
     "start_time": None # Float timestamp
 }
+queue_version = 0  # Bumped by queue_changed(), lets the push channel skip unchanged ticks
+
+def queue_changed():
+    """Call after every queue_state mutation: bumps the version and pushes the new state right away."""
+    global queue_version
+    queue_version += 1
+    push_service.notify("queue")
 
 class QueueStateResponse(BaseModel):
     status: str
@@ -33,23 +42,16 @@ class QueueStateResponse(BaseModel):
 from fastapi import Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_session
-from sqlmodel import select
-from app.models import SystemConfig
+from app.services.config_store import RuntimeConfig, get_runtime_config, require_competition_open
 
 @router.get("", response_model=QueueStateResponse)
 async def get_queue_state(
     x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
-    session: AsyncSession = Depends(get_session)
+    config: RuntimeConfig = Depends(get_runtime_config)
 ):
-    # Fetch global competition status
-    conf_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "competition_active"))
-    conf = conf_res.scalar_one_or_none()
-    global_status = conf.value if conf else "true"
-
-    # Fetch pm_total_time
-    pm_time_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "pm_total_time"))
-    pm_time_conf = pm_time_res.scalar_one_or_none()
-    pm_total_time = int(pm_time_conf.value) if pm_time_conf and pm_time_conf.value.isdigit() else 200
+    # Polled every 1.5s by every kiosk: config comes from the in-process cache, no DB access
+    global_status = config.competition_status
+    pm_total_time = config.pm_total_time
 
     position = None
     if x_user_id:
@@ -77,16 +79,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_session
 
 @router.post("/join")
-async def join_queue(user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    from app.models import SystemConfig
-    from sqlmodel import select
-    conf_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "competition_active"))
-    conf = conf_res.scalar_one_or_none()
-    if conf:
-        if conf.value == "false":
-            raise HTTPException(status_code=403, detail="ZAWODY_ZAKONCZONE")
-        elif conf.value == "technical_break":
-            raise HTTPException(status_code=403, detail="PRZERWA_TECHNICZNA")
+async def join_queue(user: CurrentUser = Depends(get_current_user), _open=Depends(require_competition_open)):
 
     # Check if already playing
     if queue_state["current_player"] and queue_state["current_player"]["id"] == user.id:
@@ -97,17 +90,19 @@ async def join_queue(user: User = Depends(get_current_user), session: AsyncSessi
         return {"message": "Already in queue"}
         
     queue_state["queue"].append({"id": user.id, "nick": user.nick})
+    queue_changed()
     return {"message": "Joined queue"}
 
 @router.post("/leave")
-async def leave_queue(user: User = Depends(get_current_user)):
+async def leave_queue(user: CurrentUser = Depends(get_current_user)):
     queue_state["queue"] = [u for u in queue_state["queue"] if u["id"] != user.id]
+    queue_changed()
     return {"message": "Left queue"}
 
 import time
 
 @router.post("/start")
-async def start_game(user: User = Depends(get_current_user)):
+async def start_game(user: CurrentUser = Depends(get_current_user)):
     if queue_state["status"] != "waiting_for_player":
         raise HTTPException(status_code=400, detail="Not waiting for a player.")
         
@@ -116,6 +111,7 @@ async def start_game(user: User = Depends(get_current_user)):
         
     queue_state["status"] = "playing"
     queue_state["start_time"] = time.time()
+    queue_changed()
     return {"message": "Game started"}
 
 import asyncio
@@ -128,24 +124,22 @@ async def revert_led_after_finish_task():
         queue_state["current_player"] = None
         queue_state["start_time"] = None
         queue_state["force_solved"] = False
-        import app.routers.agent as agent_router
-        from app.routers.agent import pending_led_commands
-        agent_router.current_led_effect = "rainbow"
-        pending_led_commands.append("rainbow")
+        queue_changed()
+        from app.routers.agent import queue_led_command
+        queue_led_command("rainbow")
         logger.info("Auto-reverted: finished → available, LED → rainbow")
 
 @router.post("/finish")
-async def finish_player_game(background_tasks: BackgroundTasks, user: User = Depends(get_current_user)):
+async def finish_player_game(background_tasks: BackgroundTasks, user: CurrentUser = Depends(get_current_user)):
     # Called by frontend right after successful game score submission
     if queue_state["current_player"] and queue_state["current_player"]["id"] == user.id:
         # Do not clear current_player immediately – keep for 5s to show win/loss screen
         queue_state["status"] = "finished"
         queue_state["force_solved"] = False
+        queue_changed()
 
-        import app.routers.agent as agent_router
-        from app.routers.agent import pending_led_commands
-        agent_router.current_led_effect = "green"
-        pending_led_commands.append("green")
+        from app.routers.agent import queue_led_command
+        queue_led_command("green")
 
         # After 5 s: revert LED to rainbow and free the queue slot
         background_tasks.add_task(revert_led_after_finish_task)
@@ -154,19 +148,18 @@ async def finish_player_game(background_tasks: BackgroundTasks, user: User = Dep
     return {"message": "No active game to finish"}
 
 @router.post("/timeout-flash")
-async def trigger_timeout_flash(user: User = Depends(get_current_user)):
+async def trigger_timeout_flash(user: CurrentUser = Depends(get_current_user)):
     # Flashes the physical LED red for 5 seconds when a user runs out of time.
     # Uses the agent queue (same path as green/rainbow) so the RPi agent picks it up.
-    import app.routers.agent as agent_router
-    from app.routers.agent import pending_led_commands
-    agent_router.current_led_effect = "timeout_red"
-    pending_led_commands.append("timeout_red")
+    from app.routers.agent import queue_led_command
+    queue_led_command("timeout_red")
 
     # Kick the user and free the game slot
     if queue_state["current_player"] and queue_state["current_player"]["id"] == user.id:
         queue_state["current_player"] = None
         queue_state["status"] = "available"
         queue_state["start_time"] = None
+        queue_changed()
 
     return {"message": "LED timeout flash triggered and game reset"}
 
@@ -174,13 +167,11 @@ class LEDCommand(BaseModel):
     effect: str
 
 @router.post("/led")
-async def control_led_user(cmd: LEDCommand, user: User = Depends(get_current_user)):
+async def control_led_user(cmd: LEDCommand, user: CurrentUser = Depends(get_current_user)):
     # Allow current player to trigger effects safely
     if queue_state["current_player"] and queue_state["current_player"]["id"] == user.id:
-        import app.routers.agent as agent_router
-        from app.routers.agent import pending_led_commands
-        agent_router.current_led_effect = cmd.effect
-        pending_led_commands.append(cmd.effect)
+        from app.routers.agent import queue_led_command
+        queue_led_command(cmd.effect)
         return {"message": f"LED effect {cmd.effect} queued"}
     return {"message": "Not authorized to change LED state."}
 
@@ -195,12 +186,14 @@ async def call_next_player(admin: User = Depends(get_current_admin)):
         queue_state["current_player"] = None
         queue_state["status"] = "available"
         queue_state["start_time"] = None
+        queue_changed()
         return {"message": "Queue is empty."}
         
     next_player = queue_state["queue"].pop(0)
     queue_state["current_player"] = next_player
     queue_state["status"] = "waiting_for_player"
     queue_state["force_solved"] = False
+    queue_changed()
     return {"message": f"Called {next_player['nick']}"}
 
 @router.post("/admin/set_status")
@@ -214,15 +207,13 @@ async def set_queue_status(update: AdminStatusUpdate, admin: User = Depends(get_
         queue_state["current_player"] = None
         queue_state["force_solved"] = False
         queue_state["start_time"] = None
+    queue_changed()
         
-    import app.routers.agent as agent_router
-    from app.routers.agent import pending_led_commands
+    from app.routers.agent import queue_led_command
     if update.status == "available":
-        agent_router.current_led_effect = "rainbow"
-        pending_led_commands.append("rainbow")
+        queue_led_command("rainbow")
     elif update.status == "resetting":
-        agent_router.current_led_effect = "red"
-        pending_led_commands.append("red")
+        queue_led_command("red")
         
     return {"message": f"Status set to {update.status}"}
 
@@ -253,6 +244,7 @@ async def force_solve(admin: User = Depends(get_current_admin), session: AsyncSe
 
     # A cleaner way: set a flag in queue_state that the current game was forced solved.
     queue_state["force_solved"] = True
+    queue_changed()
 
     return {"message": "Forced solve trigger initiated."}
 
@@ -263,4 +255,5 @@ async def kick_user(user_id: int, admin: User = Depends(get_current_admin)):
         queue_state["current_player"] = None
         queue_state["status"] = "available"
         queue_state["start_time"] = None
+    queue_changed()
     return {"message": "User kicked"}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class UserCreate(BaseModel):
     nick: str
@@ -12,8 +12,6 @@ class UserRead(BaseModel):
     email: str
     is_blocked: bool
     agree_newsletter: bool
-    screenshot_b64: Optional[str] = None
-    screenshot_name: Optional[str] = None
 
 class LeaderboardEntry(BaseModel):
     nick: str
@@ -25,3 +23,23 @@ class GameResult(BaseModel):
     game_type: str
     score: int
     duration_ms: int
+
+# Question payloads (prebuilt once per content load by ContentService)
+class ITMatchQuestion(BaseModel):
+    id: int
+    question: str
+    image: str
+    # We generally don't send 'is_correct' to frontend to prevent easy cheating, 
+    # but for this simple kiosk game it might be easier to validate on frontend 
+    # OR we validate on backend. 
+    # Let's validate on backend for "security" practice, or send it if we want instant feedback without lag.
+    # Given it's a "Tinder" swipe, instant feedback is key. Let's send it but maybe obfuscated?
+    # For simplicity in this kiosk app, we will send it.
+    is_correct: bool
+    # Hashed WebP/AVIF renditions from the image manifest (relative to /api/content/), if built
+    image_variants: Optional[List[Dict[str, Any]]] = None
+
+class TextMatchPair(BaseModel):
+    id: int
+    term: str
+    definition: str
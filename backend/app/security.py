@@ -36,38 +36,47 @@ async def get_current_admin(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    username = decode_admin_token(token)
+    if username is None:
+        raise credentials_exception
+    return username
+
+def decode_admin_token(token: Optional[str]) -> Optional[str]:
+    """Returns the admin username for a valid admin JWT, None otherwise (for non-HTTP callers like WebSockets)."""
+    if not token:
+        return None
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        role: str = payload.get("role")
-        if username is None or role != "admin":
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        return None
+    username: str = payload.get("sub")
+    role: str = payload.get("role")
+    if username is None or role != "admin":
+        return None
     return username
 
-from app.database import get_session
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import User
+from app.services.identity_cache import CurrentUser, identity_cache
 from fastapi import Header
 
 async def get_current_user(
     x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
-    session: AsyncSession = Depends(get_session)
-) -> User:
+) -> CurrentUser:
     """
     Simple Kiosk Authentication.
     Trusts the X-User-ID header sent by the frontend (which stores the registered user ID).
     In a real internet-facing app, this is insecure. For a local kiosk, it's fine.
+    Resolved through the identity cache: no DB session on a hit.
     """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required (X-User-ID missing)")
     
     try:
         uid = int(x_user_id)
-        user = await session.get(User, uid)
-        if not user:
-             raise HTTPException(status_code=401, detail="User not found")
-        return user
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid User ID format")
+    user = await identity_cache.get(uid)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    if user.is_blocked:
+        raise HTTPException(status_code=403, detail="USER_BLOCKED")
+    return user
@@ -1,51 +1,136 @@
-import requests
+import asyncio
+import json
+import os
+import time
+import aiohttp
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException, status
+from app.database import DB_DIR
 from app.models import User
 from app.schemas import UserCreate
 from app.simple_config import settings
+from app.services.profanity import ProfanityMatcher
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Custom Polish Profanity List (always included, also the list used when offline)
+FALLBACK_WORDS = frozenset({
+    "chuj", "kurwa", "jebac", "pierdolic", "cipa", "kutas", "fiut",
+    "szmata", "dziwka", "pedal", "zjeb", "debil", "idiota", "frajer", "szwinia", "ruchanie",
+    "jeb", "jebany", "jebana", "jebane", "kurwe", "kurwo", "kurwy", "chuju", "chuja", "chuje",
+    "cipy", "cipie", "pizdy", "pizdzie", "pizde", "kutasie", "fiucie", "dziwki", "dziwko", "dziwke",
+    "kurew", "skurwysyn", "skurwiel", "jebniety", "jebnieta", "zapierdalac", "wypierdalac", "odpierdalac",
+    "spierdalac", "opierdalac", "zajebac", "wyjebac", "odjebac", "zjebac", "ojebac", "dojebac", "podjebac",
+    "przypierdalac", "przypierdolic", "rozpierdalac", "rozpierdolic", "sukinsyn", "suka", "suki"
+})
+
+# Last downloaded remote list + its validators (ETag / Last-Modified) for conditional refreshes
+PROFANITY_CACHE = DB_DIR / "cache" / "profanity_words.txt"
+PROFANITY_CACHE_META = DB_DIR / "cache" / "profanity_words.json"
+
 class AuthService:
+    """
+    The profanity list is built from the fallback words plus the on-disk copy of the remote
+    list, so constructing the service never touches the network. start() refreshes the
+    remote list in the background with a conditional GET; a changed list is compiled off
+    the event loop and swapped in with a single assignment.
+    """
     def __init__(self):
         self.profanity_list = self._load_profanity_list()
+        # Compiled once per list; is_profane is then one pass over the normalized nick
+        self.profanity = ProfanityMatcher(self.profanity_list)
         self.blocked_domains = set(settings.security.domain_blocklist)
+        self.task = None
+        self.profanity_status = {"source": "cache" if PROFANITY_CACHE.exists() else "fallback",
+                                 "words": len(self.profanity_list), "last_check": None, "last_error": None}
 
     def _load_profanity_list(self) -> set:
+        bad_words = set(FALLBACK_WORDS)
         try:
-            # Fallback/Default small list if download fails or for offline start
-            # Custom Polish Profanity List
-            bad_words = {
-                "chuj", "kurwa", "jebac", "pierdolic", "cipa", "kutas", "fiut",
-                "szmata", "dziwka", "pedal", "zjeb", "debil", "idiota", "frajer", "szwinia", "ruchanie",
-                "jeb", "jebany", "jebana", "jebane", "kurwe", "kurwo", "kurwy", "chuju", "chuja", "chuje",
-                "cipy", "cipie", "pizdy", "pizdzie", "pizde", "kutasie", "fiucie", "dziwki", "dziwko", "dziwke",
-                "kurew", "skurwysyn", "skurwiel", "jebniety", "jebnieta", "zapierdalac", "wypierdalac", "odpierdalac",
-                "spierdalac", "opierdalac", "zajebac", "wyjebac", "odjebac", "zjebac", "ojebac", "dojebac", "podjebac",
-                "przypierdalac", "przypierdolic", "rozpierdalac", "rozpierdolic", "sukinsyn", "suka", "suki"
-            } 
-            if settings.security.profanity_list_url:
-                try:
-                    response = requests.get(settings.security.profanity_list_url, timeout=5)
-                    if response.status_code == 200:
-                        online_list = set(word.strip().lower() for word in response.text.splitlines() if word.strip())
-                        bad_words.update(online_list)
-                except Exception as e:
-                    logger.warning(f"Failed to download profanity list: {e}. Using fallback.")
-            return bad_words
-        except Exception:
-            return set()
+            if PROFANITY_CACHE.exists():
+                bad_words.update(self._parse_words(PROFANITY_CACHE.read_text(encoding="utf-8")))
+        except Exception as e:
+            logger.warning(f"Failed to read cached profanity list: {e}. Using fallback.")
+        return bad_words
+
+    @staticmethod
+    def _parse_words(text: str) -> set:
+        return set(word.strip().lower() for word in text.splitlines() if word.strip())
+
+    async def start(self):
+        if settings.security.profanity_list_url:
+            self.task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh_profanity_list()
+            except Exception as e:
+                logger.error(f"Profanity list refresh failed: {e}")
+            await asyncio.sleep(settings.security.profanity_refresh_hours * 3600)
+
+    async def refresh_profanity_list(self) -> bool:
+        """Conditional GET of the remote list. Returns True when a new list was swapped in."""
+        url = settings.security.profanity_list_url
+        meta = {}
+        if PROFANITY_CACHE.exists() and PROFANITY_CACHE_META.exists():
+            try:
+                meta = json.loads(PROFANITY_CACHE_META.read_text(encoding="utf-8"))
+            except Exception:
+                meta = {}
+        headers = {}
+        if meta.get("url") == url:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        self.profanity_status["last_check"] = time.time()
+        try:
+            timeout = aiohttp.ClientTimeout(total=settings.security.profanity_fetch_timeout_seconds)
+            async with aiohttp.ClientSession(timeout=timeout) as client:
+                async with client.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        self.profanity_status["last_error"] = None
+                        return False
+                    response.raise_for_status()
+                    text = await response.text()
+                    meta = {"url": url, "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified")}
+        except Exception as e:
+            self.profanity_status["last_error"] = str(e) or type(e).__name__
+            logger.warning(f"Failed to download profanity list: {e!r}. Keeping the current list.")
+            return False
+
+        words = self._parse_words(text) | FALLBACK_WORDS
+        matcher = await asyncio.to_thread(ProfanityMatcher, words)
+        await asyncio.to_thread(self._write_cache, text, meta)
+        self.profanity, self.profanity_list = matcher, words
+        self.profanity_status.update(source="remote", words=len(words), last_error=None)
+        logger.info(f"Profanity list updated ({len(words)} words).")
+        return True
+
+    @staticmethod
+    def _write_cache(text: str, meta: dict):
+        PROFANITY_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        for path, content in ((PROFANITY_CACHE, text), (PROFANITY_CACHE_META, json.dumps(meta))):
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(content, encoding="utf-8")
+            os.replace(tmp, path)
 
     def is_profane(self, text: str) -> bool:
-        text_lower = text.lower()
-        for word in self.profanity_list:
-            # Simple containment check, can be improved with regex
-            if word in text_lower:
-                return True
-        return False
+        # Case, diacritics, leetspeak, separators and repeated letters are normalized away
+        return self.profanity.find(text) is not None
 
     def is_domain_blocked(self, email: str) -> bool:
         domain = email.split('@')[-1].lower()
@@ -0,0 +1,108 @@
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.database import async_session_factory
+from app.models import SystemConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PM_TOTAL_TIME = 200  # seconds
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """
+    Immutable snapshot of the SystemConfig table with typed accessors for the hot keys.
+    A new snapshot replaces the old one on every change, so readers never see a half update.
+    """
+    values: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    version: int = 0
+
+    def get(self, key: str, default: str = None) -> Optional[str]:
+        return self.values.get(key, default)
+
+    @property
+    def competition_status(self) -> str:
+        """"true", "false" or "technical_break" (open when unset)."""
+        return self.values.get("competition_active", "true")
+
+    @property
+    def competition_active(self) -> bool:
+        return self.competition_status == "true"
+
+    @property
+    def pm_total_time(self) -> int:
+        value = self.values.get("pm_total_time", "")
+        return int(value) if value.isdigit() else DEFAULT_PM_TOTAL_TIME
+
+    @property
+    def leaderboard_message(self) -> str:
+        return self.values.get("leaderboard_message", "")
+
+class ConfigStore:
+    """
+    In-process cache of SystemConfig. Loaded once in the app lifespan; admin writes go
+    through set(), which commits to the DB and then swaps in a new snapshot. Hot endpoints
+    read the snapshot (or use the FastAPI dependencies below) and issue no config queries.
+    """
+    def __init__(self):
+        self.snapshot = RuntimeConfig()
+        self._subscribers: List[Callable[[RuntimeConfig, RuntimeConfig], None]] = []
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    async def load(self, session: AsyncSession = None):
+        if session is None:
+            async with async_session_factory() as session:
+                return await self.load(session)
+        rows = (await session.execute(select(SystemConfig))).scalars().all()
+        self._swap({row.key: row.value for row in rows})
+        logger.info(f"System config loaded ({len(rows)} keys).")
+
+    async def set(self, key: str, value: str, session: AsyncSession):
+        config = (await session.execute(select(SystemConfig).where(SystemConfig.key == key))).scalar_one_or_none()
+        if config:
+            config.value = value
+        else:
+            session.add(SystemConfig(key=key, value=value))
+        await session.commit()
+        # Only after the commit succeeded
+        self._swap({**self.snapshot.values, key: value})
+
+    def subscribe(self, callback: Callable[[RuntimeConfig, RuntimeConfig], None]):
+        """callback(old, new) runs after every change."""
+        self._subscribers.append(callback)
+
+    def _swap(self, values: dict):
+        old = self.snapshot
+        self.snapshot = RuntimeConfig(values=MappingProxyType(values), version=old.version + 1)
+        for callback in self._subscribers:
+            try:
+                callback(old, self.snapshot)
+            except Exception as e:
+                logger.error(f"Config change subscriber failed: {e}")
+
+config_store = ConfigStore()
+
+# --- FastAPI dependencies ---
+
+def get_runtime_config() -> RuntimeConfig:
+    return config_store.snapshot
+
+def ensure_competition_open(config: RuntimeConfig = None):
+    status = (config or config_store.snapshot).competition_status
+    if status == "false":
+        raise HTTPException(status_code=403, detail="ZAWODY_ZAKONCZONE")
+    elif status == "technical_break":
+        raise HTTPException(status_code=403, detail="PRZERWA_TECHNICZNA")
+
+def require_competition_open() -> RuntimeConfig:
+    """Dependency for game endpoints: 403 when the competition is closed or on a break."""
+    config = config_store.snapshot
+    ensure_competition_open(config)
+    return config
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+from fastapi import Request, Response
+from app.services import content_service as content_module
+from app.services.content_service import content_service, sanitize_questions
+from app.services.http_cache import etag_response
+
+logger = logging.getLogger(__name__)
+
+# Public URL prefix of the /api/content mount (main.py)
+CONTENT_URL_PREFIX = "/api/content"
+BUNDLE_GAMES = ("binary_brain", "it_match", "text_match")
+
+class Bundle(NamedTuple):
+    body: bytes
+    etag: str
+    version: str
+    assets: int
+    bytes_total: int
+
+class ContentBundleService:
+    """
+    Versioned offline bundle per game for kiosk prefetching: every question plus every image
+    URL it needs, with hashes and sizes. The bundle version is a hash of that content, so it
+    only changes when the questions or images actually change (not on every reload), and
+    a kiosk can cache the whole bundle until the version it sees in /bundles differs.
+
+    Bundles are built lazily off the event loop and cached per ContentService.version.
+    """
+    def __init__(self):
+        self._bundles: Dict[str, Bundle] = {}
+        self._content_version = None
+        self._lock = asyncio.Lock()
+        # (path, mtime_ns, size) -> sha256, so unchanged originals are not re-hashed on reload
+        self._file_hashes: Dict[tuple, str] = {}
+
+    async def get(self, game_type: str) -> Optional[Bundle]:
+        if game_type not in BUNDLE_GAMES:
+            return None
+        async with self._lock:
+            if self._content_version != content_service.version:
+                self._bundles.clear()
+                self._content_version = content_service.version
+            bundle = self._bundles.get(game_type)
+            if bundle is None:
+                bundle = await asyncio.to_thread(self._build, game_type)
+                self._bundles[game_type] = bundle
+            return bundle
+
+    async def get_index(self) -> Dict[str, Any]:
+        """Small document kiosks poll to find out whether any bundle changed."""
+        bundles = {}
+        for game_type in BUNDLE_GAMES:
+            bundle = await self.get(game_type)
+            bundles[game_type] = {
+                "version": bundle.version,
+                "url": f"/api/v1/games/bundle/{game_type}",
+                "assets": bundle.assets,
+                "bytes": bundle.bytes_total,
+            }
+        return {"bundles": bundles}
+
+    def respond(self, request: Request, bundle: Bundle) -> Response:
+        """200 with the bundle, or 304 when the kiosk already holds this version."""
+        return etag_response(request, bundle.body, bundle.etag, "private, no-cache")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "content_version": self._content_version,
+            "bundles": {g: {"version": b.version, "assets": b.assets, "bytes": b.bytes_total, "size": len(b.body)}
+                        for g, b in self._bundles.items()},
+        }
+
+    def _build(self, game_type: str) -> Bundle:
+        bank = content_service.get_bank(game_type)
+        if bank.payloads:
+            questions = [p.model_dump() for p in bank.payloads]
+        else:
+            questions = [dict(row) for row in bank.rows]
+        # Same fields /content/{game_type} sends to the kiosk, so bundled questions can be played
+        # offline (Binary Brain renders its options from answer_correct, see sanitize_questions)
+        questions = sanitize_questions(game_type, questions, for_play=True)
+
+        assets: List[Dict[str, Any]] = []
+        seen = set()
+        for q in questions:
+            image = q.get("image")
+            if not image or image == "none" or image in seen:
+                continue
+            seen.add(image)
+            original = self._original_asset(game_type, image)
+            if original:
+                assets.append(original)
+            for v in q.get("image_variants") or []:
+                # Hashed variants: the hash and size come from the image manifest
+                assets.append({
+                    "url": f"{CONTENT_URL_PREFIX}/{v['url']}",
+                    "image": image,
+                    "type": v["type"],
+                    "width": v["width"],
+                    "hash": v["url"].rsplit(".", 2)[-2],
+                    "bytes": v.get("bytes"),
+                })
+
+        content = {"game_type": game_type, "questions": questions, "assets": assets}
+        version = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        body = json.dumps({**content, "version": version}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        bytes_total = sum(a.get("bytes") or 0 for a in assets)
+        logger.info(f"Content bundle {game_type} v{version}: {len(questions)} questions, {len(assets)} assets.")
+        return Bundle(body, f'"{version}"', version, len(assets), bytes_total)
+
+    def _original_asset(self, game_type: str, image: str) -> Optional[Dict[str, Any]]:
+        path = content_module.CONTENT_DIR / game_type / "images" / image
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        digest = self._file_hashes.get(key)
+        if digest is None:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+            self._file_hashes[key] = digest
+        return {
+            "url": f"{CONTENT_URL_PREFIX}/{game_type}/images/{image}",
+            "image": image,
+            "type": "original",
+            "hash": digest,
+            "bytes": st.st_size,
+        }
+
+content_bundles = ContentBundleService()
@@ -1,111 +1,325 @@
+import asyncio
 import csv
+import io
 import logging
+import time
 from pathlib import Path
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, List, Dict, Mapping, Optional, Tuple
 import random
 
+from app.simple_config import settings
+from app.services.image_pipeline import OPTIMIZED_DIR_NAME, MANIFEST_NAME, load_manifest
+
 logger = logging.getLogger(__name__)
 
 CONTENT_DIR = Path(__file__).parent.parent.parent.parent / "content"
 
+def normalize_id(question_id) -> str:
+    return str(question_id).strip().lower()
+
+def normalize_it_match_answer(answer) -> str:
+    """IT Match answers arrive as 1/0, true/false or booleans; compare them as '1'/'0'."""
+    value = str(answer).strip().lower()
+    return {"true": "1", "false": "0"}.get(value, value)
+
+def _it_match_payload(row: Dict):
+    from app.schemas import ITMatchQuestion
+    return ITMatchQuestion(
+        id=int(row.get("id", 0)),
+        question=row.get("question", ""),
+        image=row.get("image", ""),
+        is_correct=bool(int(row.get("is_correct", 0))),
+        image_variants=row.get("image_variants"),
+    )
+
+def _text_match_payload(row: Dict):
+    from app.schemas import TextMatchPair
+    return TextMatchPair(
+        id=int(row.get("id", 0)),
+        term=row.get("term", ""),
+        definition=row.get("definition", ""),
+    )
+
+# Columns a CSV must have for a reload to be accepted
+REQUIRED_COLUMNS = {
+    "binary_brain": {"id", "question", "answer_correct"},
+    "it_match": {"id", "question", "is_correct"},
+    "text_match": {"id", "term", "definition"},
+}
+
+CSV_ENCODINGS = ['utf-8', 'utf-8-sig', 'windows-1250', 'cp1252', 'latin-1']
+
+# game_type -> (CSV column holding the correct answer, answer normalizer, payload builder)
+GAME_SPECS = {
+    "binary_brain": ("answer_correct", lambda a: a, None),
+    "it_match": ("is_correct", normalize_it_match_answer, _it_match_payload),
+    "text_match": (None, None, _text_match_payload),
+}
+
+def sanitize_questions(game_type: str, questions: List[Dict], for_play: bool = False) -> List[Dict]:
+    """
+    Copies of the questions without answer fields, for anything sent to a kiosk.
+    for_play keeps Binary Brain's answer_correct: the kiosk needs it to render the options
+    (/content/{game_type} and the offline bundle). is_correct is never sent.
+    """
+    answer_fields = {"is_correct"}
+    if not (for_play and game_type == "binary_brain"):
+        answer_fields.add("answer_correct")
+    return [{k: v for k, v in q.items() if k not in answer_fields} for q in questions]
+
+def _with_image_variants(game_type: str, row: Dict, images: Mapping[str, Dict]) -> Dict:
+    """Adds the optimized variants from the image manifest (build_images.py) to a question row."""
+    entry = images.get(f"{game_type}/{row.get('image', '')}")
+    if not entry:
+        return row
+    variants = [{k: v[k] for k in ("url", "width", "format", "type")} for v in entry["variants"]]
+    return {**row, "image_variants": variants}
+
+@dataclass(frozen=True)
+class QuestionBank:
+    """
+    Immutable, precompiled view of one game's CSV, built once per load:
+    rows in CSV order, rows by normalized id, normalized correct answers by id,
+    and the validated response models the question endpoints serve.
+    """
+    rows: Tuple[Dict, ...] = ()
+    by_id: Mapping[str, Dict] = field(default_factory=lambda: MappingProxyType({}))
+    answers: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    payloads: Tuple[Any, ...] = ()
+
+    @classmethod
+    def build(cls, game_type: str, rows: List[Dict], images: Mapping[str, Dict] = None) -> "QuestionBank":
+        answer_column, normalize, build_payload = GAME_SPECS.get(game_type, (None, None, None))
+        by_id, answers, payloads = {}, {}, []
+        rows = [_with_image_variants(game_type, row, images or {}) for row in rows]
+        for row in rows:
+            key = normalize_id(row.get("id", ""))
+            # First row wins on duplicate ids, like the old linear scan
+            by_id.setdefault(key, row)
+            if answer_column and row.get(answer_column) is not None:
+                answers.setdefault(key, normalize(row[answer_column]))
+            if build_payload:
+                try:
+                    payloads.append(build_payload(row))
+                except (ValueError, TypeError):
+                    logger.warning(f"Skipping invalid {game_type} row: {row}")
+        return cls(
+            rows=tuple(rows),
+            by_id=MappingProxyType(by_id),
+            answers=MappingProxyType(answers),
+            payloads=tuple(payloads),
+        )
+
 class ContentService:
+    """
+    Question banks for all games. Loaded at import, then kept fresh by a watcher task
+    (started in the app lifespan) that polls the mtime/size of content/*/questions.csv and
+    the image directories. Changed files are parsed in a worker thread, validated, and the
+    new banks are swapped in with a single assignment, so requests never block or see a
+    partially loaded set. A game whose new CSV fails validation keeps its previous bank.
+    """
     def __init__(self):
-        self.binary_brain_questions = []
-        self.it_match_questions = []
-        self.text_match_questions = []
+        self.banks: Dict[str, QuestionBank] = {game_type: QuestionBank() for game_type in GAME_SPECS}
+        self.version = 0  # Bumped on every swap, lets caches keyed on content invalidate
+        self._encodings: Dict[Path, str] = {}  # encoding that worked last time, tried first
+        self._fingerprint: Dict[str, Tuple[int, int]] = {}
+        self._reload_lock = None
+        self._watch_task = None
+        self.last_reload: Dict[str, Any] = {}
         self._load_content()
 
-    def _load_content(self):
-        self.binary_brain_questions = self._load_csv(
-            CONTENT_DIR / "binary_brain" / "questions.csv"
-        )
-        self.it_match_questions = self._load_csv(
-            CONTENT_DIR / "it_match" / "questions.csv"
-        )
-        self.text_match_questions = self._load_csv(
-            CONTENT_DIR / "text_match" / "questions.csv"
-        )
+    @property
+    def binary_brain_questions(self) -> Tuple[Dict, ...]:
+        return self.banks["binary_brain"].rows
+
+    @property
+    def it_match_questions(self) -> Tuple[Dict, ...]:
+        return self.banks["it_match"].rows
+
+    @property
+    def text_match_questions(self) -> Tuple[Dict, ...]:
+        return self.banks["text_match"].rows
+
+    # --- Loading ---
+
+    def _load_content(self) -> Dict[str, Any]:
+        fingerprint = self._take_fingerprint()
+        started = time.perf_counter()
+        banks, errors = self._build_banks()
+        report = self._swap(banks, errors, fingerprint, (time.perf_counter() - started) * 1000)
         logger.info(f"Loaded {len(self.binary_brain_questions)} Binary Brain questions.")
         logger.info(f"Loaded {len(self.it_match_questions)} IT Match questions.")
         logger.info(f"Loaded {len(self.text_match_questions)} Text Match questions.")
+        return report
+
+    async def reload(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Re-parses the content off the event loop and swaps it in.
+        Without `force` nothing happens when no watched file changed since the last load.
+        """
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            fingerprint = await asyncio.to_thread(self._take_fingerprint)
+            if not force and fingerprint == self._fingerprint:
+                return {**self.last_reload, "changed": False}
+            started = time.perf_counter()
+            banks, errors = await asyncio.to_thread(self._build_banks)
+            report = self._swap(banks, errors, fingerprint, (time.perf_counter() - started) * 1000)
+            logger.info(f"Content reloaded in {report['parse_ms']} ms: {report['rows']}")
+            for game_type, error in errors.items():
+                logger.error(f"Content for {game_type} rejected, keeping previous version: {error}")
+            return {**report, "changed": True}
+
+    def _build_banks(self) -> Tuple[Dict[str, QuestionBank], Dict[str, str]]:
+        """Parses and validates every game. Runs in a worker thread on reload."""
+        banks, errors = {}, {}
+        images = load_manifest(CONTENT_DIR)
+        for game_type in GAME_SPECS:
+            rows = self._load_csv(CONTENT_DIR / game_type / "questions.csv")
+            error = self._validate(game_type, rows)
+            if error:
+                errors[game_type] = error
+                continue
+            banks[game_type] = QuestionBank.build(game_type, rows, images)
+        return banks, errors
+
+    def _validate(self, game_type: str, rows: List[Dict]) -> Optional[str]:
+        if not rows:
+            return "no rows"
+        missing = REQUIRED_COLUMNS.get(game_type, set()) - set(rows[0].keys())
+        if missing:
+            return f"missing columns: {', '.join(sorted(missing))}"
+        return None
+
+    def _swap(self, banks: Dict[str, QuestionBank], errors: Dict[str, str],
+              fingerprint: Dict[str, Tuple[int, int]], parse_ms: float) -> Dict[str, Any]:
+        # Games that failed validation keep their current bank (empty on first load)
+        self.banks = {**self.banks, **banks}
+        self.version += 1
+        self._fingerprint = fingerprint
+        self.last_reload = {
+            "version": self.version,
+            "loaded_at": time.time(),
+            "parse_ms": round(parse_ms, 2),
+            "rows": {game_type: len(bank.rows) for game_type, bank in self.banks.items()},
+            "errors": errors,
+        }
+        return self.last_reload
+
+    def _take_fingerprint(self) -> Dict[str, Tuple[int, int]]:
+        """
+        (mtime_ns, size) of every watched path: questions.csv, the manifest and each image file,
+        so an image overwritten in place is caught too (that leaves the directory mtime alone).
+        """
+        fingerprint = {}
+        if not CONTENT_DIR.exists():
+            return fingerprint
+        paths = [CONTENT_DIR / OPTIMIZED_DIR_NAME / MANIFEST_NAME]
+        for game_dir in CONTENT_DIR.iterdir():
+            if game_dir.is_dir() and game_dir.name != OPTIMIZED_DIR_NAME:
+                images_dir = game_dir / "images"
+                paths += [game_dir, game_dir / "questions.csv", images_dir]
+                if images_dir.is_dir():
+                    paths += [p for p in images_dir.rglob("*") if p.is_file()]
+        for path in paths:
+            try:
+                st = path.stat()
+                fingerprint[str(path)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        return fingerprint
+
+    # --- Watching ---
+
+    def start_watching(self):
+        if self._watch_task is None and settings.game.content_watch:
+            self._watch_task = asyncio.create_task(self._watch_loop())
+            logger.info("Content watcher started.")
+
+    async def stop_watching(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch_loop(self):
+        while True:
+            await asyncio.sleep(settings.game.content_watch_interval_seconds)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Error in Content watcher: {e}")
 
     def _load_csv(self, path: Path) -> List[Dict]:
         if not path.exists():
             logger.warning(f"Content file not found: {path}")
             return []
-        
-        encodings = ['utf-8', 'utf-8-sig', 'windows-1250', 'cp1252', 'latin-1']
-        items = []
-        
+
+        try:
+            raw = path.read_bytes()
+        except OSError as e:
+            logger.error(f"Error reading CSV {path}: {e}")
+            return []
+
+        # Read once, then try the decodings in memory (last successful encoding first)
+        last = self._encodings.get(path)
+        encodings = ([last] if last else []) + [e for e in CSV_ENCODINGS if e != last]
         for encoding in encodings:
             try:
-                with open(path, mode='r', encoding=encoding) as f:
-                    reader = csv.DictReader(f)
-                    items = [] # Reset on new attempt
-                    for row in reader:
-                        # Clean up keys (strip BOM, external whitespace)
-                        clean_row = {k.strip(): v.strip() for k, v in row.items() if k}
-                        items.append(clean_row)
-                
-                # If we got here, success
-                logger.info(f"Successfully loaded {path} using {encoding}")
-                return items
+                text = raw.decode(encoding)
             except UnicodeDecodeError:
                 continue # Try next encoding
+            try:
+                reader = csv.DictReader(io.StringIO(text))
+                # Clean up keys (strip BOM, external whitespace)
+                items = [{k.strip().lstrip("\ufeff"): (v or "").strip() for k, v in row.items() if k} for row in reader]
             except Exception as e:
                 logger.error(f"Error reading CSV {path} with {encoding}: {e}")
-                
+                continue
+            if last != encoding:
+                logger.info(f"Successfully loaded {path} using {encoding}")
+            self._encodings[path] = encoding
+            return items
+
         logger.error(f"Failed to load {path} with any supported encoding.")
         return []
 
+    def get_bank(self, game_type: str) -> QuestionBank:
+        bank = self.banks.get(game_type)
+        if bank is None:
+            return QuestionBank()
+        # Auto-reload if empty (e.g. valid file but loaded before write); the watcher covers this when running
+        if not bank.rows and self._watch_task is None:
+            logger.info(f"Reloading {game_type} questions...")
+            self._load_content()
+            bank = self.banks[game_type]
+        return bank
+
     def get_questions(self, game_type: str, limit: int = 10) -> List[Dict]:
+        full_list = self.get_bank(game_type).rows
+        count = min(len(full_list), limit)
+        if count == 0: return []
         if game_type == "binary_brain":
-            # Auto-reload if empty (e.g. valid file but loaded before write)
-            if not self.binary_brain_questions:
-                logger.info("Reloading Binary Brain questions...")
-                self._load_content()
-                
             # Shuffle and limit
-            full_list = self.binary_brain_questions
-            count = min(len(full_list), limit)
-            if count == 0: return []
             return random.sample(full_list, count)
-        elif game_type == "it_match":
-            if not self.it_match_questions:
-                logger.info("Reloading IT Match questions...")
-                self._load_content()
-
-            full_list = self.it_match_questions
-            count = min(len(full_list), limit)
-            if count == 0: return []
-            return full_list[:count]  # stable CSV order — router handles user-seeded shuffle
-        elif game_type == "text_match":
-            if not self.text_match_questions:
-                logger.info("Reloading Text Match questions...")
-                self._load_content()
-
-            full_list = self.text_match_questions
-            count = min(len(full_list), limit)
-            if count == 0: return []
-            return full_list[:count]  # stable CSV order — router handles user-seeded shuffle
-        return []
+        return list(full_list[:count])  # stable CSV order — router handles user-seeded shuffle
+
+    def get_payloads(self, game_type: str, limit: int = None) -> Tuple[Any, ...]:
+        """Prebuilt, validated response models (IT Match / Text Match), in CSV order."""
+        payloads = self.get_bank(game_type).payloads
+        return payloads if limit is None else payloads[:limit]
+
+    def get_answer_key(self, game_type: str) -> Mapping[str, str]:
+        """Normalized id -> normalized correct answer. Look up with normalize_id()."""
+        return self.banks.get(game_type, QuestionBank()).answers
 
     def get_correct_answer(self, game_type: str, question_id: str) -> Optional[str]:
-        questions = []
-        if game_type == "binary_brain":
-            questions = self.binary_brain_questions
-        elif game_type == "it_match":
-            questions = self.it_match_questions
-            
-        for q in questions:
-            # Case insensitive check for ID
-            if str(q.get("id", "")).lower() == str(question_id).lower():
-                if game_type == "binary_brain":
-                    return q.get("answer_correct")
-                elif game_type == "it_match":
-                    # IT Match CSV: id,question,image,is_correct
-                    # We expect '1' or '0'
-                    return q.get("is_correct")
-        return None
+        return self.get_answer_key(game_type).get(normalize_id(question_id))
 
 content_service = ContentService()
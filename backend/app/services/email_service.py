@@ -1,68 +1,306 @@
-
 import logging
 import smtplib
+import time
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
+from sqlalchemy import func, update
+from sqlmodel import select
+from app.database import get_session, async_session_factory
+from app.models import EmailDelivery, EmailJob
+from app.services.config_store import config_store
+from app.simple_config import settings
 
 logger = logging.getLogger(__name__)
 
+class FatalSMTPError(Exception):
+    """The job cannot continue (no host, bad credentials, no STARTTLS); deliveries stay pending."""
+
+class SMTPUnreachable(OSError):
+    """Opening the session failed (server down, network); transient, but fatal for the job once retries are used up."""
+
+def is_transient(e: Exception) -> bool:
+    """4xx replies, disconnects, timeouts and socket errors are worth retrying."""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in e.recipients.values())
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 400 <= e.smtp_code < 500
+    if isinstance(e, smtplib.SMTPNotSupportedError):
+        return False
+    return isinstance(e, OSError)  # SMTPServerDisconnected, ConnectionRefusedError, timeouts
+
+def smtp_config_from(values) -> Dict[str, Any]:
+    """SMTP settings from the SystemConfig snapshot (edited in the admin panel)."""
+    return {
+        "sender": values.get("email_sender", "noreply@checkit.com"),
+        "host": values.get("smtp_host", ""),
+        "port": int(values.get("smtp_port", "587") or 587),
+        "user": values.get("smtp_user", ""),
+        "password": values.get("smtp_password", ""),
+        "starttls": values.get("smtp_starttls", "true") != "false",
+    }
+
+def build_message(sender: str, to_email: str, subject: str, html_content: str) -> str:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to_email
+    msg.attach(MIMEText(html_content, "html"))
+    return msg.as_string()
+
+class SMTPConnection:
+    """
+    One SMTP session reused for many messages: connect, STARTTLS and login happen once,
+    then again only after a disconnect or every messages_per_connection messages.
+    Blocking; each worker owns one connection and calls it through asyncio.to_thread.
+    """
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.server: Optional[smtplib.SMTP] = None
+        self.sent = 0
+
+    def send(self, to_email: str, message: str):
+        if self.server is not None and self.sent >= settings.email.messages_per_connection:
+            self.close()
+        if self.server is None:
+            try:
+                self._open()
+            except (FatalSMTPError, smtplib.SMTPResponseException):
+                raise
+            except Exception as e:
+                raise SMTPUnreachable(f"Cannot connect to {self.config['host']}:{self.config['port']}: {e}") from e
+        try:
+            self.server.sendmail(self.config["sender"], [to_email], message)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            raise  # the session itself is still usable (sendmail already sent RSET)
+        except Exception:
+            self.close()
+            raise
+        self.sent += 1
+
+    def _open(self):
+        cfg = self.config
+        server = smtplib.SMTP(cfg["host"], cfg["port"], timeout=settings.email.smtp_timeout_seconds)
+        try:
+            if cfg["starttls"]:
+                server.starttls()
+            if cfg["user"] and cfg["password"]:
+                server.login(cfg["user"], cfg["password"])
+        except (smtplib.SMTPAuthenticationError, smtplib.SMTPNotSupportedError) as e:
+            server.close()
+            raise FatalSMTPError(f"SMTP login/STARTTLS failed: {e}") from e
+        except Exception:
+            server.close()
+            raise
+        self.server, self.sent = server, 0
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                self.server.close()
+            self.server = None
+
+class RateLimiter:
+    """Spaces sends evenly across all workers of a job (rate_per_second, 0 = unlimited)."""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class _JobRun:
+    """In-memory state of a running job; results are written to the DB in batches."""
+    def __init__(self, job_id: int, smtp_config: Dict[str, Any]):
+        self.job_id = job_id
+        self.smtp_config = smtp_config
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.limiter = RateLimiter(settings.email.rate_per_second)
+        self.results: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
 class EmailService:
+    """
+    Background bulk email jobs. start_job() stores one EmailDelivery row per recipient and
+    returns at once; a task then sends over email.pool_size reused SMTP connections with a
+    shared rate limit, retrying transient failures. Delivery state is persisted as it goes,
+    so a job interrupted by a restart or a fatal SMTP error resumes with its pending rows.
+    """
     def __init__(self):
-        pass
-        
-    def _send_sync(self, to_email: str, subject: str, html_content: str, config: Dict[str, Any]):
-        host = config.get("host")
-        if not host:
-            logger.info(f"[[MOCK EMAIL]] (No Host) To: {to_email} | Subject: {subject}")
+        self._runs: Dict[int, asyncio.Task] = {}
+
+    async def start(self):
+        """Resumes jobs that were still queued/running when the backend stopped."""
+        async for session in get_session():
+            ids = (await session.execute(
+                select(EmailJob.id).where(EmailJob.status.in_(["queued", "running"]))
+            )).scalars().all()
+        for job_id in ids:
+            logger.info(f"Resuming interrupted email job {job_id}.")
+            self._launch(job_id)
+
+    async def stop(self):
+        tasks = list(self._runs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def start_job(self, emails: List[Dict[str, str]]) -> int:
+        """emails = [{to, subject, body}, ...]. Returns the job id."""
+        async for session in get_session():
+            job = EmailJob(total=len(emails))
+            session.add(job)
+            await session.flush()
+            session.add_all([
+                EmailDelivery(job_id=job.id, recipient=e["to"], subject=e["subject"], body=e["body"])
+                for e in emails
+            ])
+            await session.commit()
+            job_id = job.id
+        self._launch(job_id)
+        return job_id
+
+    async def resume(self, job_id: int) -> bool:
+        if job_id in self._runs:
             return False
+        async with async_session_factory() as session:
+            if not await session.get(EmailJob, job_id):
+                return False
+        self._launch(job_id)
+        return True
+
+    def _launch(self, job_id: int):
+        task = asyncio.create_task(self._run(job_id))
+        self._runs[job_id] = task
+        task.add_done_callback(lambda _: self._runs.pop(job_id, None))
 
+    async def _run(self, job_id: int):
+        run = _JobRun(job_id, smtp_config_from(config_store.snapshot.values))
+        async for session in get_session():
+            pending = (await session.execute(
+                select(EmailDelivery.id, EmailDelivery.recipient, EmailDelivery.subject,
+                       EmailDelivery.body, EmailDelivery.attempts)
+                .where(EmailDelivery.job_id == job_id, EmailDelivery.status == "pending")
+                .order_by(EmailDelivery.id)
+            )).all()
+            await session.execute(update(EmailJob).where(EmailJob.id == job_id).values(status="running", error=None))
+            await session.commit()
+        for row in pending:
+            run.queue.put_nowait(row)
+
+        writer = asyncio.create_task(self._writer(run))
+        try:
+            if pending and not run.smtp_config["host"]:
+                run.error = "SMTP host not configured"
+            elif pending:
+                workers = min(settings.email.pool_size, len(pending))
+                await asyncio.gather(*(self._worker(run) for _ in range(workers)))
+        finally:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+            await self._flush(run)
+        # Not reached on cancellation (shutdown): the job stays "running" and resumes on start
+        status = "failed" if run.error else "completed"
+        async for session in get_session():
+            await session.execute(update(EmailJob).where(EmailJob.id == job_id).values(
+                status=status, error=run.error, finished_at=datetime.utcnow()))
+            await session.commit()
+        logger.info(f"Email job {job_id} {status}" + (f": {run.error}" if run.error else "."))
+
+    async def _worker(self, run: _JobRun):
+        conn = SMTPConnection(run.smtp_config)
         try:
-            port = config.get("port", 587)
-            user = config.get("user")
-            password = config.get("password")
-            sender = config.get("sender", "noreply@checkit.com")
+            while run.error is None:
+                try:
+                    delivery = run.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._deliver(run, conn, delivery)
+        finally:
+            await asyncio.to_thread(conn.close)
 
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = sender
-            msg["To"] = to_email
+    async def _deliver(self, run: _JobRun, conn: SMTPConnection, delivery):
+        message = build_message(run.smtp_config["sender"], delivery.recipient, delivery.subject, delivery.body)
+        attempts = delivery.attempts
+        while True:
+            await run.limiter.wait()
+            attempts += 1
+            try:
+                await asyncio.to_thread(conn.send, delivery.recipient, message)
+            except FatalSMTPError as e:
+                run.error = str(e)  # stops every worker; this row stays pending
+                return
+            except Exception as e:
+                if is_transient(e) and attempts < settings.email.max_attempts:
+                    logger.warning(f"Email to {delivery.recipient} failed (attempt {attempts}), retrying: {e}")
+                    await asyncio.sleep(settings.email.retry_backoff_seconds * 2 ** (attempts - 1))
+                    continue
+                if isinstance(e, SMTPUnreachable):
+                    run.error = str(e)  # server down: keep the rest pending instead of failing everyone
+                    return
+                logger.error(f"Failed to send email to {delivery.recipient}: {e}")
+                run.results.append({"id": delivery.id, "status": "failed", "attempts": attempts, "last_error": str(e)[:500]})
+                return
+            run.results.append({"id": delivery.id, "status": "sent", "attempts": attempts,
+                                "last_error": None, "sent_at": datetime.utcnow()})
+            return
 
-            part = MIMEText(html_content, "html")
-            msg.attach(part)
+    async def _writer(self, run: _JobRun):
+        while True:
+            await asyncio.sleep(0.5)
+            await self._flush(run)
 
-            # Connect
-            with smtplib.SMTP(host, port) as server:
-                server.starttls()
-                if user and password:
-                    server.login(user, password)
-                server.sendmail(sender, to_email, msg.as_string())
-            
-            logger.info(f"[[SMTP EMAIL]] Sent to {to_email}")
-            return True
+    async def _flush(self, run: _JobRun):
+        if not run.results:
+            return
+        batch, run.results = run.results, []
+        try:
+            async for session in get_session():
+                for result in batch:
+                    await session.execute(update(EmailDelivery).where(EmailDelivery.id == result["id"]).values(
+                        **{k: v for k, v in result.items() if k != "id"}))
+                await session.commit()
         except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {e}")
-            return False
+            run.results[:0] = batch
+            logger.error(f"Failed to record {len(batch)} email deliveries: {e}")
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        # Read before the DB awaits: a run finishing meanwhile then still reports active=True
+        # (pollers come back once more), never active=False next to a stale "running" row
+        active = job_id in self._runs
+        async for session in get_session():
+            job = await session.get(EmailJob, job_id)
+            if not job:
+                return None
+            counts = dict((await session.execute(
+                select(EmailDelivery.status, func.count()).where(EmailDelivery.job_id == job_id)
+                .group_by(EmailDelivery.status)
+            )).all())
+        done = counts.get("sent", 0) + counts.get("failed", 0)
+        return {
+            **job.model_dump(),
+            "active": active,
+            "sent": counts.get("sent", 0),
+            "failed": counts.get("failed", 0),
+            "pending": counts.get("pending", 0),
+            "progress": round(done / job.total, 3) if job.total else 1.0,
+        }
 
-    async def send_bulk(self, separate_emails: List[Dict], smtp_config: Dict[str, Any] = {}):
-        # separate_emails = [{to, subject, body}, ...]
-        # smtp_config = {host, port, user, password, sender}
-        
-        loop = asyncio.get_event_loop()
-        count = 0
-        
-        # In a real heavy app, use a queue worker (Celery/ARQ)
-        # Here we just run in thread pool
-        for email in separate_emails:
-            # Run blocking SMTP in thread
-            result = await loop.run_in_executor(
-                None, 
-                lambda: self._send_sync(email['to'], email['subject'], email['body'], smtp_config)
-            )
-            if result:
-                count += 1
-                
-        return count
+    async def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        async for session in get_session():
+            ids = (await session.execute(select(EmailJob.id).order_by(EmailJob.id.desc()).limit(limit))).scalars().all()
+        return [await self.get_job(job_id) for job_id in ids]
 
 email_service = EmailService()
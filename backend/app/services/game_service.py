@@ -1,9 +1,15 @@
+import asyncio
 import logging
 from datetime import datetime
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import GameScore, GameLog
+from app.models import GameScore
 from app.simple_config import settings
-from app.services.content_service import content_service
+from app.services.content_service import content_service, normalize_id, normalize_it_match_answer
+from app.services.leaderboard_service import leaderboard_service
+from app.services.log_service import log_service
+from app.services.game_session_service import game_session_service
+from app.services.config_store import config_store
 from app.hardware.solenoid import solenoid
 from app.hardware.patch_panel import patch_panel
 
@@ -21,16 +27,6 @@ class GameService:
         # score argument is passed from controller. If None, we calculate it.
         final_score = score if score is not None else 0
         
-        # 0. Check if user already played this game
-        from sqlmodel import select
-        existing_stmt = select(GameScore).where(GameScore.user_id == user_id, GameScore.game_type == game_type)
-        existing = (await session.execute(existing_stmt)).scalar_one_or_none()
-        
-        if existing:
-            from fastapi import HTTPException
-            logger.warning(f"User {user_id} attempted to play {game_type} again, but already has a score.")
-            raise HTTPException(status_code=400, detail="Masz już zapisany wynik dla tej gry. Dozwolona jest tylko jedna gra w każdej kategorii!")
-
         passed = False
         
         # 1. Calculate Score
@@ -54,10 +50,8 @@ class GameService:
                 final_score = 0 # Penalty?
             else:
                 if final_score >= 5000:
-                    logger.info("Patch Master solved verified and score >= 5000. Triggering Solenoid.")
-                    import asyncio
-                    asyncio.create_task(solenoid.open_box())
-                    session.add(GameLog(event_type="SOLENOID", details=f"Open Triggered by User {user_id} (Patch Master > 5000 pts)"))
+                    # Triggered only after the score is stored (not on a duplicate submit)
+                    passed = True
                 else:
                     logger.info(f"Patch Master solved but score {final_score} is < 5000. Not triggering Solenoid.")
 
@@ -67,30 +61,43 @@ class GameService:
             else:
                 final_score = await self._calculate_it_match(answers, duration_ms)
 
-        # 2. Save Score
-        game_score = GameScore(
-            user_id=user_id,
-            game_type=game_type,
-            score=max(0, int(final_score)), # Ensure non-negative
-            duration_ms=duration_ms,
-            synced=False
-        )
+        # 2. Save Score (the unique (user_id, game_type) constraint rejects a second one)
         try:
-            session.add(game_score)
-            
-            # Add Log
-            session.add(GameLog(event_type="GAME_FINISHED", details=f"User {user_id} finished {game_type} with {int(final_score)} pts"))
-            
-            await session.commit()
-            await session.refresh(game_score)
-            logger.info(f"GameScore saved: {game_score}")
+            game_score = await game_session_service.insert_score(
+                session, user_id, game_type, max(0, int(final_score)), duration_ms  # Ensure non-negative
+            )
         except Exception as e:
             logger.error(f"Failed to save GameScore: {e}")
             await session.rollback()
             raise e
+        if game_score is None:
+            logger.warning(f"User {user_id} attempted to play {game_type} again, but already has a score.")
+            raise HTTPException(status_code=400, detail="Masz już zapisany wynik dla tej gry. Dozwolona jest tylko jedna gra w każdej kategorii!")
+        logger.info(f"GameScore saved: {game_score}")
+        # Journaled through the buffered log writer (group commit, no extra transaction here)
+        log_service.log("GAME_FINISHED", f"User {user_id} finished {game_type} with {int(final_score)} pts")
+
+        if passed:
+            logger.info("Patch Master solved verified and score >= 5000. Triggering Solenoid.")
+            asyncio.create_task(solenoid.open_box())
+            log_service.log("SOLENOID", f"Open Triggered by User {user_id} (Patch Master > 5000 pts)")
+
+        # Update the materialized leaderboard only after the commit succeeded
+        await self._publish_to_leaderboard(game_score, session)
         
         return game_score
 
+    async def _publish_to_leaderboard(self, game_score: GameScore, session: AsyncSession):
+        try:
+            nick = leaderboard_service.get_nick(game_score.user_id)
+            if nick is None:
+                from sqlmodel import select
+                from app.models import User
+                nick = (await session.execute(select(User.nick).where(User.id == game_score.user_id))).scalar_one_or_none() or ""
+            leaderboard_service.record_score(game_score.user_id, nick, game_score.game_type, game_score.score)
+        except Exception as e:
+            logger.error(f"Failed to update leaderboard after GameScore commit: {e}")
+
     async def _calculate_binary_brain(self, answers: dict, duration_ms: int):
         # answers: {question_id: selected_answer}
         correct_count = 0
@@ -99,8 +106,9 @@ class GameService:
         if total_questions == 0:
             return 0, False
 
+        answer_key = content_service.get_answer_key("binary_brain")
         for q_id, ans in answers.items():
-            correct = content_service.get_correct_answer("binary_brain", q_id)
+            correct = answer_key.get(normalize_id(q_id))
             if correct and ans == correct:
                 correct_count += 1
         
@@ -126,16 +134,8 @@ class GameService:
         return final_score, passed
 
     async def _calculate_patch_master(self, duration_ms: int, session: AsyncSession = None):
-        # Score based on time remaining relative to total time
-        total_time_ms = 200000 # 200s default
-        
-        if session:
-            from app.models import SystemConfig
-            from sqlmodel import select
-            pm_time_res = await session.execute(select(SystemConfig).where(SystemConfig.key == "pm_total_time"))
-            pm_time_conf = pm_time_res.scalar_one_or_none()
-            if pm_time_conf and pm_time_conf.value.isdigit():
-                total_time_ms = int(pm_time_conf.value) * 1000
+        # Score based on time remaining relative to total time (200s default, cached SystemConfig)
+        total_time_ms = config_store.snapshot.pm_total_time * 1000
 
         # Max score is 10000. Time penalty is proportionate.
         time_ratio = duration_ms / total_time_ms
@@ -146,19 +146,11 @@ class GameService:
 
     async def _calculate_it_match(self, answers: dict, duration_ms: int):
         correct_count = 0
+        # Correct answers are normalized once at content load; only the user's side is normalized here
+        answer_key = content_service.get_answer_key("it_match")
         for q_id, ans in answers.items():
-            correct = content_service.get_correct_answer("it_match", q_id)
-            
-            user_ans = str(ans).lower()
-            corr_ans = str(correct).lower()
-            
-            # Normalization
-            if user_ans == 'true': user_ans = '1'
-            if user_ans == 'false': user_ans = '0'
-            if corr_ans == 'true': corr_ans = '1'
-            if corr_ans == 'false': corr_ans = '0'
-            
-            if correct is not None and user_ans == corr_ans:
+            correct = answer_key.get(normalize_id(q_id))
+            if correct is not None and normalize_it_match_answer(ans) == correct:
                 correct_count += 1
         
         accuracy = correct_count / max(1, len(answers))
@@ -0,0 +1,58 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import exists, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import GameScore, GameSession
+
+logger = logging.getLogger(__name__)
+
+class GameSessionService:
+    """
+    Gatekeeping for the one-game-per-category rule, enforced by the unique
+    (user_id, game_type) constraints instead of check-then-insert sequences, so two
+    concurrent requests from the same user cannot both pass.
+    """
+    async def register_start(self, session: AsyncSession, user_id: int, game_type: str) -> bool:
+        """
+        Records the first fetch of a game's questions. 403 ALREADY_PLAYED when a score exists.
+        Returns True when this call registered the start, False when it was already registered.
+
+        First call: one INSERT ... SELECT ... WHERE NOT EXISTS(score) ON CONFLICT DO NOTHING.
+        Repeat calls (kiosk refresh) add one status read to tell "started" from "played".
+        """
+        already_scored = exists().where(GameScore.user_id == user_id, GameScore.game_type == game_type)
+        stmt = insert(GameSession).from_select(
+            ["user_id", "game_type", "started_at"],
+            select(literal(user_id), literal(game_type), literal(datetime.utcnow())).where(~already_scored),
+        ).on_conflict_do_nothing(index_elements=["user_id", "game_type"])
+        result = await session.execute(stmt)
+        await session.commit()
+        if result.rowcount:
+            return True
+        if (await session.execute(select(already_scored))).scalar():
+            raise HTTPException(status_code=403, detail="ALREADY_PLAYED")
+        return False
+
+    async def insert_score(self, session: AsyncSession, user_id: int, game_type: str,
+                           score: int, duration_ms: int) -> Optional[GameScore]:
+        """
+        Inserts the user's only score for the game and commits.
+        Returns None (nothing written) when a score already exists.
+        """
+        game_score = GameScore(user_id=user_id, game_type=game_type, score=score,
+                               duration_ms=duration_ms, played_at=datetime.utcnow(), synced=False)
+        stmt = insert(GameScore).values(
+            user_id=user_id, game_type=game_type, score=score, duration_ms=duration_ms,
+            played_at=game_score.played_at, synced=False,
+        ).on_conflict_do_nothing(index_elements=["user_id", "game_type"])
+        result = await session.execute(stmt)
+        await session.commit()
+        if not result.rowcount:
+            return None
+        game_score.id = result.inserted_primary_key[0]
+        return game_score
+
+game_session_service = GameSessionService()
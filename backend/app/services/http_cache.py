@@ -0,0 +1,15 @@
+from fastapi import Request, Response
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already names this (strong or weak) ETag."""
+    if_none_match = request.headers.get("if-none-match", "")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+
+def etag_response(request: Request, body: bytes, etag: str, cache_control: str = "private, no-cache") -> Response:
+    """200 with a prebuilt JSON body, or 304 when the client already has this ETag."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,72 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.database import async_session_factory
+from app.models import User
+from app.simple_config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Slim identity returned by get_current_user instead of the User row."""
+    id: int
+    nick: str
+    is_blocked: bool = False
+
+class IdentityCache:
+    """
+    Bounded TTL cache of kiosk identities (X-User-ID -> CurrentUser). A hit resolves the
+    user without opening a session; a miss selects only id, nick and is_blocked.
+    Admin delete/block/reset invalidate entries, the TTL covers any other writer.
+    Unknown ids are not cached, so a user registered a moment ago is found at once.
+    """
+    def __init__(self):
+        self._entries: "OrderedDict[int, Tuple[float, CurrentUser]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    async def get(self, user_id: int, session: AsyncSession = None) -> Optional[CurrentUser]:
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return entry[1]
+            del self._entries[user_id]
+            self._stats["expired"] += 1
+
+        self._stats["misses"] += 1
+        identity = await self._load(user_id, session)
+        if identity is not None:
+            self._entries[user_id] = (now + settings.security.identity_cache_ttl_seconds, identity)
+            while len(self._entries) > settings.security.identity_cache_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return identity
+
+    async def _load(self, user_id: int, session: AsyncSession = None) -> Optional[CurrentUser]:
+        if session is None:
+            async with async_session_factory() as session:
+                return await self._load(user_id, session)
+        row = (await session.execute(
+            select(User.id, User.nick, User.is_blocked).where(User.id == user_id)
+        )).one_or_none()
+        return CurrentUser(row.id, row.nick, bool(row.is_blocked)) if row else None
+
+    def invalidate(self, user_id: int):
+        if self._entries.pop(user_id, None) is not None:
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        self._stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        return {**self._stats, "entries": len(self._entries)}
+
+identity_cache = IdentityCache()
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from app.simple_config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optimized question images: content/<game>/images/* -> content/_optimized/<game>/<stem>.<width>.<hash>.<format>
+# The hash covers the source bytes and the encoding parameters, so a file name never changes
+# meaning and can be cached forever; a new source image or new settings yields a new name.
+OPTIMIZED_DIR_NAME = "_optimized"
+MANIFEST_NAME = "manifest.json"
+SOURCE_EXTENSIONS = {".webp", ".jpg", ".jpeg", ".png", ".avif"}
+FORMAT_MIME = {"avif": "image/avif", "webp": "image/webp"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _load_pillow():
+    from PIL import Image, features
+    try:
+        import pillow_avif  # noqa: F401 - registers AVIF on older Pillow versions
+    except ImportError:
+        pass
+    return Image, features
+
+def supported_formats(requested: List[str]) -> List[str]:
+    _, features = _load_pillow()
+    available = [f for f in requested if f in FORMAT_MIME and features.check(f)]
+    for f in set(requested) - set(available):
+        logger.warning(f"Image format '{f}' is not supported by this Pillow build, skipping it.")
+    return available
+
+# Extra encoder options per format (AVIF: faster encoder preset, still far smaller than WebP)
+SAVE_OPTIONS = {"avif": {"speed": 8}, "webp": {"method": 6}}
+
+def _variant_hash(source: bytes, width: int, fmt: str, quality: int) -> str:
+    h = hashlib.sha256(source)
+    h.update(f"|{width}|{fmt}|{quality}".encode())
+    return h.hexdigest()[:16]
+
+def _render(job: Tuple[str, str, str, List[int], List[str], Dict[str, int]]) -> Dict[str, Any]:
+    """Worker (runs in a separate process): renders every variant of one source image."""
+    source_path, out_dir, rel_key, widths, formats, quality = job
+    Image, _ = _load_pillow()
+    source = Path(source_path).read_bytes()
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    stem = Path(source_path).stem
+
+    with Image.open(source_path) as img:
+        img.load()
+        src_w, src_h = img.size
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        variants = []
+        # Never upscale: widths above the source collapse to the source width
+        for width in sorted({min(w, src_w) for w in widths}):
+            height = round(src_h * width / src_w)
+            resized = img if width == src_w else img.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                digest = _variant_hash(source, width, fmt, quality[fmt])
+                name = f"{stem}.{width}.{digest}.{fmt}"
+                target = out / name
+                if not target.exists():
+                    tmp = target.with_suffix(f".{fmt}.tmp")
+                    resized.save(tmp, fmt.upper(), quality=quality[fmt], **SAVE_OPTIONS.get(fmt, {}))
+                    os.replace(tmp, target)
+                variants.append({
+                    "file": name,
+                    "width": width,
+                    "height": height,
+                    "format": fmt,
+                    "type": FORMAT_MIME[fmt],
+                    "bytes": target.stat().st_size,
+                    "etag": f'"{digest}"',
+                })
+    return {"key": rel_key, "width": src_w, "height": src_h, "source_bytes": len(source), "variants": variants}
+
+def build_images(content_dir: Path, widths: List[int] = None, formats: List[str] = None,
+                 quality: Optional[int] = None, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Renders all variants in parallel (process pool) and writes content/_optimized/manifest.json.
+    Returns the manifest. Existing variant files are reused, so re-running is cheap.
+    """
+    widths = widths or list(settings.game.image_widths)
+    formats = supported_formats(formats or list(settings.game.image_formats))
+    # One quality for every format when given, else the per-format config
+    quality = {f: quality for f in formats} if quality else {f: settings.game.image_quality[f] for f in formats}
+    out_root = content_dir / OPTIMIZED_DIR_NAME
+
+    jobs = []
+    for game_dir in sorted(p for p in content_dir.iterdir() if p.is_dir() and p.name != OPTIMIZED_DIR_NAME):
+        images_dir = game_dir / "images"
+        if not images_dir.is_dir():
+            continue
+        for source in sorted(images_dir.iterdir()):
+            if source.suffix.lower() in SOURCE_EXTENSIONS:
+                rel_key = f"{game_dir.name}/{source.name}"
+                jobs.append((str(source), str(out_root / game_dir.name), rel_key, widths, formats, quality))
+
+    images = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(_render, jobs):
+            game = result["key"].split("/", 1)[0]
+            for v in result["variants"]:
+                v["url"] = f"{OPTIMIZED_DIR_NAME}/{game}/{v.pop('file')}"
+            images[result["key"]] = result
+
+    # Drop variants no longer referenced (old hashes of replaced images)
+    referenced = {v["url"] for img in images.values() for v in img["variants"]}
+    if out_root.exists():
+        for path in out_root.glob("*/*"):
+            if f"{OPTIMIZED_DIR_NAME}/{path.parent.name}/{path.name}" not in referenced:
+                path.unlink()
+
+    manifest = {"widths": widths, "formats": formats, "quality": quality, "images": images}
+    out_root.mkdir(parents=True, exist_ok=True)
+    tmp = out_root / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    os.replace(tmp, out_root / MANIFEST_NAME)  # atomic, the content watcher picks it up
+    return manifest
+
+def load_manifest(content_dir: Path) -> Dict[str, Any]:
+    path = content_dir / OPTIMIZED_DIR_NAME / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("images", {})
+    except Exception as e:
+        logger.error(f"Invalid image manifest {path}: {e}")
+        return {}
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    Serves the hashed variants with a one-year immutable Cache-Control. The ETag is the
+    content hash already embedded in the file name, so it is known without reading the file.
+    """
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        parts = os.path.basename(full_path).split(".")
+        if len(parts) >= 4:  # <stem>.<width>.<hash>.<format>
+            response.headers["etag"] = f'"{parts[-2]}"'
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,188 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.database import async_session_factory
+from app.models import GameScore, User
+
+logger = logging.getLogger(__name__)
+
+GAME_TYPES = ["binary_brain", "patch_master", "it_match", "text_match"]
+DEFAULT_LIMIT = 10
+
+class LeaderboardService:
+    """
+    Materialized leaderboard kept in memory.
+    Rebuilt from the DB once on startup, then updated incrementally whenever a score
+    is committed or deleted, so reads never touch the database.
+
+    Each ranking is a list of (-score, user_id) tuples kept sorted with bisect,
+    so top-N reads are a slice and updates are a binary search + list insert.
+    """
+    def __init__(self):
+        self._nicks: Dict[int, str] = {}                     # user_id -> nick
+        self._best: Dict[str, Dict[int, int]] = {}           # game_type -> {user_id: best score}
+        self._ranked: Dict[str, List[Tuple[int, int]]] = {}  # game_type -> sorted [(-score, user_id)]
+        self._totals: Dict[int, int] = {}                    # user_id -> grandmaster total
+        self._gm_ranked: List[Tuple[int, int]] = []          # sorted [(-total, user_id)]
+        self.version = 0  # Bumped on every change, lets pollers/pushers skip unchanged data
+        self._rebuild_lock = asyncio.Lock()
+        # Updates made while a rebuild awaits the DB; replayed on top of the rebuilt state
+        self._pending: Optional[List[Tuple[Callable, tuple]]] = None
+        self._stats = {
+            "built_at": None,
+            "build_ms": 0.0,
+            "build_rows": 0,
+            "updates": 0,
+            "last_update_ms": 0.0,
+            "max_update_ms": 0.0,
+        }
+
+    # --- Build ---
+
+    async def rebuild(self, session: AsyncSession = None):
+        """
+        Reloads every score from the DB. Called once from the app lifespan.
+        Score updates that land while the select is awaited are applied right away and
+        replayed after the reset, so the rebuild cannot wipe them.
+        """
+        if session is None:
+            async with async_session_factory() as session:
+                return await self.rebuild(session)
+
+        async with self._rebuild_lock:
+            started = time.perf_counter()
+            stmt = select(GameScore.user_id, GameScore.game_type, GameScore.score, User.nick).join(User)
+            self._pending = []
+            try:
+                rows = (await session.execute(stmt)).all()
+            finally:
+                pending, self._pending = self._pending, None
+
+            self._reset()
+            for row in rows:
+                self._nicks[row.user_id] = row.nick
+                self._set_game_score(row.user_id, row.game_type, row.score)
+            for op, args in pending:
+                op(*args)
+            self.version += 1
+
+        self._stats["built_at"] = time.time()
+        self._stats["build_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self._stats["build_rows"] = len(rows)
+        logger.info(f"Leaderboard rebuilt from {len(rows)} scores in {self._stats['build_ms']} ms.")
+
+    def _reset(self):
+        self._nicks.clear()
+        self._best = {g: {} for g in GAME_TYPES}
+        self._ranked = {g: [] for g in GAME_TYPES}
+        self._totals.clear()
+        self._gm_ranked = []
+
+    # --- Incremental updates (call only after the DB commit succeeded) ---
+
+    def record_score(self, user_id: int, nick: str, game_type: str, score: int):
+        self._update(self._record, user_id, nick, game_type, score)
+
+    def remove_score(self, user_id: int, game_type: str):
+        self._update(self._drop_game_score, user_id, game_type)
+
+    def remove_user(self, user_id: int):
+        self._update(self._drop_user, user_id)
+
+    def clear(self):
+        self._update(self._reset)
+
+    def get_nick(self, user_id: int) -> Optional[str]:
+        return self._nicks.get(user_id)
+
+    def _update(self, op: Callable, *args):
+        started = time.perf_counter()
+        op(*args)
+        if self._pending is not None:
+            self._pending.append((op, args))
+        self._touch(started)
+
+    def _record(self, user_id: int, nick: str, game_type: str, score: int):
+        self._nicks[user_id] = nick
+        self._set_game_score(user_id, game_type, score)
+
+    def _drop_user(self, user_id: int):
+        for game_type in list(self._best.keys()):
+            self._drop_game_score(user_id, game_type)
+        self._nicks.pop(user_id, None)
+
+    def _touch(self, started: float):
+        self.version += 1
+        elapsed = (time.perf_counter() - started) * 1000
+        self._stats["updates"] += 1
+        self._stats["last_update_ms"] = round(elapsed, 3)
+        self._stats["max_update_ms"] = max(self._stats["max_update_ms"], round(elapsed, 3))
+
+    def _set_game_score(self, user_id: int, game_type: str, score: int):
+        best = self._best.setdefault(game_type, {})
+        ranked = self._ranked.setdefault(game_type, [])
+        current = best.get(user_id)
+        # Best score per game counts (the unique constraint normally keeps one row anyway)
+        if current is not None and current >= score:
+            return
+        if current is not None:
+            _remove_sorted(ranked, (-current, user_id))
+        best[user_id] = score
+        bisect.insort(ranked, (-score, user_id))
+        self._set_total(user_id, self._totals.get(user_id, 0) - (current or 0) + score)
+
+    def _drop_game_score(self, user_id: int, game_type: str):
+        best = self._best.get(game_type, {})
+        current = best.pop(user_id, None)
+        if current is None:
+            return
+        _remove_sorted(self._ranked[game_type], (-current, user_id))
+        if any(user_id in b for b in self._best.values()):
+            self._set_total(user_id, self._totals[user_id] - current)
+        else:
+            # No scores left -> user drops out of the grandmaster ranking entirely
+            old_total = self._totals.pop(user_id, None)
+            if old_total is not None:
+                _remove_sorted(self._gm_ranked, (-old_total, user_id))
+
+    def _set_total(self, user_id: int, total: int):
+        old_total = self._totals.get(user_id)
+        if old_total is not None:
+            _remove_sorted(self._gm_ranked, (-old_total, user_id))
+        self._totals[user_id] = total
+        bisect.insort(self._gm_ranked, (-total, user_id))
+
+    # --- Reads ---
+
+    def get_top(self, game_type: str, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        ranked = self._ranked.get(game_type, [])
+        return [{"nick": self._nicks.get(uid, ""), "score": -neg} for neg, uid in ranked[:limit]]
+
+    def get_grandmaster(self, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        return [{"nick": self._nicks.get(uid, ""), "score": -neg} for neg, uid in self._gm_ranked[:limit]]
+
+    def get_leaderboard(self, limit: int = DEFAULT_LIMIT) -> Dict[str, List[Dict]]:
+        board = {game_type: self.get_top(game_type, limit) for game_type in GAME_TYPES}
+        board["grandmaster"] = self.get_grandmaster(limit)
+        return board
+
+    def get_stats(self) -> Dict:
+        return {
+            **self._stats,
+            "version": self.version,
+            "users": len(self._totals),
+            "scores": sum(len(b) for b in self._best.values()),
+        }
+
+def _remove_sorted(ranked: List[Tuple[int, int]], item: Tuple[int, int]) -> Optional[int]:
+    idx = bisect.bisect_left(ranked, item)
+    if idx < len(ranked) and ranked[idx] == item:
+        del ranked[idx]
+        return idx
+    return None
+
+leaderboard_service = LeaderboardService()
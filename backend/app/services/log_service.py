@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from sqlalchemy import delete, func
+from sqlalchemy.future import select
+from app.database import get_session
+from app.models import GameLog
+from app.simple_config import settings
+
+logger = logging.getLogger(__name__)
+
+class LogService:
+    """
+    Append-only journal for GameLog events.
+
+    log() only appends to an in-memory buffer and never touches the database, so request
+    handlers do not pay for a commit per event. A background writer flushes the buffer
+    in one transaction (group commit) every log_flush_interval_ms or as soon as
+    log_flush_batch events are waiting.
+
+    The same task prunes the table: synced rows older than log_retention_hours are deleted,
+    and the table is capped at log_max_rows (oldest synced rows go first; unsynced rows are
+    only dropped if the cap is still exceeded, e.g. after days without a server).
+    """
+    def __init__(self):
+        self._buffer: List[GameLog] = []
+        self._wakeup = asyncio.Event()
+        self.running = False
+        self.task = None
+        self._last_prune = 0.0
+        self._stats = {
+            "written": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_batch": 0,
+            "pruned": 0,
+            "dropped_unsynced": 0,
+            "last_error": None,
+        }
+
+    async def start(self):
+        self.running = True
+        self.task = asyncio.create_task(self._loop())
+        logger.info("Log Service started.")
+
+    async def stop(self):
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        # Whatever is still buffered must reach the DB before shutdown
+        await self.flush()
+        logger.info("Log Service stopped.")
+
+    def log(self, event_type: str, details: str):
+        self._buffer.append(GameLog(event_type=event_type, details=details, timestamp=datetime.utcnow()))
+        if len(self._buffer) >= settings.api.log_flush_batch:
+            self._wakeup.set()
+
+    def discard_pending(self):
+        """Drops buffered events (used when the admin clears the log table)."""
+        self._buffer.clear()
+
+    async def flush(self) -> int:
+        if not self._buffer:
+            return 0
+        batch, self._buffer = self._buffer, []
+        started = time.perf_counter()
+        try:
+            async for session in get_session():
+                session.add_all(batch)
+                await session.commit()
+        except Exception as e:
+            # Keep the events for the next attempt, in their original order
+            self._buffer[:0] = batch
+            self._stats["last_error"] = str(e)
+            logger.error(f"Failed to write {len(batch)} log events: {e}")
+            return 0
+
+        stats = self._stats
+        stats["written"] += len(batch)
+        stats["flushes"] += 1
+        stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        stats["max_batch"] = max(stats["max_batch"], len(batch))
+        stats["last_error"] = None
+        return len(batch)
+
+    async def prune(self) -> int:
+        """Deletes synced rows past the retention window and enforces the row cap."""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.api.log_retention_hours)
+        max_rows = settings.api.log_max_rows
+        removed = 0
+        async for session in get_session():
+            result = await session.execute(
+                delete(GameLog).where(GameLog.synced == True, GameLog.timestamp < cutoff)
+            )
+            removed += result.rowcount or 0
+
+            total = (await session.execute(select(func.count()).select_from(GameLog))).scalar_one()
+            if total > max_rows:
+                removed += await self._delete_oldest(session, total - max_rows, synced_only=True)
+                total = (await session.execute(select(func.count()).select_from(GameLog))).scalar_one()
+            if total > max_rows:
+                dropped = await self._delete_oldest(session, total - max_rows, synced_only=False)
+                self._stats["dropped_unsynced"] += dropped
+                removed += dropped
+                logger.warning(f"GameLog over {max_rows} rows with no server to sync to: dropped {dropped} oldest unsynced events.")
+            await session.commit()
+
+        self._stats["pruned"] += removed
+        if removed:
+            logger.info(f"Pruned {removed} GameLog rows.")
+        return removed
+
+    async def _delete_oldest(self, session, count: int, synced_only: bool) -> int:
+        ids = select(GameLog.id).order_by(GameLog.timestamp, GameLog.id).limit(count)
+        if synced_only:
+            ids = ids.where(GameLog.synced == True)
+        result = await session.execute(delete(GameLog).where(GameLog.id.in_(ids.scalar_subquery())))
+        return result.rowcount or 0
+
+    async def _loop(self):
+        interval = settings.api.log_flush_interval_ms / 1000
+        while self.running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                if time.time() - self._last_prune >= settings.api.log_prune_interval_seconds:
+                    self._last_prune = time.time()
+                    await self.prune()
+            except Exception as e:
+                logger.error(f"Error in Log writer loop: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "buffered": len(self._buffer)}
+
+log_service = LogService()
@@ -0,0 +1,83 @@
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+# Nick normalization: case-folded, diacritics stripped, leetspeak mapped and separators
+# dropped, so "K.u.r_w@", "kurwą" and "KURWA" all become "kurwa". Patterns go through the
+# same function, so they always compare like with like.
+LEET_MAP = str.maketrans({
+    "0": "o", "1": "i", "!": "i", "|": "i", "3": "e", "4": "a", "@": "a",
+    "5": "s", "$": "s", "7": "t", "+": "t", "8": "b", "9": "g",
+})
+# Letters NFKD does not decompose
+EXTRA_FOLDS = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ß": "ss", "æ": "ae", "œ": "oe"})
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.casefold()).translate(EXTRA_FOLDS).translate(LEET_MAP)
+    return "".join(ch for ch in text if ch.isalnum())
+
+def collapse_repeats(text: str) -> str:
+    """"kuuurwaaa" -> "kurwa". Applied to the nick only: patterns keep their double letters."""
+    return "".join(ch for i, ch in enumerate(text) if i == 0 or text[i - 1] != ch)
+
+class ProfanityMatcher:
+    """
+    Aho-Corasick automaton over the normalized word list. Built once per list; a lookup is
+    a single pass over the normalized text regardless of how many words the list has.
+    """
+    def __init__(self, words: Iterable[str]):
+        # Trie as parallel arrays: goto[state] maps a char to the next state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]  # shortest pattern ending here (via fail links)
+        self.size = 0
+        for word in words:
+            pattern = normalize(word)
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = nxt
+        if self._output[state] is None:
+            self._output[state] = pattern
+            self.size += 1
+
+    def _build(self):
+        # BFS: fail links point to the longest proper suffix that is also a trie path
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._output[nxt] is None:
+                    self._output[nxt] = self._output[self._fail[nxt]]
+                queue.append(nxt)
+
+    def search(self, normalized: str) -> Optional[str]:
+        """First pattern found in an already normalized text, None when clean."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in normalized:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+    def find(self, text: str) -> Optional[str]:
+        """Checks the normalized text as is and with stretched letters collapsed."""
+        normalized = normalize(text)
+        return self.search(normalized) or self.search(collapse_repeats(normalized))
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from app.simple_config import settings
+
+logger = logging.getLogger(__name__)
+
+# Topics that expose admin-only data
+ADMIN_TOPICS = {"nodes"}
+
+# --- Snapshot providers (deferred imports: routers import this module) ---
+
+def _queue_snapshot() -> Dict[str, Any]:
+    from app.routers.patch_master_queue import queue_state
+    from app.services.config_store import config_store
+    config = config_store.snapshot
+    return {
+        "status": queue_state["status"],
+        "current_player": queue_state["current_player"],
+        "queue": queue_state["queue"],
+        "force_solved": queue_state.get("force_solved", False),
+        "start_time": queue_state.get("start_time"),
+        "global_status": config.competition_status,
+        "pm_total_time": config.pm_total_time,
+    }
+
+def _queue_version():
+    from app.routers import patch_master_queue
+    from app.services.config_store import config_store
+    return patch_master_queue.queue_version, config_store.version
+
+def _patch_panel_snapshot() -> Dict[str, Any]:
+    from app.hardware.patch_panel import patch_panel
+    state = patch_panel.snapshot()
+    return {
+        "pairs": state.to_dicts(),
+        "solved": state.is_solved(),
+    }
+
+def _patch_panel_version():
+    from app.hardware.patch_panel import patch_panel
+    return patch_panel.snapshot()
+
+def _leaderboard_snapshot() -> Dict[str, Any]:
+    from app.services.leaderboard_service import leaderboard_service
+    from app.services.config_store import config_store
+    return {
+        **leaderboard_service.get_leaderboard(limit=10),
+        "leaderboard_message": config_store.snapshot.leaderboard_message,
+    }
+
+def _leaderboard_version():
+    from app.services.leaderboard_service import leaderboard_service
+    from app.services.config_store import config_store
+    return leaderboard_service.version, config_store.version
+
+def _nodes_snapshot() -> Dict[str, Any]:
+    from app.node_state import get_nodes_status
+    return get_nodes_status()
+
+def _nodes_version():
+    from app.node_state import nodes_version
+    return nodes_version()
+
+class Topic:
+    def __init__(self, name: str, provider: Callable[[], Dict[str, Any]], version_fn: Callable[[], Any] = None):
+        self.name = name
+        self.provider = provider
+        # Optional cheap change marker; when it is unchanged the provider is not even called
+        self.version_fn = version_fn
+        self._source_version = None
+        self.version = 0
+        self.state: Optional[Dict[str, Any]] = None
+        self.encoded: Optional[str] = None
+        self.snapshot_msg: Optional[str] = None
+
+    def refresh(self) -> Optional[str]:
+        """Recomputes the topic state. Returns a serialized diff message if it changed, else None."""
+        if self.version_fn is not None:
+            source_version = self.version_fn()
+            if self.state is not None and source_version == self._source_version:
+                return None
+            self._source_version = source_version
+
+        encoded = json.dumps(self.provider(), default=str, sort_keys=True)
+        if encoded == self.encoded:
+            return None
+
+        new_state = json.loads(encoded)
+        old_state = self.state or {}
+        changed = {k: v for k, v in new_state.items() if old_state.get(k) != v}
+        removed = [k for k in old_state if k not in new_state]
+
+        self.version += 1
+        self.state = new_state
+        self.encoded = encoded
+        self.snapshot_msg = self._message("snapshot", encoded_data=encoded)
+        return self._message("diff", changed=changed, removed=removed)
+
+    def _message(self, kind: str, encoded_data: str = None, **fields) -> str:
+        if encoded_data is not None:
+            return f'{{"type": "{kind}", "topic": "{self.name}", "version": {self.version}, "data": {encoded_data}}}'
+        return json.dumps({"type": kind, "topic": self.name, "version": self.version, **fields}, default=str)
+
+class Subscriber:
+    """
+    One connected client. Holds at most one pending message per topic, so a slow
+    client never makes memory grow: if it has not drained the previous update of a
+    topic, the pending diff is replaced by a full snapshot (coalescing backpressure).
+    """
+    def __init__(self, topics: Iterable[str]):
+        self.topics: Set[str] = set(topics)
+        self._pending: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self.closed = False
+        self.coalesced = 0
+
+    def offer(self, topic: str, diff_msg: str, snapshot_msg: str):
+        if topic in self._pending:
+            self._pending[topic] = snapshot_msg
+            self.coalesced += 1
+        else:
+            self._pending[topic] = diff_msg
+        self._wakeup.set()
+
+    def offer_snapshot(self, topic: str, snapshot_msg: str):
+        self._pending[topic] = snapshot_msg
+        self._wakeup.set()
+
+    async def next_batch(self) -> Optional[List[str]]:
+        """Waits for pending messages. Returns None once the subscriber is closed."""
+        await self._wakeup.wait()
+        self._wakeup.clear()
+        if self.closed:
+            return None
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+class PushService:
+    """
+    Server-push hub for kiosks and screens (WebSocket / SSE in routers/events.py).
+    A single publisher task recomputes the subscribed topics at a fixed interval
+    (or immediately on notify()) and fans out diffs only when something changed,
+    replacing per-client polling of the same in-memory state.
+    """
+    def __init__(self):
+        self.topics: Dict[str, Topic] = {
+            "queue": Topic("queue", _queue_snapshot, _queue_version),
+            "patch_panel": Topic("patch_panel", _patch_panel_snapshot, _patch_panel_version),
+            "leaderboard": Topic("leaderboard", _leaderboard_snapshot, _leaderboard_version),
+            "nodes": Topic("nodes", _nodes_snapshot, _nodes_version),
+        }
+        self.subscribers: Set[Subscriber] = set()
+        self.running = False
+        self.task = None
+        self._wakeup = asyncio.Event()
+        self._dirty: Set[str] = set()  # topics notify() asked to refresh before the next tick
+        self._stats = {"broadcasts": 0, "messages": 0, "disconnects_slow": 0}
+
+    def _on_config_change(self, old, new):
+        self.notify()
+
+    async def start(self):
+        from app.services.config_store import config_store
+        config_store.subscribe(self._on_config_change)
+        self.running = True
+        self.task = asyncio.create_task(self._loop())
+        logger.info("Push Service started.")
+
+    async def stop(self):
+        self.running = False
+        for sub in list(self.subscribers):
+            sub.close()
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Push Service stopped.")
+
+    def notify(self, topic: str = None):
+        """
+        Wakes the publisher right away instead of waiting for the next tick.
+        With a topic only that one is refreshed early; without, every subscribed topic.
+        """
+        self._dirty.update([topic] if topic else self.topics)
+        self._wakeup.set()
+
+    def subscribe(self, topics: Iterable[str]) -> Subscriber:
+        sub = Subscriber(t for t in topics if t in self.topics)
+        self.subscribers.add(sub)
+        self._send_initial(sub, sub.topics)
+        return sub
+
+    def update_subscription(self, sub: Subscriber, add: Iterable[str] = (), remove: Iterable[str] = ()):
+        added = {t for t in add if t in self.topics} - sub.topics
+        sub.topics |= added
+        sub.topics -= set(remove)
+        self._send_initial(sub, added)
+
+    def unsubscribe(self, sub: Subscriber):
+        sub.close()
+        self.subscribers.discard(sub)
+
+    def record_slow_disconnect(self):
+        self._stats["disconnects_slow"] += 1
+
+    def _send_initial(self, sub: Subscriber, topics: Iterable[str]):
+        for name in topics:
+            topic = self.topics[name]
+            if topic.snapshot_msg is None:
+                topic.refresh()
+            if topic.snapshot_msg is not None:
+                sub.offer_snapshot(name, topic.snapshot_msg)
+
+    def publish(self, names: Iterable[str] = None):
+        """Refreshes the given (default: all) topics that have at least one subscriber and fans out the changes."""
+        active = set()
+        for sub in self.subscribers:
+            active |= sub.topics
+        if names is not None:
+            active &= set(names)
+        for name in active:
+            topic = self.topics[name]
+            try:
+                diff_msg = topic.refresh()
+            except Exception as e:
+                logger.error(f"Push topic '{name}' snapshot failed: {e}")
+                continue
+            if diff_msg is None:
+                continue
+            self._stats["broadcasts"] += 1
+            for sub in self.subscribers:
+                if name in sub.topics:
+                    sub.offer(name, diff_msg, topic.snapshot_msg)
+                    self._stats["messages"] += 1
+
+    async def _loop(self):
+        interval = settings.api.push_interval_ms / 1000
+        while self.running:
+            names = None  # interval tick: everything
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                names = self._dirty
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._dirty = set()
+            if not self.subscribers:
+                continue
+            try:
+                self.publish(names)
+            except Exception as e:
+                logger.error(f"Error in Push loop: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "subscribers": len(self.subscribers),
+            "coalesced": sum(s.coalesced for s in self.subscribers),
+            "topic_versions": {name: t.version for name, t in self.topics.items()},
+        }
+
+push_service = PushService()
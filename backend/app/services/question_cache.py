@@ -0,0 +1,69 @@
+import hashlib
+import json
+import random
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple
+from fastapi import Request, Response
+from app.services.content_service import content_service
+from app.services.http_cache import etag_response
+from app.simple_config import settings
+
+class CachedQuestionSet(NamedTuple):
+    body: bytes
+    etag: str
+
+class QuestionSetCache:
+    """
+    Bounded LRU of serialized per-user question sets (IT Match / Text Match).
+    The set for a user is deterministic (Random(user_id).sample over the bank), so it is
+    computed and serialized once per (game, user, count, content version). A content reload
+    bumps the version and empties the cache.
+    """
+    def __init__(self):
+        self._entries: "OrderedDict[Tuple, CachedQuestionSet]" = OrderedDict()
+        self._content_version = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "not_modified": 0}
+
+    def get(self, game_type: str, user_id: int, count: int, limit: int) -> CachedQuestionSet:
+        if self._content_version != content_service.version:
+            self._entries.clear()
+            self._content_version = content_service.version
+
+        key = (game_type, user_id, count, limit, self._content_version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+        self._stats["misses"] += 1
+        entry = self._build(game_type, user_id, count, limit)
+        self._entries[key] = entry
+        while len(self._entries) > settings.game.question_cache_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+        return entry
+
+    def _build(self, game_type: str, user_id: int, count: int, limit: int) -> CachedQuestionSet:
+        mapped = content_service.get_payloads(game_type, limit=limit)
+        sample = []
+        if mapped:
+            sample_size = min(count, len(mapped))
+            rng = random.Random(user_id)
+            sample = rng.sample(mapped, sample_size)
+        # Same encoding FastAPI's JSONResponse uses
+        body = json.dumps([m.model_dump() for m in sample], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        return CachedQuestionSet(body, etag)
+
+    def respond(self, request: Request, entry: CachedQuestionSet) -> Response:
+        """200 with the cached body, or 304 when the client already has this ETag."""
+        response = etag_response(request, entry.body, entry.etag)
+        if response.status_code == 304:
+            self._stats["not_modified"] += 1
+        return response
+
+    def get_stats(self) -> Dict:
+        return {**self._stats, "entries": len(self._entries), "content_version": self._content_version}
+
+question_cache = QuestionSetCache()
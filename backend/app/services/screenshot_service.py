@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Set, Tuple
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import FileResponse
+from sqlalchemy import true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select
+from app.database import DB_DIR
+from app.models import Screenshot
+from app.simple_config import settings
+
+logger = logging.getLogger(__name__)
+
+# Registration screenshots are stored content-addressed next to the database:
+#   db/screenshots/<sha[:2]>/<sha>.<ext>         original upload
+#   db/screenshots/<sha[:2]>/<sha>.thumb.webp    thumbnail (when Pillow is available)
+# The Screenshot table only holds metadata, so user queries never load image bytes.
+SCREENSHOT_DIR = DB_DIR / "screenshots"
+THUMBNAIL_SUFFIX = ".thumb.webp"
+
+# Magic bytes -> (extension, content type); the upload's file name is not trusted
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (b"\xff\xd8\xff", "jpg", "image/jpeg"),
+    (b"GIF87a", "gif", "image/gif"),
+    (b"GIF89a", "gif", "image/gif"),
+]
+
+class StoredFile(NamedTuple):
+    sha256: str
+    ext: str
+    content_type: str
+    size: int
+    width: Optional[int]
+    height: Optional[int]
+
+def sniff_image_type(data: bytes) -> Tuple[str, str]:
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    for signature, ext, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return ext, content_type
+    return "bin", "application/octet-stream"
+
+def screenshot_path(sha256: str, ext: str) -> Path:
+    return SCREENSHOT_DIR / sha256[:2] / f"{sha256}.{ext}"
+
+def thumbnail_path(sha256: str) -> Path:
+    return SCREENSHOT_DIR / sha256[:2] / f"{sha256}{THUMBNAIL_SUFFIX}"
+
+def _write_atomic(target: Path, data: bytes):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+def _make_thumbnail(data: bytes, target: Path) -> Tuple[Optional[int], Optional[int]]:
+    """Writes the thumbnail, returns the source dimensions. Without Pillow: no thumbnail, (None, None)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            size = img.size
+            if not target.exists():
+                img.thumbnail((settings.screenshots.thumbnail_px,) * 2)
+                if img.mode not in ("RGB", "RGBA"):
+                    img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+                out = io.BytesIO()
+                img.save(out, "WEBP", quality=75)
+                _write_atomic(target, out.getvalue())
+            return size
+    except Exception as e:
+        logger.warning(f"Could not thumbnail screenshot {target.name}: {e}")
+        return None, None
+
+def store_file(data: bytes) -> StoredFile:
+    """
+    Blocking: hashes, writes and thumbnails one screenshot. Identical uploads share one file.
+    Run it via asyncio.to_thread (the schema migration calls it directly).
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    ext, content_type = sniff_image_type(data)
+    path = screenshot_path(sha256, ext)
+    if not path.exists():
+        _write_atomic(path, data)
+    width, height = _make_thumbnail(data, thumbnail_path(sha256))
+    return StoredFile(sha256, ext, content_type, len(data), width, height)
+
+def delete_files(sha256: str):
+    for path in SCREENSHOT_DIR.glob(f"{sha256[:2]}/{sha256}.*"):
+        path.unlink(missing_ok=True)
+
+class ScreenshotService:
+    async def read_upload(self, upload: UploadFile) -> bytes:
+        """Reads the upload, 413 when it exceeds screenshots.max_bytes. Call it before creating anything."""
+        limit = settings.screenshots.max_bytes
+        raw = await upload.read(limit + 1)
+        if len(raw) > limit:
+            raise HTTPException(status_code=413, detail="Screenshot too large")
+        return raw
+
+    async def save(self, session: AsyncSession, user_id: int, raw: bytes, name: Optional[str]) -> Screenshot:
+        stored = await asyncio.to_thread(store_file, raw)
+        # One screenshot per user: a new upload (re-registration) replaces the old one
+        orphans = await self.delete(session, [user_id])
+        shot = Screenshot(
+            user_id=user_id, sha256=stored.sha256, ext=stored.ext, name=name,
+            content_type=stored.content_type, size=stored.size, width=stored.width, height=stored.height,
+        )
+        session.add(shot)
+        await session.commit()
+        await self.remove_files(orphans - {stored.sha256})
+        return shot
+
+    async def get(self, session: AsyncSession, user_id: int) -> Optional[Screenshot]:
+        return (await session.execute(select(Screenshot).where(Screenshot.user_id == user_id))).scalar_one_or_none()
+
+    def file_response(self, shot: Screenshot, thumbnail: bool = False) -> FileResponse:
+        """Streams the file (Range requests supported). Falls back to the original when there is no thumbnail."""
+        path = screenshot_path(shot.sha256, shot.ext)
+        media_type = shot.content_type
+        if thumbnail and thumbnail_path(shot.sha256).exists():
+            path, media_type = thumbnail_path(shot.sha256), "image/webp"
+        if not path.exists():
+            raise HTTPException(status_code=404, detail="Screenshot file missing")
+        response = FileResponse(path, media_type=media_type, filename=shot.name if not thumbnail else None,
+                                content_disposition_type="inline")
+        response.headers["etag"] = f'"{shot.sha256[:20]}{"t" if thumbnail else ""}"'
+        response.headers["cache-control"] = "private, no-cache"
+        return response
+
+    async def delete(self, session: AsyncSession, user_ids: Optional[Iterable[int]] = None) -> Set[str]:
+        """
+        Deletes the screenshot rows of the given users (all when None) in the caller's
+        transaction. Returns the hashes no row references any more; pass them to
+        remove_files() after the commit.
+        """
+        condition = Screenshot.user_id.in_(list(user_ids)) if user_ids is not None else true()
+        hashes = set((await session.execute(select(Screenshot.sha256).where(condition))).scalars().all())
+        if not hashes:
+            return set()
+        await session.execute(delete(Screenshot).where(condition))
+        still_used = set((await session.execute(
+            select(Screenshot.sha256).where(Screenshot.sha256.in_(hashes))
+        )).scalars().all())
+        return hashes - still_used
+
+    async def remove_files(self, hashes: Iterable[str]):
+        for sha256 in hashes:
+            await asyncio.to_thread(delete_files, sha256)
+
+screenshot_service = ScreenshotService()
@@ -1,100 +1,202 @@
 import asyncio
 import logging
+import time
 import aiohttp
-from sqlalchemy.future import select
-from app.database import get_session
+from contextlib import asynccontextmanager
 from app.models import GameScore, GameLog
 from app.simple_config import settings
+from app.services.upload_pipeline import UploadPipeline
 
 logger = logging.getLogger(__name__)
 
+def _serialize_score(s: GameScore) -> dict:
+    return {
+        "user_id": s.user_id,
+        "game_type": s.game_type,
+        "score": s.score,
+        "duration_ms": s.duration_ms,
+        "played_at": s.played_at.isoformat()
+    }
+
+def _serialize_log(l: GameLog) -> dict:
+    return {
+        "event_type": l.event_type,
+        "details": l.details,
+        "timestamp": l.timestamp.isoformat()
+    }
+
 class SyncService:
     def __init__(self):
         self.running = False
         self.task = None
+        self._upload_task = None
+        self._command_task = None
+        self._solenoid_edges = False  # box sensor wakes the hardware loop (edge mode only)
+        self.score_pipeline = UploadPipeline("scores", GameScore, _serialize_score)
+        self.log_pipeline = UploadPipeline("logs", GameLog, _serialize_log,
+                                           endpoint=lambda: settings.api.log_sync_endpoint)
+        # Long-poll command channel (falls back to 0.5s sync polling if the server lacks it)
+        self._command_channel = settings.api.agent_long_poll
+        self._client: aiohttp.ClientSession = None
+        self._http_stats = {
+            "requests": 0,
+            "errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "last_latency_ms": 0.0,
+            "avg_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+        }
 
     async def start(self):
+        self._client = self._build_client()
         self.running = True
         self.task = asyncio.create_task(self._loop())
+        self._upload_task = asyncio.create_task(self._upload_loop())
+
+        from app.hardware.gpio_manager import IS_RPI
+        if IS_RPI:
+            from app.hardware.patch_panel import patch_panel
+            from app.hardware.solenoid import solenoid
+            if patch_panel.start_edge_detection(asyncio.get_running_loop()):
+                # The hardware loop now sleeps until an edge: solenoid changes must wake it too
+                self._solenoid_edges = solenoid.watch_changes(patch_panel.wake)
+        if IS_RPI and self._command_channel:
+            self._command_task = asyncio.create_task(self._command_loop())
         logger.info("Sync Service started.")
 
     async def stop(self):
         self.running = False
-        if self.task:
-            self.task.cancel()
-            try:
-                await self.task
-            except asyncio.CancelledError:
-                pass
+        for task in (self.task, self._upload_task, self._command_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        from app.hardware.patch_panel import patch_panel
+        from app.hardware.solenoid import solenoid
+        if patch_panel.edge_mode:
+            patch_panel.stop_edge_detection()
+            solenoid.stop_watching()
+            self._solenoid_edges = False
+        if self._client:
+            await self._client.close()
+            self._client = None
         logger.info("Sync Service stopped.")
 
+    # --- HTTP client ---
+
+    def _build_client(self) -> aiohttp.ClientSession:
+        """One long-lived pooled session: keeps TCP connections to the server alive between syncs."""
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+
+        connector = aiohttp.TCPConnector(
+            limit=settings.api.http_pool_limit,
+            limit_per_host=settings.api.http_pool_limit_per_host,
+            keepalive_timeout=settings.api.http_keepalive_seconds,
+            use_dns_cache=True,
+            ttl_dns_cache=settings.api.http_dns_cache_seconds,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.api.http_request_timeout_seconds,
+            connect=settings.api.http_connect_timeout_seconds,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[trace])
+
+    async def _on_connection_created(self, session, ctx, params):
+        self._http_stats["connections_created"] += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self._http_stats["connections_reused"] += 1
+
+    @asynccontextmanager
+    async def _post(self, url: str, **kwargs):
+        """POST through the shared session, recording request latency."""
+        async with self._request("POST", url, **kwargs) as response:
+            yield response
+
+    @asynccontextmanager
+    async def _request(self, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        failed = False
+        try:
+            async with self._client.request(method, url, **kwargs) as response:
+                yield response
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            stats = self._http_stats
+            stats["requests"] += 1
+            if failed:
+                stats["errors"] += 1
+            stats["last_latency_ms"] = round(elapsed, 2)
+            stats["max_latency_ms"] = max(stats["max_latency_ms"], round(elapsed, 2))
+            # Exponential moving average, smooths out the 100ms hardware loop
+            stats["avg_latency_ms"] = round(elapsed if stats["requests"] == 1 else stats["avg_latency_ms"] * 0.9 + elapsed * 0.1, 2)
+
+    def get_stats(self) -> dict:
+        stats = dict(self._http_stats)
+        total = stats["connections_created"] + stats["connections_reused"]
+        stats["connection_reuse_ratio"] = round(stats["connections_reused"] / total, 3) if total else 0.0
+        return stats
+
+    def get_upload_stats(self) -> dict:
+        return {
+            "scores": self.score_pipeline.get_stats(),
+            "logs": self.log_pipeline.get_stats(),
+        }
+
     async def _loop(self):
-        import time
-        last_score_sync = 0
+        from app.hardware.patch_panel import patch_panel
         while self.running:
             try:
-                # Hardware Sync (High Frequency if possible, or just same loop)
+                # Hardware Sync (High Frequency if possible; score uploads run in _upload_loop)
                 await self._sync_hardware()
-                
-                now = time.time()
-                if now - last_score_sync > settings.api.sync_interval_seconds:
-                    await self._sync_scores()
-                    last_score_sync = now
             except Exception as e:
                 logger.error(f"Error in Sync loop: {e}")
             
-            # Very fast hardware polling for responsive Patch Master UI
-            await asyncio.sleep(0.1)
+            if patch_panel.edge_mode:
+                # Interrupt-driven: sleep until a cable or the solenoid changes (ms latency), wake
+                # periodically for keepalive/commands and re-read the pins in case an edge was missed
+                if not await patch_panel.wait_for_change(timeout=self._edge_wait_timeout()):
+                    patch_panel.resync()
+            else:
+                # Very fast hardware polling for responsive Patch Master UI (mock GPIO fallback)
+                await asyncio.sleep(0.1)
+
+    def _edge_wait_timeout(self) -> float:
+        """Longest edge-mode sleep that still keeps the solenoid and command latency of polling."""
+        if not self._solenoid_edges:
+            return 0.1  # box sensor is still polled, at the polling loop's rate
+        # Without the long-poll channel commands arrive with the 0.5s hardware sync (_sync_hardware)
+        return 1.0 if self._command_task else 0.5
 
-    async def _sync_scores(self):
-        async for session in get_session(): # Context manager usage from generator
+    async def _upload_loop(self):
+        """Drains the score and log backlogs continuously, otherwise checks every sync_interval_seconds."""
+        while self.running:
+            delay = settings.api.sync_interval_seconds
             try:
-                # Select unsynced scores
-                result = await session.execute(select(GameScore).where(GameScore.synced == False).limit(50))
-                unsynced = result.scalars().all()
-
-                if not unsynced:
-                    return
-
-                logger.info(f"Found {len(unsynced)} unsynced scores. Attempting upload...")
-                
-                payload = [
-                    {
-                        "user_id": s.user_id,
-                        "game_type": s.game_type,
-                        "score": s.score,
-                        "duration_ms": s.duration_ms,
-                        "played_at": s.played_at.isoformat()
-                    }
-                    for s in unsynced
-                ]
-
-                async with aiohttp.ClientSession() as client:
-                    try:
-                        async with client.post(
-                            settings.api.sync_endpoint, 
-                            json=payload, 
-                            timeout=10
-                        ) as response:
-                            if response.status == 200 or response.status == 201:
-                                # Mark as synced
-                                for s in unsynced:
-                                    s.synced = True
-                                await session.commit()
-                                logger.info(f"Successfully synced {len(unsynced)} scores.")
-                            else:
-                                logger.warning(f"Sync API returned {response.status}: {await response.text()}")
-                    except aiohttp.ClientConnectorError:
-                        logger.debug("Sync failed: Network unreachable (Offline mode).")
-                    except Exception as e:
-                        logger.error(f"Sync request failed: {e}")
+                # Scores first: they matter more than the event journal
+                delay = min(await self._sync_pipeline(self.score_pipeline),
+                            await self._sync_pipeline(self.log_pipeline))
             except Exception as e:
-                logger.error(f"Database error in SyncService: {e}")
-            # get_session handles closing via try-finally in generator if used correctly, 
-            # but with `async for` it yields once.
-            break # Ensure we only use one session per loop iteration
+                logger.error(f"Error in Upload loop: {e}")
+            await asyncio.sleep(delay)
 
-            pass
+    async def _sync_pipeline(self, pipeline: UploadPipeline) -> float:
+        """Uploads one batch. Returns how long to wait before the next attempt."""
+        if self._client is None:
+            return settings.api.sync_interval_seconds
+        if await pipeline.run_once(self._post):
+            return 0  # backlog left - keep draining
+        if pipeline.failures:
+            return pipeline.backoff_remaining()
+        return settings.api.sync_interval_seconds
 
     async def _sync_hardware(self):
         """
@@ -102,50 +204,57 @@ class SyncService:
         Receives commands from Server and executes them.
         """
         from app.hardware.gpio_manager import IS_RPI
-        from app.hardware.patch_panel import patch_panel
+        from app.hardware.patch_panel import patch_panel, PIN_MAP
         from app.hardware.solenoid import solenoid
         import time
 
         if not IS_RPI:
             return
 
-        # 1. Read Local State
-        pp_state = patch_panel.get_state()
+        # 1. Read Local State (compact bitmask snapshot)
+        pp_state = patch_panel.snapshot()
+        sol_state = solenoid.get_state()
         
         # Log state changes for better observability
-        state_changed = False
-        if not hasattr(self, '_last_pp_state'):
-            self._last_pp_state = pp_state
+        state_changed = sol_state != getattr(self, '_last_sol_state', None)
+        self._last_sol_state = dict(sol_state)
+        last_pp_state = getattr(self, '_last_pp_state', None)
+        if last_pp_state is None:
             state_changed = True
         else:
-            for i, current in enumerate(pp_state):
-                last = self._last_pp_state[i]
-                if current['connected'] != last['connected']:
-                    state_changed = True
-                    status_text = "PODŁĄCZONY" if current['connected'] else "ODŁĄCZONY"
-                    logger.info(f"PATCH PANEL: Kabel na porcie {current['label']} (Pin {current['gpio']}) został {status_text}!")
-                    
-                    # LED Interactions (Removed hardware-level effects, letting API handle it)
-                    is_now_solved = patch_panel.is_solved()
-                    was_solved = all(p['connected'] for p in self._last_pp_state)
-
-                    if is_now_solved:
-                        # let frontend decide what to do
-                        logger.info("🟢 PANEL ROZWIĄZANY 🟢")
-                    elif was_solved and not is_now_solved:
-                        # let frontend decide what to do
-                        logger.info("🔴 PANEL PRZERWANY 🔴")
-                    elif current['connected']:  # Just a single connection, not yet solved
-                        logger.info("✨ IMPULS (WYKRYTO KABEL) ✨")
-                        
-            self._last_pp_state = pp_state
+            changed_bits = pp_state.changed_bits(last_pp_state)
+            if changed_bits:
+                state_changed = True
+                mask = pp_state.mask
+                for i, (label, gpio) in enumerate(PIN_MAP):
+                    if not changed_bits >> i & 1:
+                        continue
+                    status_text = "PODŁĄCZONY" if mask >> i & 1 else "ODŁĄCZONY"
+                    logger.info(f"PATCH PANEL: Kabel na porcie {label} (Pin {gpio}) został {status_text}!")
+
+                # LED Interactions (Removed hardware-level effects, letting API handle it)
+                is_now_solved = pp_state.is_solved()
+                was_solved = last_pp_state.is_solved()
+
+                if is_now_solved:
+                    # let frontend decide what to do
+                    logger.info("🟢 PANEL ROZWIĄZANY 🟢")
+                elif was_solved and not is_now_solved:
+                    # let frontend decide what to do
+                    logger.info("🔴 PANEL PRZERWANY 🔴")
+                elif changed_bits & mask:  # Just a new connection, not yet solved
+                    logger.info("✨ IMPULS (WYKRYTO KABEL) ✨")
+        self._last_pp_state = pp_state
         
-        # Only sync with server if state changed, or every 0.5s to get commands (solenoid, led)
+        # Only sync with server if state changed, otherwise a keepalive.
+        # With the long-poll channel commands no longer depend on this, so the keepalive is slow;
+        # without it we still sync every 0.5s to get commands (solenoid, led)
         now = time.time()
         if not hasattr(self, '_last_sync_time'):
             self._last_sync_time = 0
-            
-        if not state_changed and (now - self._last_sync_time) < 0.5:
+
+        interval = settings.api.agent_heartbeat_seconds if self._command_task else 0.5
+        if not state_changed and (now - self._last_sync_time) < interval:
             return
             
         self._last_sync_time = now
@@ -155,36 +264,78 @@ class SyncService:
             "node_id": settings.node_id,
             "is_rpi": True,
             "timestamp": time.time(),
-            "patch_panel": pp_state,
-            "solenoid_state": solenoid.get_state()
+            "solenoid_state": sol_state
         }
+        if settings.api.agent_compact_state:
+            payload["patch_panel_mask"] = pp_state.mask
+        else:
+            payload["patch_panel"] = pp_state.to_dicts()
         
         # 3. Send to Agent Sync Endpoint
-        base_url = settings.api.sync_endpoint.replace("/logs", "")
-        url = f"{base_url}/agent/sync"
+        url = f"{self._agent_base_url()}/agent/sync"
         
+        if self._client is None:
+            return
+
         try:
-            async with aiohttp.ClientSession() as client:
-                async with client.post(url, json=payload, timeout=5) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        
-                        # 4. Handle Commands
-                        if data.get("trigger_solenoid"):
-                            logger.info("⚡ OTRZYMANO KOMENDĘ Z SERWERA: Otwieranie Solenoidu (Zamka)... ⚡")
-                            asyncio.create_task(solenoid.open_box())
-                            
-                        led_cmd = data.get("led_command")
-                        if led_cmd:
-                            logger.info(f"✨ OTRZYMANO KOMENDĘ LED: {led_cmd} ✨")
-                            from app.hardware.led_manager import led_manager
-                            led_manager.play_effect(led_cmd)
-                            
-                    else:
-                        logger.warning(f"Agent Sync failed: {resp.status} - {await resp.text()}")
+            async with self._post(url, json=payload, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                if resp.status == 200:
+                    # 4. Handle Commands
+                    self._handle_agent_commands(await resp.json())
+                else:
+                    logger.warning(f"Agent Sync failed: {resp.status} - {await resp.text()}")
         except Exception as e:
             # logger.error(f"Agent Sync Connection Error: {e}")
             pass
 
+    def _agent_base_url(self) -> str:
+        return settings.api.sync_endpoint.replace("/logs", "")
+
+    def _handle_agent_commands(self, data: dict):
+        from app.hardware.solenoid import solenoid
+
+        if data.get("trigger_solenoid"):
+            logger.info("⚡ OTRZYMANO KOMENDĘ Z SERWERA: Otwieranie Solenoidu (Zamka)... ⚡")
+            asyncio.create_task(solenoid.open_box())
+            
+        led_cmd = data.get("led_command")
+        if led_cmd:
+            logger.info(f"✨ OTRZYMANO KOMENDĘ LED: {led_cmd} ✨")
+            from app.hardware.led_manager import led_manager
+            led_manager.play_effect(led_cmd)
+
+    async def _command_loop(self):
+        """
+        Holds a long-poll open on the server's /agent/commands, so solenoid and LED
+        commands are executed the moment they are queued. Also serves as node heartbeat.
+        """
+        url = f"{self._agent_base_url()}/agent/commands"
+        poll_timeout = settings.api.agent_poll_timeout_seconds
+        params = {"node_id": settings.node_id, "is_rpi": "true", "timeout": str(poll_timeout)}
+        # Allow the server to hold the request for the whole poll window
+        timeout = aiohttp.ClientTimeout(total=poll_timeout + settings.api.http_request_timeout_seconds,
+                                        connect=settings.api.http_connect_timeout_seconds)
+        retry_delay = 1
+        while self.running:
+            try:
+                async with self._request("GET", url, params=params, timeout=timeout) as resp:
+                    if resp.status == 404:
+                        logger.warning("Server has no /agent/commands endpoint. Falling back to sync polling.")
+                        self._command_channel = False
+                        self._command_task = None
+                        return
+                    if resp.status == 200:
+                        self._handle_agent_commands(await resp.json())
+                        retry_delay = 1
+                        continue
+                    logger.warning(f"Agent command poll failed: {resp.status}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Agent command poll error: {e}")
+            # Server unreachable: back off up to retry_interval_seconds
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, settings.api.retry_interval_seconds)
+
 
 sync_service = SyncService()
@@ -0,0 +1,148 @@
+import gzip
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+from app.database import async_session_factory
+from app.simple_config import settings
+
+logger = logging.getLogger(__name__)
+
+# Receiver already has these rows (idempotency key seen before) -> treat as delivered
+DUPLICATE_STATUSES = {409}
+# Payload too large -> only shrink the batch, no backoff
+TOO_LARGE_STATUSES = {413}
+
+class UploadPipeline:
+    """
+    Drains unsynced rows of one table (model with `id` and `synced` columns) to the central server.
+
+    - adaptive batch size: doubles after a successful upload, halves after a failure
+    - continuous draining: run_once() reports whether a backlog is left so the caller loops right away
+    - exponential backoff with jitter while the server is unreachable
+    - optional gzip payloads (api.upload_gzip, off by default: the receiver must decode them)
+    - per-row idempotency keys ("<node_id>:<name>:<row id>"), so a retry after a timeout
+      that the server already committed can be deduplicated on the receiving side
+    """
+    def __init__(self, name: str, model, serialize: Callable[[Any], Dict[str, Any]], endpoint: Callable[[], str] = None):
+        self.name = name
+        # Resolved per upload so config changes apply without a restart
+        self.endpoint = endpoint or (lambda: settings.api.sync_endpoint)
+        self.model = model
+        self.serialize = serialize
+        self.batch_size = settings.api.upload_batch_size
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self.backlog = 0
+        self.uploaded_total = 0
+        self.last_error: Optional[str] = None
+        self._recent = deque()  # (timestamp, rows) of successful uploads, for the drain rate
+
+    def idempotency_key(self, row) -> str:
+        return f"{settings.node_id}:{self.name}:{row.id}"
+
+    def backoff_remaining(self) -> float:
+        return max(0.0, self.next_attempt_at - time.time())
+
+    async def run_once(self, post) -> bool:
+        """
+        Uploads one batch. `post` is SyncService._post (shared keep-alive session).
+        Returns True when more unsynced rows are waiting and the caller should continue immediately.
+        """
+        if self.backoff_remaining() > 0:
+            return False
+
+        # Read the batch and close the session before the POST: an open read transaction
+        # would pin the WAL (no checkpoint) for as long as the request takes
+        model = self.model
+        async with async_session_factory() as session:
+            self.backlog = (await session.execute(
+                select(func.count()).select_from(model).where(model.synced == False)
+            )).scalar_one()
+            if not self.backlog:
+                return False
+
+            rows = (await session.execute(
+                select(model).where(model.synced == False).order_by(model.id).limit(self.batch_size)
+            )).scalars().all()
+            payload = [{**self.serialize(r), "idempotency_key": self.idempotency_key(r)} for r in rows]
+            body, headers = self._encode(payload, rows)
+        ids = [r.id for r in rows]
+        logger.info(f"Uploading {len(rows)}/{self.backlog} unsynced {self.name}...")
+
+        try:
+            async with post(self.endpoint(), data=body, headers=headers) as response:
+                status = response.status
+                if 200 <= status < 300 or status in DUPLICATE_STATUSES:
+                    async with async_session_factory() as session:
+                        await session.execute(update(model).where(model.id.in_(ids)).values(synced=True))
+                        await session.commit()
+                    self._on_success(len(rows))
+                    logger.info(f"Successfully synced {len(rows)} {self.name}.")
+                    return self.backlog > 0
+                text = await response.text()
+                if status in TOO_LARGE_STATUSES:
+                    self._shrink()
+                    self.last_error = f"HTTP {status}"
+                    return self.batch_size < len(rows)
+                self._on_failure(f"HTTP {status}: {text[:200]}")
+                logger.warning(f"Sync API returned {status} for {self.name}: {text[:200]}")
+        except Exception as e:
+            self._on_failure(str(e) or type(e).__name__)
+            logger.debug(f"Sync of {self.name} failed (offline?): {e}")
+        return False
+
+    def _encode(self, payload: List[Dict[str, Any]], rows) -> tuple:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Idempotency-Key": f"{settings.node_id}:{self.name}:{rows[0].id}-{rows[-1].id}",
+        }
+        if settings.api.upload_gzip:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    def _on_success(self, count: int):
+        now = time.time()
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self.last_error = None
+        self.uploaded_total += count
+        self.backlog = max(0, self.backlog - count)
+        self.batch_size = min(settings.api.upload_batch_max, self.batch_size * 2)
+        self._recent.append((now, count))
+
+    def _on_failure(self, error: str):
+        self.failures += 1
+        self.last_error = error
+        self._shrink()
+        # Exponential backoff with "equal jitter": half fixed, half random
+        delay = min(settings.api.upload_backoff_max_seconds,
+                    settings.api.upload_backoff_base_seconds * (2 ** (self.failures - 1)))
+        self.next_attempt_at = time.time() + delay / 2 + random.uniform(0, delay / 2)
+
+    def _shrink(self):
+        self.batch_size = max(settings.api.upload_batch_min, self.batch_size // 2)
+
+    def drain_rate(self, window: float = 60.0) -> float:
+        """Rows uploaded per second over the last `window` seconds."""
+        cutoff = time.time() - window
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+        return round(sum(n for _, n in self._recent) / window, 2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backlog": self.backlog,
+            "drain_rate_per_s": self.drain_rate(),
+            "uploaded_total": self.uploaded_total,
+            "batch_size": self.batch_size,
+            "consecutive_failures": self.failures,
+            "retry_in_s": round(self.backoff_remaining(), 1),
+            "last_error": self.last_error,
+        }
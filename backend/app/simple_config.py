@@ -18,18 +18,90 @@ DEFAULTS = {
         "sync_endpoint": "http://127.0.0.1:8000/api/v1/logs",
         "sync_interval_seconds": 60,
         "retry_interval_seconds": 10,
+        # Push channel (/api/v1/events)
+        "push_interval_ms": 200,
+        "push_send_timeout_seconds": 5,
+        "push_keepalive_seconds": 15,
+        # SyncService HTTP client (one pooled keep-alive session for all uploads)
+        "http_pool_limit": 10,
+        "http_pool_limit_per_host": 4,
+        "http_keepalive_seconds": 30,
+        "http_dns_cache_seconds": 300,
+        "http_connect_timeout_seconds": 3,
+        "http_request_timeout_seconds": 10,
+        # Agent command channel: long-poll /agent/commands, upload state on change + keepalive
+        "agent_long_poll": True,
+        "agent_poll_timeout_seconds": 10,  # must stay below the 15s node offline window
+        "agent_heartbeat_seconds": 5,
+        "agent_compact_state": True,  # send the patch panel as a bitmask instead of a list of pairs
+        # Upload pipeline (scores): adaptive batches, backoff with jitter while offline, optional gzip
+        "upload_batch_size": 50,
+        "upload_batch_min": 10,
+        "upload_batch_max": 500,
+        "upload_backoff_base_seconds": 2,
+        "upload_backoff_max_seconds": 300,
+        "upload_gzip": False,  # opt-in: only for sync receivers that decode Content-Encoding: gzip request bodies
+        # GameLog journal: buffered group commits, upload, retention
+        "log_sync_endpoint": "http://127.0.0.1:8000/api/v1/logs/events",
+        "log_flush_interval_ms": 500,
+        "log_flush_batch": 100,
+        "log_retention_hours": 72,
+        "log_max_rows": 50000,
+        "log_prune_interval_seconds": 600,
+    },
+    "database": {
+        # SQLite pragmas applied to every new connection
+        "journal_mode": "WAL",       # readers no longer block behind a writer
+        "synchronous": "NORMAL",     # safe with WAL, fsync only at checkpoints
+        "cache_size_kib": 16384,     # page cache per connection
+        "mmap_size_mb": 64,
+        "temp_store": "MEMORY",
+        "busy_timeout_ms": 5000,     # writers wait for the lock instead of failing with "database is locked"
+        # Connection pool (aiosqlite runs each connection in its own thread)
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout_seconds": 30,
+        "echo": False,
+    },
+    "screenshots": {
+        # Registration screenshots (content-addressed files in db/screenshots/)
+        "max_bytes": 2 * 1024 * 1024,
+        "thumbnail_px": 320,
     },
     "game": {
         "initial_points": 10000,
         "points_decay_ms": 0.1,
         "decay_rate_per_ms": 0.05,
         "binary_brain_trigger_threshold": 0.8,
+        # Content hot reload: content/*/questions.csv and image dirs are polled for changes
+        "content_watch": True,
+        "content_watch_interval_seconds": 2,
+        "question_cache_size": 2048,  # per-user IT Match / Text Match sets kept serialized (LRU)
+        # Image pipeline (backend/build_images.py): hashed variants at kiosk resolutions
+        "image_widths": [480, 960, 1440],
+        "image_formats": ["avif", "webp"],
+        "image_quality": {"avif": 50, "webp": 80},  # AVIF reaches WebP q80 quality at a much lower setting
     },
     "hardware": {
         "solenoid_pin": 26,
         "solenoid_sensor_pin": 12,
         "solenoid_open_time_sec": 1,
         "patch_panel_scan_interval_ms": 50,
+        "patch_panel_edge_detection": True,  # GPIO interrupts instead of polling (real RPi.GPIO only)
+        "patch_panel_debounce_ms": 20,
+        # LED strip frames (client): lookup table applied when effect frames are built
+        "led_brightness": 255,  # 0-255
+        "led_gamma": 1.0,       # 2.2-2.8 for perceptually even fades
+        "led_frame_rate": 100,  # render thread frame clock; effect frame times are rounded to it
+    },
+    "email": {
+        # Bulk sender (admin "send all"): reused SMTP connections, rate limit, retries
+        "pool_size": 3,                  # parallel SMTP connections per job
+        "rate_per_second": 5,            # across all connections of a job, 0 = unlimited
+        "max_attempts": 4,               # per recipient, transient failures only (4xx, disconnects)
+        "retry_backoff_seconds": 2,      # doubled after every failed attempt
+        "messages_per_connection": 100,  # reconnect after this many messages
+        "smtp_timeout_seconds": 30,
     },
     "auth": {
         "admin_user": "admin",
@@ -38,8 +110,14 @@ DEFAULTS = {
     },
     "security": {
         "profanity_list_url": "https://raw.githubusercontent.com/zacanger/profane-words/master/words.txt",
+        # Fetched in the background after startup, cached in db/cache/ for offline starts
+        "profanity_refresh_hours": 24,
+        "profanity_fetch_timeout_seconds": 10,
         "domain_blocklist": ["tempmail.com", "10minutemail.com"],
-        "jwt_secret": "CHANGE_ME_IN_PROD_SECRET_KEY"
+        "jwt_secret": "CHANGE_ME_IN_PROD_SECRET_KEY",
+        # Kiosk identity (X-User-ID) cache used by get_current_user
+        "identity_cache_ttl_seconds": 300,
+        "identity_cache_size": 4096,
     },
 }
 
@@ -91,6 +169,7 @@ class SimpleConfig:
 
         # api
         self._config["api"]["sync_endpoint"] = os.getenv("CHECKIT_SYNC_ENDPOINT", self._config["api"]["sync_endpoint"])
+        self._config["api"]["log_sync_endpoint"] = os.getenv("CHECKIT_LOG_SYNC_ENDPOINT", self._config["api"]["log_sync_endpoint"])
         self._config["api"]["sync_interval_seconds"] = int(
             os.getenv("CHECKIT_SYNC_INTERVAL_SECONDS", str(self._config["api"]["sync_interval_seconds"]))
         )
@@ -114,10 +193,16 @@ class SimpleConfig:
     @property
     def api(self): return type("APIConfig", (), self._config["api"])
     @property
+    def database(self): return type("DatabaseConfig", (), self._config["database"])
+    @property
+    def screenshots(self): return type("ScreenshotsConfig", (), self._config["screenshots"])
+    @property
     def game(self): return type("GameConfig", (), self._config["game"])
     @property
     def hardware(self): return type("HardwareConfig", (), self._config["hardware"])
     @property
+    def email(self): return type("EmailConfig", (), self._config["email"])
+    @property
     def auth(self): return type("AuthConfig", (), self._config["auth"])
     @property
     def security(self): return type("SecurityConfig", (), self._config["security"])
@@ -0,0 +1,51 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class StartupProfiler:
+    """
+    Wall-clock cost of a cold start: importing main (app, routers, services) and each
+    lifespan phase up to the point the app serves requests. Shown in the admin system
+    status; profile_startup.py adds the per-module import breakdown and the budget check.
+    """
+    def __init__(self):
+        self.imports_ms: Optional[float] = None
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_ms: Optional[float] = None
+        self._lifespan_started = 0.0
+
+    def imports_done(self, started: float):
+        self.imports_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def lifespan_started(self):
+        self.phases = []
+        self.ready_ms = None
+        self._lifespan_started = time.perf_counter()
+
+    def lifespan_ready(self):
+        self.ready_ms = round((time.perf_counter() - self._lifespan_started) * 1000, 1)
+        logger.info(f"Startup: imports {self.imports_ms} ms, lifespan {self.ready_ms} ms.")
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "ms": round((time.perf_counter() - started) * 1000, 1)})
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = None
+        if self.imports_ms is not None and self.ready_ms is not None:
+            total = round(self.imports_ms + self.ready_ms, 1)
+        return {
+            "imports_ms": self.imports_ms,
+            "lifespan_ms": self.ready_ms,
+            "total_ms": total,
+            "phases": self.phases,
+        }
+
+startup_profiler = StartupProfiler()
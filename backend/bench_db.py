@@ -0,0 +1,119 @@
+"""
+Concurrent read/write throughput of the SQLite layer, default engine vs tuned engine.
+
+Simulates many kiosks at once: writer tasks commit one score per transaction
+while reader tasks run the leaderboard/admin style queries.
+
+Usage (from backend/):
+    python bench_db.py [--writers 20] [--readers 20] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, select, desc
+from app.database import build_engine
+from app.models import User, GameScore
+
+GAME_TYPES = ["binary_brain", "patch_master", "it_match", "text_match"]
+
+async def _prepare(engine, users: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(
+            User.__table__.insert(),
+            [{"nick": f"bench{i}", "email": f"bench{i}@example.com", "is_blocked": False, "agree_newsletter": False}
+             for i in range(users)],
+        )
+
+async def _run(engine, make_session, writers: int, readers: int, seconds: float, users: int) -> dict:
+    stop_at = time.perf_counter() + seconds
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    latencies = {"writes": [], "reads": []}
+    next_user = iter(range(users * len(GAME_TYPES)))
+
+    async def writer():
+        while time.perf_counter() < stop_at:
+            n = next(next_user, None)
+            if n is None:
+                return
+            started = time.perf_counter()
+            try:
+                async with make_session() as session:
+                    session.add(GameScore(user_id=n // len(GAME_TYPES) + 1, game_type=GAME_TYPES[n % len(GAME_TYPES)],
+                                          score=random.randint(0, 10000), duration_ms=random.randint(1000, 60000)))
+                    await session.commit()
+                counts["writes"] += 1
+                latencies["writes"].append(time.perf_counter() - started)
+            except Exception:
+                counts["errors"] += 1
+
+    async def reader():
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                async with make_session() as session:
+                    stmt = (select(GameScore.score, User.nick).join(User)
+                            .where(GameScore.game_type == random.choice(GAME_TYPES))
+                            .order_by(desc(GameScore.score)).limit(10))
+                    (await session.execute(stmt)).all()
+                counts["reads"] += 1
+                latencies["reads"].append(time.perf_counter() - started)
+            except Exception:
+                counts["errors"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)), *(reader() for _ in range(readers)))
+    elapsed = time.perf_counter() - started
+
+    def p95(values):
+        return round(sorted(values)[int(len(values) * 0.95)] * 1000, 1) if values else 0.0
+
+    return {
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "write_p95_ms": p95(latencies["writes"]),
+        "read_p95_ms": p95(latencies["reads"]),
+        "errors": counts["errors"],
+    }
+
+async def _bench(label: str, tuned: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        if tuned:
+            engine = build_engine(url)
+            factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            make_session = factory
+        else:
+            # What database.py did before: default engine, a new sessionmaker for every session
+            engine = create_async_engine(url)
+            make_session = lambda: sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+        await _prepare(engine, args.users)
+        async with engine.connect() as conn:
+            mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        result = await _run(engine, make_session, args.writers, args.readers, args.seconds, args.users)
+        await engine.dispose()
+    print(f"{label:<8} journal={mode:<8} " + "  ".join(f"{k}={v}" for k, v in result.items()))
+    return result
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+
+    before = await _bench("default", False, args)
+    after = await _bench("tuned", True, args)
+    for key in ("writes_per_s", "reads_per_s"):
+        if before[key]:
+            print(f"{key}: x{after[key] / before[key]:.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Per-nick cost of the profanity check against the size of the word list: the old loop of
+substring scans vs the Aho-Corasick matcher (which also normalizes the nick first).
+
+Word lists are synthetic (random lowercase words of 3-10 letters) so the run is offline
+and repeatable; --words-file benchmarks a real list instead (one word per line).
+
+Usage (from backend/):
+    python bench_profanity.py [--sizes 100 1000 5000 20000] [--nicks 2000] [--words-file words.txt]
+"""
+import argparse
+import random
+import string
+import time
+from pathlib import Path
+from app.services.profanity import ProfanityMatcher
+
+def naive_is_profane(words, text: str) -> bool:
+    text_lower = text.lower()
+    for word in words:
+        if word in text_lower:
+            return True
+    return False
+
+def random_word(rng: random.Random, lo: int = 3, hi: int = 10) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(lo, hi)))
+
+def per_call_us(fn, nicks) -> float:
+    started = time.perf_counter()
+    for nick in nicks:
+        fn(nick)
+    return (time.perf_counter() - started) / len(nicks) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--nicks", type=int, default=2000)
+    parser.add_argument("--words-file", type=Path)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Nick-like input: max 15 chars, letters with the odd digit (mostly clean, like real traffic)
+    nicks = [random_word(rng, 4, 12) + rng.choice(["", "", str(rng.randint(0, 99))]) for _ in range(args.nicks)]
+
+    if args.words_file:
+        lists = {"file": [w.strip().lower() for w in args.words_file.read_text(encoding="utf-8").splitlines() if w.strip()]}
+    else:
+        lists = {size: [random_word(rng) for _ in range(size)] for size in args.sizes}
+
+    print(f"{'words':>8} {'build ms':>9} {'naive us/nick':>14} {'matcher us/nick':>16} {'speedup':>8}")
+    for label, words in lists.items():
+        word_set = set(words)
+        started = time.perf_counter()
+        matcher = ProfanityMatcher(word_set)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        naive = per_call_us(lambda n: naive_is_profane(word_set, n), nicks)
+        compiled = per_call_us(matcher.find, nicks)
+        size = len(word_set) if label == "file" else label
+        print(f"{size:>8} {build_ms:>9.1f} {naive:>14.1f} {compiled:>16.1f} {naive / compiled:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Builds the optimized question images and their manifest.
+
+For every content/<game>/images/* it renders resized WebP/AVIF variants at the kiosk widths
+into content/_optimized/<game>/<stem>.<width>.<hash>.<format> using a process pool, then
+writes content/_optimized/manifest.json. A running backend picks the manifest up through the
+content watcher and adds `image_variants` to the question payloads.
+
+Requires Pillow (AVIF needs Pillow >= 11.3 or the pillow-avif-plugin package).
+
+Usage (from backend/):
+    python build_images.py [--content ../content] [--widths 480 960 1440] [--formats avif webp]
+                           [--quality 80] [--workers N]
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+from app.services.image_pipeline import build_images
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--content", type=Path, default=Path(__file__).parent.parent / "content")
+    parser.add_argument("--widths", type=int, nargs="+")
+    parser.add_argument("--formats", nargs="+")
+    parser.add_argument("--quality", type=int)
+    parser.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    args = parser.parse_args()
+    logging.basicConfig(level="INFO")
+
+    started = time.perf_counter()
+    manifest = build_images(args.content, args.widths, args.formats, args.quality, args.workers)
+    elapsed = time.perf_counter() - started
+
+    images = manifest["images"].values()
+    source_bytes = sum(img["source_bytes"] for img in images)
+    print(f"{len(manifest['images'])} images, formats {manifest['formats']}, widths {manifest['widths']} "
+          f"in {elapsed:.1f}s (source total {source_bytes / 1024:.0f} KiB)")
+    for fmt in manifest["formats"]:
+        for width in manifest["widths"]:
+            total = sum(v["bytes"] for img in images for v in img["variants"]
+                        if v["format"] == fmt and v["width"] == min(width, img["width"]))
+            print(f"  {fmt:<5} {width:>5}px: {total / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+EXPLAIN QUERY PLAN check for the hot queries of the leaderboard, admin, game and sync paths.
+
+Builds a fresh database through the normal create_all + migrations path and fails
+(exit code 1) if any listed query falls back to a full table scan or a temp B-tree sort.
+Run it after touching models, migrations or those queries.
+
+Usage (from backend/):
+    python check_query_plans.py [--db path/to/checkit.db]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+from sqlalchemy import desc, func, text
+from sqlmodel import SQLModel, select
+from app.database import build_engine
+from app.migrations import run_migrations, get_schema_version
+from app.models import User, GameScore, GameLog, GameSession, SystemConfig, EmailTemplate
+
+# name -> statement. Every one must be answered from an index.
+HOT_QUERIES = {
+    "leaderboard top-N per game": select(GameScore.score, User.nick).join(User)
+        .where(GameScore.game_type == "patch_master").order_by(desc(GameScore.score)).limit(10),
+    "game: already played check": select(GameScore)
+        .where(GameScore.user_id == 1, GameScore.game_type == "binary_brain"),
+    "game: user scores": select(GameScore).where(GameScore.user_id == 1),
+    "game: session lookup": select(GameSession)
+        .where(GameSession.user_id == 1, GameSession.game_type == "it_match"),
+    "config lookup": select(SystemConfig).where(SystemConfig.key == "competition_active"),
+    "register: nick check": select(User).where(User.nick == "nick"),
+    "register: email check": select(User).where(User.email == "a@b.c"),
+    "admin: user by id": select(User).where(User.id == 1),
+    "admin: newest logs": select(GameLog).order_by(desc(GameLog.timestamp)).limit(50),
+    "admin: email template": select(EmailTemplate).where(EmailTemplate.slug == "winner"),
+    "sync: unsynced score count": select(func.count()).select_from(GameScore).where(GameScore.synced == False),
+    "sync: unsynced score batch": select(GameScore).where(GameScore.synced == False).order_by(GameScore.id).limit(50),
+    "sync: unsynced log count": select(func.count()).select_from(GameLog).where(GameLog.synced == False),
+    "sync: unsynced log batch": select(GameLog).where(GameLog.synced == False).order_by(GameLog.id).limit(50),
+    "log retention": select(GameLog.id).where(GameLog.synced == True, GameLog.timestamp < datetime(2000, 1, 1)),
+}
+
+def _problems(plan_rows) -> list:
+    problems = []
+    for row in plan_rows:
+        detail = row[-1]
+        if detail.startswith("SCAN") and "USING" not in detail:
+            problems.append(detail)
+        elif "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+async def check(url: str) -> bool:
+    engine = build_engine(url)
+    async with engine.connect() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.commit()
+        await conn.run_sync(run_migrations)
+        version = await conn.run_sync(get_schema_version)
+        print(f"schema version {version}")
+
+        ok = True
+        for name, stmt in HOT_QUERIES.items():
+            sql = str(stmt.compile(engine.sync_engine, compile_kwargs={"literal_binds": True}))
+            plan = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+            problems = _problems(plan)
+            ok &= not problems
+            print(f"{'FAIL' if problems else 'ok  '}  {name}: " + "; ".join(row[-1] for row in plan))
+    await engine.dispose()
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="check an existing database file instead of a fresh one (it gets migrated)")
+    args = parser.parse_args()
+
+    if args.db:
+        ok = asyncio.run(check(f"sqlite+aiosqlite:///{args.db}"))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            ok = asyncio.run(check(f"sqlite+aiosqlite:///{os.path.join(tmp, 'plans.db')}"))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
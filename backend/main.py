@@ -1,3 +1,6 @@
+import time
+_import_started = time.perf_counter()  # cold start profile (app/startup_profiler.py)
+
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,6 +8,15 @@ from contextlib import asynccontextmanager
 from app.database import init_db
 from app.routers import auth, game, leaderboard, admin, it_match, text_match
 from app.services.sync_service import sync_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.push_service import push_service
+from app.services.log_service import log_service
+from app.services.config_store import config_store
+from app.services.content_service import content_service
+from app.services.email_service import email_service
+from app.services.auth_service import auth_service
+from app.hardware.lifecycle import hardware
+from app.startup_profiler import startup_profiler
 from app.simple_config import settings
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -17,28 +29,74 @@ logger = logging.getLogger("checkit")
 # Filter out spammy agent sync logs
 class EndpointFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
-        return "/api/v1/agent/sync" not in record.getMessage()
+        message = record.getMessage()
+        return "/api/v1/agent/sync" not in message and "/api/v1/agent/commands" not in message
 
 logging.getLogger("uvicorn.access").addFilter(EndpointFilter())
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    startup_profiler.lifespan_started()
     logger.info(f"System Node ID: {settings.node_id}")
     logger.info("Initializing Database...")
-    await init_db()
-    
-    # Initialize hardware here later
-    # app.state.hardware = ...
+    with startup_profiler.phase("database"):
+        await init_db()
+
+    logger.info("Loading System Config...")
+    with startup_profiler.phase("config"):
+        await config_store.load()
+
+    logger.info("Building Leaderboard...")
+    with startup_profiler.phase("leaderboard"):
+        await leaderboard_service.rebuild()
+
+    # GPIO / LED strip on the client only; the server keeps remote state
+    logger.info(f"Initializing Hardware ({settings.system.platform_role})...")
+    with startup_profiler.phase("hardware"):
+        hardware.start()
     
+    logger.info("Starting Log Writer...")
+    with startup_profiler.phase("log_writer"):
+        await log_service.start()
+
+    logger.info("Starting Content Watcher...")
+    with startup_profiler.phase("content_watcher"):
+        content_service.start_watching()
+
     logger.info("Starting Sync Service...")
-    await sync_service.start()
+    with startup_profiler.phase("sync"):
+        await sync_service.start()
+
+    logger.info("Starting Push Service...")
+    with startup_profiler.phase("push"):
+        await push_service.start()
+
+    logger.info("Resuming Email Jobs...")
+    with startup_profiler.phase("email_jobs"):
+        await email_service.start()
+
+    # Background refresh; the cached/fallback profanity list is already in use
+    with startup_profiler.phase("profanity_refresh"):
+        await auth_service.start()
+    startup_profiler.lifespan_ready()
     
     yield
     
+    await auth_service.stop()
+    await email_service.stop()
+
+    logger.info("Stopping Push Service...")
+    await push_service.stop()
+
     logger.info("Stopping Sync Service...")
     await sync_service.stop()
+
+    await content_service.stop_watching()
+
+    logger.info("Flushing Log Writer...")
+    await log_service.stop()
     
-    # Cleanup hardware
+    hardware.stop()
     logger.info("Shutting down...")
 
 app = FastAPI(
@@ -90,9 +148,10 @@ app.include_router(text_match.router, prefix=f"{API_V1_STR}/game/text-match", ta
 app.include_router(leaderboard.router, prefix=f"{API_V1_STR}/leaderboard", tags=["leaderboard"])
 app.include_router(admin.router, prefix=f"{API_V1_STR}/admin", tags=["admin"])
 
-from app.routers import agent, patch_master_queue
+from app.routers import agent, patch_master_queue, events
 app.include_router(agent.router, prefix=f"{API_V1_STR}/agent", tags=["agent"])
 app.include_router(patch_master_queue.router, prefix=f"{API_V1_STR}/game/patch-master/queue", tags=["patch-master-queue"])
+app.include_router(events.router, prefix=f"{API_V1_STR}/events", tags=["events"])
 
 # Mount content directory for images
 from pathlib import Path
@@ -102,8 +161,14 @@ CONTENT_DIR = Path(__file__).parent.parent / "content"
 if not CONTENT_DIR.exists():
     CONTENT_DIR.mkdir(parents=True, exist_ok=True)
     
+# Hashed image variants (backend/build_images.py): immutable, cached for a year by the kiosks.
+# Mounted before /api/content so it takes precedence.
+from app.services.image_pipeline import ImmutableStaticFiles, OPTIMIZED_DIR_NAME
+app.mount(f"/api/content/{OPTIMIZED_DIR_NAME}", ImmutableStaticFiles(directory=CONTENT_DIR / OPTIMIZED_DIR_NAME, check_dir=False), name="content_optimized")
 app.mount("/api/content", StaticFiles(directory=CONTENT_DIR), name="content")
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "node_id": settings.node_id}
+
+startup_profiler.imports_done(_import_started)
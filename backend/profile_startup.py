@@ -0,0 +1,90 @@
+"""
+Cold start profile of the backend: per-module import time and the duration of each
+lifespan phase, checked against a budget.
+
+`import main` and the app lifespan (startup, then shutdown) run in a fresh interpreter
+with `python -X importtime`, so nothing is warm from this process. The lifespan uses the
+real db/ folder and config, like a normal start. Exits with status 1 when imports +
+lifespan startup exceed --budget-ms, so it can gate a deploy on the Pi.
+
+Usage (from backend/):
+    python profile_startup.py [--budget-ms 3000] [--top 20] [--role client|server]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+CHILD = """
+import asyncio, json
+import main
+from app.startup_profiler import startup_profiler
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+
+asyncio.run(run())
+print("STARTUP_STATS " + json.dumps(startup_profiler.get_stats()))
+"""
+
+def parse_importtime(stderr: str):
+    """[(module, self_us, cumulative_us)] from the `-X importtime` report."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+def run_child(role: str):
+    env = dict(os.environ)
+    if role:
+        env["CHECKIT_PLATFORM_ROLE"] = role
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD], cwd=Path(__file__).parent,
+                          env=env, capture_output=True, text=True)
+    stats = next((json.loads(line.split(" ", 1)[1]) for line in proc.stdout.splitlines()
+                  if line.startswith("STARTUP_STATS ")), None)
+    if proc.returncode or stats is None:
+        sys.stderr.write(proc.stderr[-4000:])
+        sys.exit(f"Startup failed (exit code {proc.returncode}).")
+    return stats, parse_importtime(proc.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=3000, help="imports + lifespan startup")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--role", choices=["client", "server"], help="override system.platform_role")
+    args = parser.parse_args()
+
+    stats, modules = run_child(args.role)
+
+    packages = defaultdict(int)
+    for name, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    print(f"{'package':<32} {'self ms':>8}")
+    for name, self_us in sorted(packages.items(), key=lambda p: -p[1])[:args.top]:
+        print(f"{name:<32} {self_us / 1000:>8.1f}")
+
+    print(f"\n{'app module':<40} {'self ms':>8} {'cumul ms':>9}")
+    own = [m for m in modules if m[0] == "main" or m[0].startswith("app.")]
+    for name, self_us, cumulative_us in sorted(own, key=lambda m: -m[2])[:args.top]:
+        print(f"{name:<40} {self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}")
+
+    print(f"\n{'lifespan phase':<24} {'ms':>8}")
+    for phase in stats["phases"]:
+        print(f"{phase['name']:<24} {phase['ms']:>8.1f}")
+
+    total = stats["total_ms"]
+    print(f"\nimports {stats['imports_ms']} ms + lifespan {stats['lifespan_ms']} ms = {total} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    if total > args.budget_ms:
+        print("OVER BUDGET")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Local SMTP stand-in for trying the bulk email sender without a real mail server.
+
+Accepts every message (no TLS, no auth) and prints one line per message plus totals on
+exit. It can also inject failures to exercise the retry path: --fail-rate answers that
+share of RCPT commands with a transient 451, and --drop-every closes the connection
+after every N messages.
+
+Usage (from backend/):
+    python smtp_sink.py [--port 2525] [--fail-rate 0.1] [--drop-every 20]
+
+Then point the kiosk at it in the admin settings (or POST /api/v1/admin/config/<key>):
+    smtp_host=127.0.0.1  smtp_port=2525  smtp_starttls=false  smtp_user=  smtp_password=
+"""
+import argparse
+import asyncio
+import random
+import time
+
+class Sink:
+    def __init__(self, fail_rate: float, drop_every: int, quiet: bool):
+        self.fail_rate = fail_rate
+        self.drop_every = drop_every
+        self.quiet = quiet
+        self.stats = {"connections": 0, "messages": 0, "rejected": 0, "dropped": 0}
+        self.started = time.perf_counter()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        conn_messages = 0
+        recipients = []
+
+        async def reply(line: str):
+            writer.write((line + "\r\n").encode())
+            await writer.drain()
+
+        await reply("220 checkit-smtp-sink ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb in ("EHLO", "HELO"):
+                    await reply("250-checkit-smtp-sink\r\n250 8BITMIME" if verb == "EHLO" else "250 checkit-smtp-sink")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    if random.random() < self.fail_rate:
+                        self.stats["rejected"] += 1
+                        await reply("451 4.3.0 Try again later")
+                    else:
+                        recipients.append(command[8:].strip(" <>"))
+                        await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    self.stats["messages"] += 1
+                    conn_messages += 1
+                    if not self.quiet:
+                        print(f"#{self.stats['messages']:>5} -> {', '.join(recipients)}")
+                    await reply("250 OK queued")
+                    if self.drop_every and conn_messages % self.drop_every == 0:
+                        self.stats["dropped"] += 1
+                        break
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                elif verb in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        s = self.stats
+        return (f"{s['messages']} messages over {s['connections']} connections in {elapsed:.1f}s, "
+                f"{s['rejected']} rejected (451), {s['dropped']} connections dropped")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of RCPT commands answered with 451")
+    parser.add_argument("--drop-every", type=int, default=0, help="close the connection after N messages")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    sink = Sink(args.fail_rate, args.drop_every, args.quiet)
+    server = await asyncio.start_server(sink.handle, args.host, args.port)
+    print(f"SMTP sink listening on {args.host}:{args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        print(sink.summary())
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
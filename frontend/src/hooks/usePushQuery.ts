@@ -0,0 +1,34 @@
+import { useEffect, useRef, useState } from 'react'
+import { useQueryClient, type QueryKey } from '@tanstack/react-query'
+import { pushChannel, type PushTopic } from '../lib/push'
+
+/**
+ * Feeds a push topic into the React Query cache under queryKey.
+ * Returns true while the push socket is connected: pages then switch their
+ * refetchInterval off and only poll as a fallback when it drops.
+ */
+export function usePushQuery(topic: PushTopic, queryKey: QueryKey, options: { enabled?: boolean, transform?: (data: any, previous: any) => any } = {}) {
+    const { enabled = true, transform } = options
+    const queryClient = useQueryClient()
+    const [connected, setConnected] = useState(pushChannel.connected)
+    // Latest transform without resubscribing on every render
+    const transformRef = useRef(transform)
+    transformRef.current = transform
+    const keyHash = JSON.stringify(queryKey)
+
+    useEffect(() => {
+        if (!enabled) return
+        const offStatus = pushChannel.onStatus(setConnected)
+        const offData = pushChannel.subscribe(topic, (data) => {
+            queryClient.setQueryData(queryKey, (previous: any) => transformRef.current ? transformRef.current(data, previous) : data)
+        })
+        setConnected(pushChannel.connected)
+        return () => {
+            offData()
+            offStatus()
+        }
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [topic, keyHash, enabled, queryClient])
+
+    return enabled && connected
+}
@@ -121,6 +121,8 @@ export const setSystemConfig = async (key: string, value: string) => (await api.
 export const fetchEmailTemplates = async () => (await api.get('/admin/email-templates')).data
 export const updateEmailTemplate = async (slug: string, subject: string, body: string) => (await api.put(`/admin/email-templates/${slug}?subject=${encodeURIComponent(subject)}&body=${encodeURIComponent(body)}`)).data
 export const sendAllEmails = async () => (await api.post('/admin/email/send-all')).data
+export const fetchEmailJob = async (jobId: number) => (await api.get(`/admin/email/jobs/${jobId}`)).data
+export const resumeEmailJob = async (jobId: number) => (await api.post(`/admin/email/jobs/${jobId}/resume`)).data
 export const clearLogs = async () => (await api.delete('/admin/logs')).data
 export const resetDatabase = async () => (await api.delete('/admin/database')).data
 
@@ -137,3 +139,14 @@ export const adminPMQueueKick = async (userId: number) => (await api.delete(`/ga
 
 // Text Match
 export const fetchTextMatchQuestions = async (count: number = 8) => (await api.get(`/game/text-match/questions?count=${count}`)).data
+
+// Optimized question images (backend/build_images.py). Hashed URLs, cached immutably by the browser.
+export interface ImageVariant {
+    url: string // relative to /content/
+    width: number
+    format: string
+    type: string
+}
+
+export const imageSrcSet = (variants: ImageVariant[] | undefined, type: string) =>
+    (variants ?? []).filter(v => v.type === type).map(v => `${BACKEND_URL}/content/${v.url} ${v.width}w`).join(', ')
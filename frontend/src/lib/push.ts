@@ -0,0 +1,128 @@
+import { BACKEND_URL } from './api'
+
+// Client of the backend push channel (/api/v1/events/ws, see backend/app/routers/events.py).
+// One WebSocket per tab, shared by every page/hook; topics are ref-counted and
+// (un)subscribed on the open socket. Pages keep their REST polling only as a fallback
+// while the socket is down (see usePushQuery).
+
+export type PushTopic = 'queue' | 'patch_panel' | 'leaderboard' | 'nodes'
+
+type DataListener = (data: any) => void
+type StatusListener = (connected: boolean) => void
+
+const RECONNECT_MIN_MS = 1000
+const RECONNECT_MAX_MS = 15000
+
+function socketUrl(topics: string[]): string {
+    const url = new URL(`${BACKEND_URL}/v1/events/ws`, window.location.href)
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:'
+    url.searchParams.set('topics', topics.join(','))
+    const token = localStorage.getItem('admin_token')
+    if (token) url.searchParams.set('token', token) // required for the admin-only "nodes" topic
+    return url.toString()
+}
+
+class PushChannel {
+    private socket: WebSocket | null = null
+    private listeners = new Map<string, Set<DataListener>>()
+    private statusListeners = new Set<StatusListener>()
+    private state = new Map<string, any>() // last full data per topic, diffs are applied to it
+    private reconnectMs = RECONNECT_MIN_MS
+    private reconnectTimer: ReturnType<typeof setTimeout> | null = null
+    connected = false
+
+    subscribe(topic: PushTopic, listener: DataListener): () => void {
+        let set = this.listeners.get(topic)
+        const isNew = !set
+        if (!set) {
+            set = new Set()
+            this.listeners.set(topic, set)
+        }
+        set.add(listener)
+        if (this.state.has(topic)) listener(this.state.get(topic))
+
+        if (!this.socket) this.connect()
+        else if (isNew) this.send({ subscribe: [topic] })
+
+        return () => {
+            set!.delete(listener)
+            if (set!.size) return
+            this.listeners.delete(topic)
+            this.state.delete(topic)
+            this.send({ unsubscribe: [topic] })
+            if (!this.listeners.size) this.disconnect()
+        }
+    }
+
+    onStatus(listener: StatusListener): () => void {
+        this.statusListeners.add(listener)
+        return () => { this.statusListeners.delete(listener) }
+    }
+
+    private connect() {
+        if (this.reconnectTimer) {
+            clearTimeout(this.reconnectTimer)
+            this.reconnectTimer = null
+        }
+        const socket = new WebSocket(socketUrl([...this.listeners.keys()]))
+        this.socket = socket
+        socket.onopen = () => {
+            this.reconnectMs = RECONNECT_MIN_MS
+            this.setConnected(true)
+        }
+        socket.onmessage = (event) => {
+            try {
+                this.handle(JSON.parse(event.data))
+            } catch (e) { } // Ignore malformed messages
+        }
+        socket.onclose = () => {
+            if (this.socket !== socket) return // replaced or closed on purpose
+            this.socket = null
+            this.state.clear()
+            this.setConnected(false)
+            if (this.listeners.size) {
+                this.reconnectTimer = setTimeout(() => this.connect(), this.reconnectMs)
+                this.reconnectMs = Math.min(this.reconnectMs * 2, RECONNECT_MAX_MS)
+            }
+        }
+    }
+
+    private disconnect() {
+        const socket = this.socket
+        this.socket = null
+        if (this.reconnectTimer) clearTimeout(this.reconnectTimer)
+        this.reconnectTimer = null
+        socket?.close()
+        this.setConnected(false)
+    }
+
+    private send(msg: object) {
+        if (this.socket?.readyState === WebSocket.OPEN) this.socket.send(JSON.stringify(msg))
+        // Not open yet: the topics go out in the URL of the next connect
+    }
+
+    private handle(msg: any) {
+        const topic = msg?.topic
+        if (!topic || !this.listeners.has(topic)) return
+        let data
+        if (msg.type === 'snapshot') {
+            data = msg.data
+        } else if (msg.type === 'diff') {
+            if (!this.state.has(topic)) return // wait for the snapshot
+            data = { ...this.state.get(topic), ...msg.changed }
+            for (const key of msg.removed || []) delete data[key]
+        } else {
+            return
+        }
+        this.state.set(topic, data)
+        this.listeners.get(topic)?.forEach(listener => listener(data))
+    }
+
+    private setConnected(connected: boolean) {
+        if (this.connected === connected) return
+        this.connected = connected
+        this.statusListeners.forEach(listener => listener(connected))
+    }
+}
+
+export const pushChannel = new PushChannel()
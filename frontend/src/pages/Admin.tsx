@@ -1,21 +1,38 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import { api, fetchAdminUsers, fetchAdminScores, deleteUser, fetchSystemConfig, setSystemConfig, fetchEmailTemplates, updateEmailTemplate, sendAllEmails, clearLogs, resetDatabase, fetchPMQueue, adminPMQueueNext, adminPMQueueSetStatus, adminPMQueueKick, fetchUserScores, deleteUserScore } from '../lib/api'
+import { api, fetchAdminUsers, fetchAdminScores, deleteUser, fetchSystemConfig, setSystemConfig, fetchEmailTemplates, updateEmailTemplate, sendAllEmails, fetchEmailJob, resumeEmailJob, clearLogs, resetDatabase, fetchPMQueue, adminPMQueueNext, adminPMQueueSetStatus, adminPMQueueKick, fetchUserScores, deleteUserScore } from '../lib/api'
 import { useNavigate } from 'react-router-dom'
 import { Shield, Zap, RefreshCw, Lock, LogOut, Settings, Mail, X, ZoomIn } from 'lucide-react'
 import AdminLogin from './AdminLogin'
+import { usePushQuery } from '../hooks/usePushQuery'
 import React, { useState, useEffect } from 'react'
 
 // ── Screenshot viewer with metadata ──────────────────────────
-function ScreenshotViewer({ b64, name, onClose }: { b64: string; name: string; onClose: () => void }) {
-    const [dims, setDims] = useState<{ w: number; h: number } | null>(null)
-    const src = `data:image/*;base64,${b64}`
-    const sizeKb = Math.round((b64.length * 3) / 4 / 1024)
+interface ScreenshotMeta { name: string | null; content_type: string; size: number; width: number | null; height: number | null }
 
+function ScreenshotViewer({ userId, meta, onClose }: { userId: number; meta: ScreenshotMeta; onClose: () => void }) {
+    const [src, setSrc] = useState<string | null>(null)
+    const [dims, setDims] = useState<{ w: number; h: number } | null>(
+        meta.width && meta.height ? { w: meta.width, h: meta.height } : null
+    )
+    const name = meta.name || 'screenshot.png'
+    const sizeKb = Math.round(meta.size / 1024)
+
+    // Streamed from the backend (admin auth header), not embedded in the user list
     useEffect(() => {
+        let url: string | null = null
+        api.get(`/admin/users/${userId}/screenshot`, { responseType: 'blob' }).then(res => {
+            url = URL.createObjectURL(res.data)
+            setSrc(url)
+        }).catch(() => setSrc(null))
+        return () => { if (url) URL.revokeObjectURL(url) }
+    }, [userId])
+
+    useEffect(() => {
+        if (!src || dims) return
         const img = new window.Image()
         img.onload = () => setDims({ w: img.naturalWidth, h: img.naturalHeight })
         img.src = src
-    }, [src])
+    }, [src, dims])
 
     return (
         <div className="fixed inset-0 bg-black/85 z-50 flex items-center justify-center p-4" onClick={onClose}>
@@ -29,7 +46,11 @@ function ScreenshotViewer({ b64, name, onClose }: { b64: string; name: string; o
 
                 {/* Image panel */}
                 <div className="flex-1 min-h-0 flex items-center justify-center bg-black/60 p-3 relative">
-                    <img src={src} alt={name} className="max-w-full max-h-[60vh] md:max-h-[85vh] object-contain" />
+                    {src ? (
+                        <img src={src} alt={name} className="max-w-full max-h-[60vh] md:max-h-[85vh] object-contain" />
+                    ) : (
+                        <span className="text-primary/40 text-xs font-mono">...</span>
+                    )}
                     <button onClick={onClose} className="absolute top-2 right-2 hidden md:flex bg-black/80 border border-primary/30 text-primary/60 hover:text-primary p-1 transition-colors">
                         <X size={14} />
                     </button>
@@ -57,8 +78,8 @@ function ScreenshotViewer({ b64, name, onClose }: { b64: string; name: string; o
                     ))}
 
                     <div>
-                        <p className="text-primary/30 text-[9px] font-mono uppercase tracking-wider">BASE64 DŁUGOŚĆ</p>
-                        <p className="text-primary/60 text-[10px] font-mono mt-0.5">{b64.length.toLocaleString()} znaków</p>
+                        <p className="text-primary/30 text-[9px] font-mono uppercase tracking-wider">TYP MIME</p>
+                        <p className="text-primary/60 text-[10px] font-mono mt-0.5">{meta.content_type}</p>
                     </div>
                     <div>
                         <p className="text-primary/30 text-[9px] font-mono uppercase tracking-wider">STATUS</p>
@@ -83,10 +104,12 @@ export default function Admin() {
     const [emailSuccess, setEmailSuccess] = useState('')
     const [expandedUser, setExpandedUser] = useState<number | null>(null)
     const [customColor, setCustomColor] = useState<string>('#00ff00')
-    const [viewingScreenshot, setViewingScreenshot] = useState<{ b64: string; name: string } | null>(null)
+    const [viewingScreenshot, setViewingScreenshot] = useState<{ userId: number; meta: ScreenshotMeta } | null>(null)
 
     if (!token) return <AdminLogin />
 
+    // Not fed from the push channel: this endpoint reports the ports as disconnected while the
+    // RPi is offline, the raw patch_panel topic would show its last (stale) state instead
     const { data: status } = useQuery({
         queryKey: ['admin_hardware'],
         queryFn: fetchHardwareStatus,
@@ -119,10 +142,14 @@ export default function Admin() {
         enabled: activeTab === 'logs'
     })
 
+    // Nodes are pushed (admin-only topic); sync stats still come from the slower poll
+    const nodesPushed = usePushQuery('nodes', ['system_status'], {
+        transform: (d, prev) => prev && { ...prev, connected_nodes: d }
+    })
     const { data: systemStatus } = useQuery({
         queryKey: ['system_status'],
         queryFn: async () => (await api.get('/admin/system/status')).data,
-        refetchInterval: 5000 // Refresh often to see new nodes
+        refetchInterval: nodesPushed ? 30000 : 5000 // Refresh often to see new nodes when not pushed
     })
 
     const { data: config, refetch: refetchConfig } = useQuery({
@@ -154,14 +181,25 @@ export default function Admin() {
         }
     })
 
+    const [emailJobId, setEmailJobId] = useState<number | null>(null)
+
     const sendEmailsMutation = useMutation({
         mutationFn: sendAllEmails,
         onSuccess: (data: any) => {
+            setEmailJobId(data.job_id)
             setEmailSuccess(`Emails Queued: ${data.count} (Winners: ${data.winner_count})`)
             setTimeout(() => setEmailSuccess(''), 5000)
         }
     })
 
+    // Bulk send runs in the background; poll its progress while it is active
+    const { data: emailJob, refetch: refetchEmailJob } = useQuery({
+        queryKey: ['admin_email_job', emailJobId],
+        queryFn: () => fetchEmailJob(emailJobId!),
+        enabled: emailJobId !== null && activeTab === 'email',
+        refetchInterval: (query) => (query.state.data?.active === false ? false : 1000)
+    })
+
     const clearLogsMutation = useMutation({
         mutationFn: clearLogs,
         onSuccess: () => {
@@ -189,10 +227,11 @@ export default function Admin() {
     })
 
     // Queue State
+    const queuePushed = usePushQuery('queue', ['admin_pm_queue'], { enabled: activeTab === 'hardware' })
     const { data: queueState, refetch: refetchQueue } = useQuery({
         queryKey: ['admin_pm_queue'],
         queryFn: fetchPMQueue,
-        refetchInterval: 1500,
+        refetchInterval: queuePushed ? false : 1500,
         enabled: activeTab === 'hardware'
     })
     const nextPlayerMutation = useMutation({ mutationFn: adminPMQueueNext, onSuccess: () => refetchQueue() })
@@ -445,8 +484,8 @@ export default function Admin() {
 
             {viewingScreenshot && (
                 <ScreenshotViewer
-                    b64={viewingScreenshot.b64}
-                    name={viewingScreenshot.name}
+                    userId={viewingScreenshot.userId}
+                    meta={viewingScreenshot.meta}
                     onClose={() => setViewingScreenshot(null)}
                 />
             )}
@@ -484,11 +523,11 @@ export default function Admin() {
                                         </td>
                                         <td className="p-3">{new Date(u.created_at).toLocaleDateString()}</td>
                                         <td className="p-3">
-                                            {u.screenshot_b64 ? (
+                                            {u.screenshot ? (
                                                 <button
                                                     onClick={(e) => {
                                                         e.stopPropagation()
-                                                        setViewingScreenshot({ b64: u.screenshot_b64, name: u.screenshot_name || 'screenshot.png' })
+                                                        setViewingScreenshot({ userId: u.id, meta: u.screenshot })
                                                     }}
                                                     className="flex items-center gap-1 bg-green-900/30 hover:bg-green-900/60 text-green-400 hover:text-white px-2 py-1 text-xs border border-green-800 transition-colors"
                                                     title="Podgląd screenshota"
@@ -751,6 +790,30 @@ export default function Admin() {
 
                     {emailSuccess && <div className="mb-4 p-4 bg-green-500/20 text-white border border-green-500">{emailSuccess}</div>}
 
+                    {emailJob && (
+                        <div className="mb-4 p-4 border border-green-800 bg-black font-mono text-sm">
+                            <div className="flex justify-between text-white mb-2">
+                                <span>JOB #{emailJob.id}: {emailJob.status.toUpperCase()}</span>
+                                <span>{Math.round(emailJob.progress * 100)}%</span>
+                            </div>
+                            <div className="h-2 bg-green-900/30 mb-2">
+                                <div className="h-2 bg-green-500 transition-all" style={{ width: `${emailJob.progress * 100}%` }} />
+                            </div>
+                            <div className="text-gray-400">
+                                Wysłane: {emailJob.sent} · Błędy: {emailJob.failed} · Oczekujące: {emailJob.pending}
+                            </div>
+                            {emailJob.error && <div className="text-red-400 mt-2">{emailJob.error}</div>}
+                            {!emailJob.active && emailJob.pending > 0 && (
+                                <button
+                                    onClick={async () => { await resumeEmailJob(emailJob.id); refetchEmailJob() }}
+                                    className="mt-2 px-3 py-1 border border-green-500 text-green-400 hover:bg-green-900/30"
+                                >
+                                    WZNÓW WYSYŁKĘ
+                                </button>
+                            )}
+                        </div>
+                    )}
+
                     <div className="grid grid-cols-1 md:grid-cols-2 gap-8">
                         <div>
                             <h3 className="text-green-400 font-bold mb-4">SZABLONY WIADOMOŚCI</h3>
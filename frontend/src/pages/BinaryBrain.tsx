@@ -1,7 +1,7 @@
 import { useState, useEffect, useMemo } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useQuery, useMutation } from '@tanstack/react-query'
-import { fetchGameContent, submitGameScore, BACKEND_URL } from '../lib/api'
+import { fetchGameContent, submitGameScore, BACKEND_URL, imageSrcSet } from '../lib/api'
 import { useGameStore } from '../hooks/useGameStore'
 import { motion, AnimatePresence } from 'framer-motion'
 import { Zap } from 'lucide-react'
@@ -403,16 +403,21 @@ export default function BinaryBrain() {
 
                             {q?.image && (
                                 <div className="mb-4 md:mb-6 flex justify-center mx-auto w-full">
+                                    <picture className="contents">
+                                    <source type="image/avif" srcSet={imageSrcSet(q.image_variants, 'image/avif')} sizes="(min-width: 768px) 40vw, 100vw" />
+                                    <source type="image/webp" srcSet={imageSrcSet(q.image_variants, 'image/webp')} sizes="(min-width: 768px) 40vw, 100vw" />
                                     <img
                                         src={`${BACKEND_URL}/content/binary_brain/images/${q.image}`}
                                         className="max-h-[12rem] md:max-h-[20rem] w-auto max-w-full object-contain border border-primary/20 bg-black/50"
                                         onError={(e) => {
-                                            if (e.currentTarget.parentElement) {
-                                                e.currentTarget.parentElement.style.display = 'none';
+                                            const container = e.currentTarget.closest('div');
+                                            if (container) {
+                                                container.style.display = 'none';
                                             }
                                         }}
                                         alt="Question Visual"
                                     />
+                                    </picture>
                                 </div>
                             )}
 
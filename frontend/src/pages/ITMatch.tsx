@@ -1,7 +1,7 @@
 import { useState, useEffect, useRef } from 'react'
 import { motion, useMotionValue, useTransform, AnimatePresence } from 'framer-motion'
 import { useQuery, useMutation } from '@tanstack/react-query'
-import { fetchITMatchQuestions, submitGameScore, BACKEND_URL } from '../lib/api'
+import { fetchITMatchQuestions, submitGameScore, BACKEND_URL, imageSrcSet, type ImageVariant } from '../lib/api'
 import { useNavigate } from 'react-router-dom'
 import { Check, X, Search } from 'lucide-react'
 import { useGameStore } from '../hooks/useGameStore'
@@ -11,6 +11,7 @@ interface Question {
     id: number
     question: string
     image: string
+    image_variants?: ImageVariant[]
     is_correct: boolean // true = RIGHT (Safe), false = LEFT (Danger)
 }
 
@@ -446,7 +447,11 @@ function Card({ question, onSwipe, gameState }: { question: Question, onSwipe: (
 
             <div className="w-full h-auto flex-1 bg-black/40 border border-primary/10 mb-3 md:mb-6 flex items-center justify-center overflow-hidden relative z-10 max-h-[45vh] md:max-h-[55vh]">
                 {question.image && question.image !== 'none' ? (
-                    <img src={`${BACKEND_URL}/content/it_match/images/${question.image}`} alt="Quiz" draggable={false} className="object-cover w-full h-full pointer-events-none" onError={(e) => e.currentTarget.style.display = 'none'} />
+                    <picture className="contents">
+                        <source type="image/avif" srcSet={imageSrcSet(question.image_variants, 'image/avif')} sizes="(min-width: 768px) 60vw, 100vw" />
+                        <source type="image/webp" srcSet={imageSrcSet(question.image_variants, 'image/webp')} sizes="(min-width: 768px) 60vw, 100vw" />
+                        <img src={`${BACKEND_URL}/content/it_match/images/${question.image}`} alt="Quiz" draggable={false} className="object-cover w-full h-full pointer-events-none" onError={(e) => e.currentTarget.style.display = 'none'} />
+                    </picture>
                 ) : (
                     <span className="text-primary/20 font-mono text-sm">BRAK_ZDJĘCIA</span>
                 )}
@@ -3,14 +3,17 @@ import { fetchLeaderboard } from '../lib/api'
 import { useNavigate } from 'react-router-dom'
 import { ArrowLeft, Trophy } from 'lucide-react'
 import { useEffect } from 'react'
+import { usePushQuery } from '../hooks/usePushQuery'
 import sparkSomeLogo from '../assets/sparkSomeLogo_Black.png'
 
 export default function Leaderboard() {
     const navigate = useNavigate()
+    // Live updates over the push socket; polling only while it is down
+    const pushed = usePushQuery('leaderboard', ['leaderboard'])
     const { data, isLoading } = useQuery({
         queryKey: ['leaderboard'],
         queryFn: fetchLeaderboard,
-        refetchInterval: 5000 // Live updates
+        refetchInterval: pushed ? false : 5000
     })
 
     // Auto-scroll logic for TV
@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { fetchPatchPanelState, submitGameScore, fetchPMQueue, joinPMQueue, leavePMQueue, startPMQueue, triggerTimeoutFlash, finishPMGame, api } from '../lib/api'
 import { useGameStore } from '../hooks/useGameStore'
+import { usePushQuery } from '../hooks/usePushQuery'
 import { Zap, Users, ShieldAlert, PlayCircle, X } from 'lucide-react'
 import clsx from 'clsx'
 import sparkSomeLogo from '../assets/sparkSomeLogo_Black.png'
@@ -31,10 +32,18 @@ export default function PatchMaster() {
     const [displayOrder, setDisplayOrder] = useState<number[]>([])
 
     // --- QUEUE DATA ---
+    // Pushed over the events socket; polling only while it is down
+    const queuePushed = usePushQuery('queue', ['pm_queue'], {
+        // The push topic is shared by all kiosks: position is per user, like GET /queue computes it
+        transform: (d) => {
+            const idx = d.queue.findIndex((u: any) => u.id === user?.id)
+            return { ...d, position: idx >= 0 ? idx + 1 : null }
+        }
+    })
     const { data: qState } = useQuery({
         queryKey: ['pm_queue'],
         queryFn: fetchPMQueue,
-        refetchInterval: 1500
+        refetchInterval: queuePushed ? false : 1500
     })
 
     // Mutations
@@ -63,12 +72,14 @@ export default function PatchMaster() {
         }
     })
 
-    // Hardware State Poll
+    // Hardware State (pushed on every cable change; 500ms poll as the fallback)
+    const hardwareEnabled = (gameStartedLocal && !isFinished) || qState?.status === 'resetting' || qState?.status === 'waiting_for_player'
+    const hardwarePushed = usePushQuery('patch_panel', ['patch_panel'], { enabled: hardwareEnabled })
     const { data: hardwareState } = useQuery({
         queryKey: ['patch_panel'],
         queryFn: fetchPatchPanelState,
-        refetchInterval: 500,
-        enabled: (gameStartedLocal && !isFinished) || qState?.status === 'resetting' || qState?.status === 'waiting_for_player'
+        refetchInterval: hardwarePushed ? false : 500,
+        enabled: hardwareEnabled
     })
 
     const submitMutation = useMutation({
@@ -3,6 +3,7 @@ import { fetchLeaderboard, api, fetchPatchPanelState } from '../lib/api'
 import { useState, useEffect, useRef, useMemo, memo } from 'react'
 import { Zap } from 'lucide-react'
 import { motion, AnimatePresence } from 'framer-motion'
+import { usePushQuery } from '../hooks/usePushQuery'
 import sparkSomeLogo from '../assets/sparkSomeLogo_Black.png'
 
 // ─── Matrix background ─────────────────────────────────────────────────────────
@@ -100,18 +101,21 @@ const Section = memo(({ title, list }: { title: string; list: any[] }) => (
 // ─── Main component ────────────────────────────────────────────────────────────
 
 export default function ScreenLeaderboard() {
+    // Leaderboard, queue and ports come over the push socket; the intervals below only run while it is down
+    const leaderboardPushed = usePushQuery('leaderboard', ['leaderboard'])
     const { data, isLoading } = useQuery({
         queryKey: ['leaderboard'],
         queryFn: fetchLeaderboard,
-        refetchInterval: 5000,
+        refetchInterval: leaderboardPushed ? false : 5000,
         staleTime: 4000,
         refetchIntervalInBackground: true,
     })
 
+    const queuePushed = usePushQuery('queue', ['pm_queue_global'])
     const { data: pmQueue } = useQuery({
         queryKey: ['pm_queue_global'],
         queryFn: async () => (await api.get('/game/patch-master/queue')).data,
-        refetchInterval: 1000,
+        refetchInterval: queuePushed ? false : 1000,
         refetchIntervalInBackground: true,
         select: (d: any) => ({
             status: d.status as string | undefined,
@@ -122,10 +126,11 @@ export default function ScreenLeaderboard() {
     })
 
     // Hardware state — port mini-grid visible on screen during PM game
+    const hwPushed = usePushQuery('patch_panel', ['pm_hw_screen'], { enabled: pmQueue?.status === 'playing' })
     const { data: hwState } = useQuery({
         queryKey: ['pm_hw_screen'],
         queryFn: fetchPatchPanelState,
-        refetchInterval: 500,
+        refetchInterval: hwPushed ? false : 500,
         enabled: pmQueue?.status === 'playing',
         refetchIntervalInBackground: true,
     })
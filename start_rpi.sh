@@ -67,6 +67,10 @@ echo ">>> Installing Dependencies..."
 if ! python3 -c "import rpi_lgpio" &> /dev/null; then
     pip install rpi-lgpio
 fi
+# LED effect frames are rendered with NumPy
+if ! python3 -c "import numpy" &> /dev/null; then
+    pip install numpy
+fi
 pip install -r requirements-core.txt
 
 # 4. Run Application